@@ -0,0 +1,302 @@
+"""
+Session-Aligned Price Panel
+===========================
+
+Builds the [sessions x tickers] price panel every stage consumes, aligned
+once to the NYSE session calendar:
+
+- rows:     exchange sessions (weekends, exchange holidays and special
+            closures excluded) - 7-day crypto bars are sampled on the
+            sessions, never the other way round
+- close:    forward-filled from each ticker's first bar; NaN before it
+            (never back-filled, so warm-up rows cannot see later prices)
+- open:     raw open; the carried close where the ticker has no bar (a
+            flat bar: zero overnight and intraday return)
+- high/low: raw, NaN where the ticker has no bar (no true range)
+- valid:    boolean mask of the cells that hold a real bar
+
+Sessions come from pandas_market_calendars when it is installed, else from
+the NYSE holiday rules below. Downloaded bars go through
+data_validation.quarantine() before alignment (store bars were validated
+at publish). load_panel() caches panels per process by
+source version (price matrix store version or latest downloaded bar), so
+repeated loads do no reindexing; cached arrays are read-only.
+
+Usage:
+    from aligned_panel import build_panel, load_panel
+    panel = load_panel(tickers, '2024-01-01')
+    closes, valid = panel.frame('close'), panel.valid_frame()
+
+    python aligned_panel.py --sessions 2024-01-01 2024-12-31
+    python aligned_panel.py --start 2024-01-01     # Load and summarize the universe
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Mapping, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay,
+                                    USMartinLutherKingJr, USMemorialDay, USPresidentsDay,
+                                    USThanksgivingDay, nearest_workday, sunday_to_monday)
+
+from singleflight import latest_bar_date
+
+PANEL_FIELDS = ('close', 'open', 'high', 'low')
+
+# Unscheduled full-day NYSE closures
+SPECIAL_CLOSURES = [
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',  # September 11
+    '2004-06-11',  # President Reagan funeral
+    '2007-01-02',  # President Ford funeral
+    '2012-10-29', '2012-10-30',  # Hurricane Sandy
+    '2018-12-05',  # President G.H.W. Bush funeral
+    '2025-01-09',  # President Carter funeral
+]
+
+_CACHE_SIZE = 8
+_panel_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """NYSE full-day holidays (a Saturday New Year's Day is not observed)"""
+
+    rules = [
+        Holiday('New Year', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=32)
+def _sessions(start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+    try:
+        import pandas_market_calendars as mcal
+        schedule = mcal.get_calendar('NYSE').schedule(start_date=start, end_date=end)
+        return pd.DatetimeIndex(schedule.index).normalize().tz_localize(None)
+    except ImportError:
+        pass
+    holidays = NYSEHolidayCalendar().holidays(start, end)
+    days = pd.bdate_range(start, end)
+    return days[~days.isin(holidays) & ~days.isin(pd.DatetimeIndex(SPECIAL_CLOSURES))]
+
+
+def session_index(start, end=None) -> pd.DatetimeIndex:
+    """
+    NYSE sessions in [start, end)
+
+    Args:
+        start: First date (inclusive)
+        end: Last date (exclusive; None = through today)
+    """
+    start = pd.Timestamp(start).normalize()
+    last = pd.Timestamp(datetime.now().date()) if end is None else pd.Timestamp(end).normalize() - timedelta(days=1)
+    if last < start:
+        return pd.DatetimeIndex([])
+    return _sessions(start, last)
+
+
+class AlignedPanel:
+    """Dense [sessions x tickers] float arrays plus a validity mask"""
+
+    def __init__(self, dates: pd.DatetimeIndex, tickers: pd.Index, arrays: Dict[str, np.ndarray],
+                 valid: np.ndarray, source: str = None, dropped: int = 0):
+        self.dates = dates
+        self.tickers = tickers
+        self.arrays = arrays
+        self.valid = valid
+        self.source = source  # Where the bars came from ('store:<version>', 'download:<bar>', None)
+        self.dropped = dropped  # Close bars outside the sessions (e.g. crypto weekends)
+        self.store = None  # PriceMatrices the bars came from, if any
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.arrays
+
+    @property
+    def fields(self):
+        return list(self.arrays)
+
+    def array(self, field: str) -> np.ndarray:
+        """[sessions x tickers] float64 array"""
+        return self.arrays[field]
+
+    def frame(self, field: str) -> pd.DataFrame:
+        """DataFrame view of a field (no copy)"""
+        return pd.DataFrame(self.arrays[field], index=self.dates, columns=self.tickers, copy=False)
+
+    def valid_frame(self) -> pd.DataFrame:
+        """True where the ticker had a real bar on the session"""
+        return pd.DataFrame(self.valid, index=self.dates, columns=self.tickers, copy=False)
+
+    def bar_counts(self) -> pd.Series:
+        """Real bars per ticker"""
+        return pd.Series(self.valid.sum(axis=0), index=self.tickers)
+
+    def select(self, tickers: Iterable[str]) -> 'AlignedPanel':
+        """Panel restricted to tickers (in the given order)"""
+        cols = self.tickers.get_indexer(list(tickers))
+        if (cols < 0).any():
+            missing = [t for t, c in zip(tickers, cols) if c < 0]
+            raise KeyError(f"Not in panel: {', '.join(missing)}")
+        panel = AlignedPanel(self.dates, self.tickers[cols],
+                             {name: arr[:, cols] for name, arr in self.arrays.items()},
+                             self.valid[:, cols], self.source, self.dropped)
+        panel.store = self.store
+        return panel
+
+    def freeze(self) -> 'AlignedPanel':
+        """Make the arrays read-only (shared, cached panels)"""
+        for arr in list(self.arrays.values()) + [self.valid]:
+            arr.setflags(write=False)
+        return self
+
+
+def as_frame(data: Union[pd.DataFrame, Mapping[str, pd.Series]]) -> pd.DataFrame:
+    """[dates x tickers] frame with a tz-naive, normalized, unique date index"""
+    frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(dict(data))
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame = frame.set_axis(index.normalize(), axis=0)
+    # Several bars on one date (e.g. intraday stamps) - keep the last
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def build_panel(data: Mapping[str, Union[pd.DataFrame, Mapping[str, pd.Series]]], start, end=None,
+                source: str = None) -> AlignedPanel:
+    """
+    Align raw bars to the session index in one pass per field
+
+    Args:
+        data: {field: [dates x tickers] DataFrame or {ticker: Series}};
+              'close' is required, empty fields are skipped
+        start: First session (inclusive)
+        end: Last session (exclusive; None = through today)
+        source: Label kept on the panel
+
+    Returns:
+        AlignedPanel without leading/trailing sessions that have no bar at all
+    """
+    closes = as_frame(data['close'])
+    tickers = pd.Index(closes.columns)
+    sessions = session_index(start, end)
+
+    in_window = (closes.index >= sessions[0]) & (closes.index <= sessions[-1]) if len(sessions) else []
+    raw_close = closes.reindex(sessions)
+    dropped = int(closes[in_window].notna().to_numpy().sum() - raw_close.notna().to_numpy().sum()) \
+        if len(sessions) else 0
+
+    valid = raw_close.notna().to_numpy()
+    rows = np.flatnonzero(valid.any(axis=1))
+    keep = slice(rows[0], rows[-1] + 1) if len(rows) else slice(0, 0)
+    sessions, valid = sessions[keep], valid[keep]
+
+    close = raw_close.iloc[keep].ffill().to_numpy(dtype=np.float64)
+    arrays = {'close': close}
+    for field, values in data.items():
+        if field == 'close' or values is None or len(values) == 0:
+            continue
+        raw = as_frame(values).reindex(index=sessions, columns=tickers).to_numpy(dtype=np.float64)
+        if field == 'open':
+            # No bar or no open: trade at the carried/same-day close
+            raw = np.where(valid & ~np.isnan(raw), raw, close)
+        elif field in ('high', 'low'):
+            raw = np.where(valid, raw, np.nan)
+        else:
+            raw = pd.DataFrame(np.where(valid, raw, np.nan)).ffill().to_numpy(dtype=np.float64)
+        arrays[field] = np.ascontiguousarray(raw)
+
+    return AlignedPanel(sessions, tickers, arrays, valid, source, dropped)
+
+
+def load_panel(tickers: Iterable[str], start, end=None, fields: Iterable[str] = PANEL_FIELDS) -> AlignedPanel:
+    """
+    Aligned panel from the price matrix store if it covers the request,
+    else one yfinance batch; cached per source version
+
+    Args:
+        tickers: Tickers (failed downloads stay as all-NaN columns)
+        start: First session (inclusive)
+        end: Last session (exclusive; None = through the latest bar)
+        fields: Fields to load (close is always loaded)
+
+    Returns:
+        Read-only AlignedPanel (shared with other callers in this process)
+    """
+    from data_validation import quarantine
+    from price_matrix_store import attach, fetch_ohlc
+
+    tickers = sorted(set(tickers))
+    fields = tuple(dict.fromkeys(('close',) + tuple(fields)))
+    store = attach()
+    if store is not None and store.covers(tickers, start, end):
+        source = f"store:{store.version}"
+    else:
+        store = None
+        source = f"download:{latest_bar_date()}"
+
+    key = (source, tuple(tickers), str(pd.Timestamp(start).date()),
+           None if end is None else str(pd.Timestamp(end).date()), fields)
+    with _cache_lock:
+        if key in _panel_cache:
+            _panel_cache.move_to_end(key)
+            return _panel_cache[key]
+
+    if store is not None:
+        data = {f: store.frame(f, start, end)[tickers] for f in fields if f in store}
+    else:
+        ohlc = quarantine(fetch_ohlc(tickers, start, end), label='panel download')
+        data = {f: ohlc[f] for f in fields if f in ohlc}
+    panel = build_panel(data, start, end, source=source).freeze()
+    panel.store = store
+
+    with _cache_lock:
+        _panel_cache[key] = panel
+        while len(_panel_cache) > _CACHE_SIZE:
+            _panel_cache.popitem(last=False)
+    return panel
+
+
+def clear_cache():
+    """Drop all cached panels"""
+    with _cache_lock:
+        _panel_cache.clear()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Session calendar / aligned panel inspection')
+    parser.add_argument('--sessions', nargs=2, metavar=('START', 'END'), help='List sessions in [START, END)')
+    parser.add_argument('--start', help='Load the store universe from START and summarize')
+    args = parser.parse_args()
+
+    if args.sessions:
+        sessions = session_index(*args.sessions)
+        print(f"{len(sessions)} NYSE sessions in [{args.sessions[0]}, {args.sessions[1]})")
+        print(f"  {', '.join(d.strftime('%Y-%m-%d') for d in sessions[:5])} ... "
+              f"{', '.join(d.strftime('%Y-%m-%d') for d in sessions[-5:])}")
+    if args.start:
+        from price_matrix_store import store_universe
+
+        panel = load_panel(store_universe(), args.start)
+        counts = panel.bar_counts()
+        print(f"Panel ({panel.source}): {len(panel)} sessions x {len(panel.tickers)} tickers, "
+              f"{panel.valid.mean():.1%} cells with a bar, {panel.dropped} off-session bars dropped")
+        short = counts[counts < len(panel)]
+        for ticker, n in short.items():
+            print(f"  {ticker}: {n} bars")
@@ -15,6 +15,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 from quad_portfolio_backtest import QuadrantPortfolioBacktest
+from backtest_store import run_cached
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -43,7 +44,10 @@ class BacktestAnalyzer:
             atr_period=14
         )
         
-        self.results = self.backtest.run_backtest()
+        self.results = run_cached(self.backtest)
+        if self.backtest.price_data is None:
+            # Run restored from the backtest store - the analysis also needs prices
+            self.backtest.fetch_data()
         
         print(f"\n+ Backtest complete: {self.results['total_return']:.2%} return")
         
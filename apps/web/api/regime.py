@@ -6,8 +6,7 @@ import os
 # Add current directory to path for local imports
 sys.path.insert(0, os.path.dirname(__file__))
 
-from signal_generator import SignalGenerator
-from config import QUAD_ALLOCATIONS, QUAD_INDICATORS
+from snapshots import serve_snapshot
 
 QUADRANT_INFO = {
     'Q1': {
@@ -32,38 +31,35 @@ QUADRANT_INFO = {
     },
 }
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        try:
-            # Generate signals to get regime data
-            generator = SignalGenerator(QUAD_ALLOCATIONS, QUAD_INDICATORS)
-            data = generator.generate_signals()
-            regime = data['regime']
+def build_regime_response(data, envelope):
+    """Shape the signals snapshot into the regime endpoint response"""
+    regime = data['regime']
 
-            quadrant_info = QUADRANT_INFO.get(regime['primaryQuadrant'], {
-                'name': regime['primaryQuadrant'],
-                'description': '',
-                'color': '#6b7280',
-            })
+    quadrant_info = QUADRANT_INFO.get(regime['primaryQuadrant'], {
+        'name': regime['primaryQuadrant'],
+        'description': '',
+        'color': '#6b7280',
+    })
 
-            response_data = {
-                'quadrant': regime['primaryQuadrant'],
-                'primaryQuadrant': regime['primaryQuadrant'],
-                'secondaryQuadrant': regime['secondaryQuadrant'],
-                'growthDirection': regime['growthDirection'],
-                'inflationDirection': regime['inflationDirection'],
-                'confidence': regime['confidence'],
-                'daysInRegime': regime['daysInRegime'],
-                'lastChange': regime['lastChange'],
-                'timestamp': data['generatedAt'],
-                'quadrantInfo': quadrant_info,
-            }
+    return {
+        'quadrant': regime['primaryQuadrant'],
+        'primaryQuadrant': regime['primaryQuadrant'],
+        'secondaryQuadrant': regime['secondaryQuadrant'],
+        'growthDirection': regime['growthDirection'],
+        'inflationDirection': regime['inflationDirection'],
+        'confidence': regime['confidence'],
+        'daysInRegime': regime['daysInRegime'],
+        'lastChange': regime['lastChange'],
+        'timestamp': data['generatedAt'],
+        'quadrantInfo': quadrant_info,
+    }
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode())
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            # Serve the latest precomputed signals snapshot (built by scripts/build_snapshots.py)
+            serve_snapshot(self, 'signals', transform=build_regime_response)
 
         except Exception as e:
             self.send_response(500)
@@ -0,0 +1,182 @@
+"""
+Snapshot Store for the Web API
+==============================
+
+Signals, regime and history are computed once per bar by
+scripts/build_snapshots.py and written here as versioned JSON snapshots.
+The API handlers only read the latest snapshot, so a request never triggers
+a market-data download or a backtest.
+
+Layout (apps/web/data/snapshots):
+    <name>.json              Latest snapshot (atomically replaced)
+    <name>/<version>.json    Previous versions (pruned to keep_versions)
+
+Each snapshot is an envelope: {name, version, bar, builtAt, data}.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+SNAPSHOT_DIR = os.environ.get(
+    'SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'snapshots')
+)
+
+DEFAULT_MAX_AGE = 300  # Browser/CDN cache seconds
+DEFAULT_STALE_WHILE_REVALIDATE = 3600
+
+# Parsed snapshots cached per process, keyed by file identity (mtime/size)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _atomic_write(path: str, body: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_snapshot(name: str, data: dict, bar: str, snapshot_dir: str = None,
+                   keep_versions: int = 5) -> str:
+    """
+    Write a new snapshot version and point <name>.json at it
+
+    Args:
+        name: Snapshot name ('signals', 'history', ...)
+        data: JSON-serializable payload served to clients
+        bar: Market bar (YYYY-MM-DD) the payload was computed from
+        snapshot_dir: Override snapshot directory
+        keep_versions: Number of versioned files to keep
+
+    Returns:
+        Version string
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    version = f"{bar.replace('-', '')}-{hashlib.sha256(payload).hexdigest()[:12]}"
+
+    envelope = {
+        'name': name,
+        'version': version,
+        'bar': bar,
+        'builtAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'data': data,
+    }
+    body = json.dumps(envelope, indent=2).encode()
+
+    _atomic_write(os.path.join(snapshot_dir, name, f"{version}.json"), body)
+    _atomic_write(os.path.join(snapshot_dir, f"{name}.json"), body)
+
+    versions_dir = os.path.join(snapshot_dir, name)
+    versions = sorted(f for f in os.listdir(versions_dir) if f.endswith('.json'))
+    for old in versions[:-keep_versions]:
+        os.remove(os.path.join(versions_dir, old))
+
+    return version
+
+
+def load_snapshot(name: str, snapshot_dir: str = None):
+    """
+    Load the latest snapshot envelope (cached until the file changes)
+
+    Returns:
+        Envelope dict, or None if no snapshot has been built yet
+    """
+    path = os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{name}.json")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+    with open(path, 'rb') as f:
+        envelope = json.loads(f.read())
+
+    with _cache_lock:
+        _cache[path] = (key, envelope)
+    return envelope
+
+
+def _not_modified(handler, etag: str, last_modified: datetime) -> bool:
+    if_none_match = handler.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+    if_modified_since = handler.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def serve_snapshot(handler, name: str, transform=None, variant: str = '',
+                   max_age: int = DEFAULT_MAX_AGE):
+    """
+    Serve the latest snapshot from a BaseHTTPRequestHandler
+
+    Args:
+        handler: Request handler (do_GET self)
+        name: Snapshot name
+        transform: Optional callable(data, envelope) -> response dict
+        variant: Extra key mixed into the ETag when the response depends on query params
+        max_age: Cache-Control max-age in seconds
+    """
+    envelope = load_snapshot(name)
+    if envelope is None:
+        handler.send_response(503)
+        handler.send_header('Content-type', 'application/json')
+        handler.send_header('Retry-After', '60')
+        handler.end_headers()
+        handler.wfile.write(json.dumps({'error': f"Snapshot '{name}' not built yet"}).encode())
+        return
+
+    etag = f'"{envelope["version"]}{("-" + hashlib.sha256(variant.encode()).hexdigest()[:8]) if variant else ""}"'
+    last_modified = datetime.strptime(envelope['builtAt'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+    def send_cache_headers():
+        handler.send_header('ETag', etag)
+        handler.send_header('Last-Modified', format_datetime(last_modified, usegmt=True))
+        handler.send_header('Cache-Control',
+                            f'public, max-age={max_age}, s-maxage={max_age}, '
+                            f'stale-while-revalidate={DEFAULT_STALE_WHILE_REVALIDATE}')
+        handler.send_header('Access-Control-Allow-Origin', '*')
+
+    if _not_modified(handler, etag, last_modified):
+        handler.send_response(304)
+        send_cache_headers()
+        handler.end_headers()
+        return
+
+    data = envelope['data']
+    if transform is not None:
+        data = transform(data, envelope)
+    body = json.dumps(data).encode()
+
+    handler.send_response(200)
+    handler.send_header('Content-type', 'application/json')
+    handler.send_header('Content-Length', str(len(body)))
+    send_cache_headers()
+    handler.end_headers()
+    handler.wfile.write(body)
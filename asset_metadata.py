@@ -0,0 +1,293 @@
+"""
+Asset Metadata Index
+====================
+
+Persisted per-ticker metadata for the whole strategy universe, so looking
+up a display name or category never needs a network call:
+
+- name:              display name
+- category:          dashboard/web category (growth, bonds, commodities, ...)
+- publish_category:  category used by scripts/publish_signals.py
+- quads:             quadrants whose allocation includes the ticker (config order)
+- asset_class:       equity, fixed_income, commodity, real_estate, crypto
+- currency:          trading currency
+
+The index is a JSON file in apps/web/data built offline from the tables
+below. --refresh fills names/currencies for tickers without a known name in
+one bulk Yahoo Finance pass; the result is committed with the index.
+Tickers missing from the file fall back to the same static tables.
+
+Usage:
+    python asset_metadata.py              # Rebuild from the static tables
+    python asset_metadata.py --refresh    # Also look up unknown names online
+    python asset_metadata.py --show QQQ
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import QUAD_ALLOCATIONS, QUAD_INDICATORS
+from universe import UNIVERSE
+
+ASSET_METADATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'apps', 'web', 'data', 'asset_metadata.json')
+
+# Known asset names
+ASSET_NAMES = {
+    'QQQ': 'Invesco QQQ Trust',
+    'ARKK': 'ARK Innovation ETF',
+    'IWM': 'iShares Russell 2000 ETF',
+    'XLC': 'Communication Services Select Sector SPDR',
+    'XLY': 'Consumer Discretionary Select Sector SPDR',
+    'TLT': 'iShares 20+ Year Treasury Bond ETF',
+    'LQD': 'iShares iBoxx $ Investment Grade Corporate',
+    'XLE': 'Energy Select Sector SPDR',
+    'DBC': 'Invesco DB Commodity Index Tracking',
+    'GCC': 'WisdomTree Enhanced Commodity Strategy',
+    'LIT': 'Global X Lithium & Battery Tech ETF',
+    'AA': 'Alcoa Corporation',
+    'PALL': 'Aberdeen Physical Palladium Shares',
+    'VALT': 'ETF Managers Group Short-Term Treasury',
+    'XLF': 'Financial Select Sector SPDR',
+    'XLI': 'Industrial Select Sector SPDR',
+    'XLB': 'Materials Select Sector SPDR',
+    'XOP': 'SPDR S&P Oil & Gas Exploration & Production',
+    'FCG': 'First Trust Natural Gas ETF',
+    'USO': 'United States Oil Fund',
+    'VNQ': 'Vanguard Real Estate ETF',
+    'PAVE': 'Global X U.S. Infrastructure Development',
+    'VTV': 'Vanguard Value ETF',
+    'IWD': 'iShares Russell 1000 Value ETF',
+    'GLD': 'SPDR Gold Shares',
+    'DBA': 'Invesco DB Agriculture Fund',
+    'REMX': 'VanEck Rare Earth/Strategic Metals ETF',
+    'URA': 'Global X Uranium ETF',
+    'TIP': 'iShares TIPS Bond ETF',
+    'VTIP': 'Vanguard Short-Term Inflation-Protected Sec',
+    'XLV': 'Health Care Select Sector SPDR',
+    'XLU': 'Utilities Select Sector SPDR',
+    'VGLT': 'Vanguard Long-Term Treasury ETF',
+    'IEF': 'iShares 7-10 Year Treasury Bond ETF',
+    'MUB': 'iShares National Muni Bond ETF',
+    'XLP': 'Consumer Staples Select Sector SPDR',
+    'QID': 'ProShares UltraShort QQQ',
+    'IBIT': 'iShares Bitcoin Trust ETF',
+    'ETHA': 'iShares Ethereum Trust ETF',
+    'VUG': 'Vanguard Growth ETF',
+    'BTC-USD': 'Bitcoin USD',
+    'VIXY': 'ProShares VIX Short-Term Futures ETF',
+}
+
+# Dashboard / web signal categories
+CATEGORIES = {
+    # Growth
+    'QQQ': 'growth', 'ARKK': 'growth', 'IWM': 'growth', 'VUG': 'growth',
+    'XLC': 'growth', 'XLY': 'growth',
+    # Crypto
+    'IBIT': 'crypto', 'ETHA': 'crypto', 'BTC-USD': 'crypto',
+    # Bonds
+    'TLT': 'bonds', 'LQD': 'bonds', 'IEF': 'bonds', 'VGLT': 'bonds',
+    'MUB': 'bonds', 'TIP': 'bonds', 'VTIP': 'bonds',
+    # Commodities
+    'XLE': 'commodities', 'DBC': 'commodities', 'GCC': 'commodities',
+    'GLD': 'commodities', 'DBA': 'commodities', 'USO': 'commodities',
+    'LIT': 'commodities', 'AA': 'commodities', 'PALL': 'commodities',
+    'REMX': 'commodities', 'URA': 'commodities',
+    # Energy
+    'XOP': 'energy', 'FCG': 'energy',
+    # Cyclicals
+    'XLF': 'cyclicals', 'XLI': 'cyclicals', 'XLB': 'cyclicals',
+    # Defensive
+    'XLU': 'defensive', 'XLP': 'defensive', 'XLV': 'defensive',
+    # Real Assets
+    'VNQ': 'real_assets', 'PAVE': 'real_assets',
+    # Value
+    'VTV': 'value', 'IWD': 'value',
+}
+
+# Categories used for the published (Supabase) signals
+PUBLISH_CATEGORIES = {
+    # Core
+    'BTC': 'core', 'IBIT': 'core',
+    'ETH': 'core', 'ETHA': 'core',
+    # High Beta / Growth
+    'QQQ': 'growth', 'ARKK': 'growth', 'IWM': 'growth',
+    'SOL': 'high_beta', 'AVAX': 'high_beta',
+    # DeFi
+    'UNI': 'defi', 'AAVE': 'defi',
+    # Commodities
+    'XLE': 'commodities', 'DBC': 'commodities', 'GLD': 'commodities',
+    'GCC': 'commodities', 'USO': 'commodities',
+    # Bonds
+    'TLT': 'bonds', 'VGLT': 'bonds', 'IEF': 'bonds', 'LQD': 'bonds',
+    # Defensive
+    'XLU': 'defensive', 'XLP': 'defensive', 'XLV': 'defensive',
+}
+
+# Asset class by category (tickers not covered default to equity)
+_CATEGORY_ASSET_CLASS = {
+    'crypto': 'crypto',
+    'bonds': 'fixed_income',
+    'commodities': 'commodity',
+    'real_assets': 'real_estate',
+}
+ASSET_CLASS_OVERRIDES = {
+    'AA': 'equity', 'LIT': 'equity', 'REMX': 'equity', 'URA': 'equity',
+    'PAVE': 'equity', 'VALT': 'fixed_income',
+    'BTC': 'crypto', 'ETH': 'crypto', 'SOL': 'crypto', 'AVAX': 'crypto',
+    'UNI': 'crypto', 'AAVE': 'crypto',
+}
+
+_index = None
+_index_key = None
+_index_lock = threading.Lock()
+
+
+def universe() -> List[str]:
+    """Every ticker the strategy, dashboard or publisher can show"""
+    tickers = set(ASSET_NAMES) | set(CATEGORIES) | set(PUBLISH_CATEGORIES)
+    for assets in QUAD_ALLOCATIONS.values():
+        tickers.update(assets)
+    for indicators in QUAD_INDICATORS.values():
+        tickers.update(indicators)
+    return sorted(tickers)
+
+
+def build_entry(ticker: str) -> Dict:
+    """Metadata for one ticker from the static tables"""
+    category = CATEGORIES.get(ticker, 'other')
+    return {
+        'name': ASSET_NAMES.get(ticker, ticker),
+        'category': category,
+        'publish_category': PUBLISH_CATEGORIES.get(ticker, 'other'),
+        'quads': list(UNIVERSE.quads_of(ticker)),
+        'asset_class': ASSET_CLASS_OVERRIDES.get(ticker, _CATEGORY_ASSET_CLASS.get(category, 'equity')),
+        'currency': 'USD',
+    }
+
+
+def _fetch_online(tickers: List[str]) -> Dict[str, Dict]:
+    """Names/currencies from Yahoo Finance in one bulk pass (missing fields skipped)"""
+    import yfinance as yf
+
+    found = {}
+    batch = yf.Tickers(' '.join(tickers))
+    for ticker in tickers:
+        try:
+            info = batch.tickers[ticker].info
+        except Exception as e:
+            print(f"  ! {ticker}: lookup failed ({e})")
+            continue
+        fields = {}
+        for field in ('longName', 'shortName', 'name'):
+            if info.get(field):
+                fields['name'] = info[field]
+                break
+        if info.get('currency'):
+            fields['currency'] = info['currency']
+        if fields:
+            found[ticker] = fields
+    return found
+
+
+def build_index(refresh=False, path: str = ASSET_METADATA_FILE) -> Dict[str, Dict]:
+    """
+    Build the index for the whole universe and write it
+
+    Args:
+        refresh: Look up tickers without a known name on Yahoo Finance
+        path: Index location
+
+    Returns:
+        {ticker: metadata}
+    """
+    previous = _read_file(path) or {}
+    assets = {t: build_entry(t) for t in universe()}
+
+    # Keep names looked up by earlier refreshes
+    for ticker, entry in assets.items():
+        if ticker not in ASSET_NAMES and ticker in previous:
+            entry['name'] = previous[ticker].get('name', entry['name'])
+            entry['currency'] = previous[ticker].get('currency', entry['currency'])
+
+    if refresh:
+        unknown = [t for t, e in assets.items() if e['name'] == t]
+        if unknown:
+            print(f"Looking up {len(unknown)} unknown tickers...")
+            for ticker, fields in _fetch_online(unknown).items():
+                assets[ticker].update(fields)
+                print(f"  + {ticker}: {assets[ticker]['name']}")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'builtAt': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), 'assets': assets},
+                  f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    print(f"✓ Asset metadata index: {len(assets)} tickers -> {path}")
+    return assets
+
+
+def _read_file(path: str) -> Optional[Dict[str, Dict]]:
+    try:
+        with open(path) as f:
+            return json.load(f)['assets']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def load_index(path: str = ASSET_METADATA_FILE) -> Dict[str, Dict]:
+    """Persisted index (memoized until the file changes; empty if not built)"""
+    global _index, _index_key
+
+    try:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        key = (path, None, None)
+
+    with _index_lock:
+        if _index is None or _index_key != key:
+            _index = _read_file(path) or {}
+            _index_key = key
+        return _index
+
+
+def get_asset(ticker: str) -> Dict:
+    """Metadata for a ticker (static tables if it is not in the index)"""
+    ticker = ticker.upper()
+    entry = load_index().get(ticker)
+    return entry if entry is not None else build_entry(ticker)
+
+
+def get_asset_name(ticker: str) -> str:
+    return get_asset(ticker)['name']
+
+
+def get_asset_category(ticker: str, scheme: str = 'dashboard') -> str:
+    """Category of a ticker ('dashboard' or 'publish' scheme)"""
+    entry = get_asset(ticker)
+    return entry['publish_category'] if scheme == 'publish' else entry['category']
+
+
+def get_asset_quads(ticker: str) -> List[str]:
+    return get_asset(ticker)['quads']
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build the offline asset metadata index')
+    parser.add_argument('--refresh', action='store_true', help='Look up unknown names on Yahoo Finance')
+    parser.add_argument('--path', default=ASSET_METADATA_FILE, help='Index location')
+    parser.add_argument('--show', metavar='TICKER', help='Print one entry instead of rebuilding')
+    args = parser.parse_args()
+
+    if args.show:
+        print(json.dumps(get_asset(args.show), indent=2))
+    else:
+        build_index(refresh=args.refresh, path=args.path)
@@ -0,0 +1,261 @@
+"""
+Backtest Daily Loop over Typed Arrays
+=====================================
+
+The path-dependent part of QuadrantPortfolioBacktest.run_backtest (pending
+entry confirmation, ATR stops against entry prices, stable-quad skipping,
+minimum trade delta, overnight/intraday P&L and cost accounting) written
+as one scalar loop over float/int arrays.
+
+The same function runs either as plain Python or compiled with Numba
+(@njit, optional dependency); both perform the reference engine's
+floating-point operations in the same order, so equity curves are
+bitwise identical to engine='reference'. scripts/check_engine_parity.py
+verifies that.
+
+Usage:
+    bt = QuadrantPortfolioBacktest(start, end, engine='numba')   # or 'python'
+    bt.run_backtest()
+"""
+
+import numpy as np
+
+from quad_portfolio_backtest import COST_PER_LEG_BPS
+from universe import UNIVERSE
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+QUADS = list(UNIVERSE.quads)
+
+# Indices into the stats array
+STATS = ('rebalances', 'entries_confirmed', 'entries_rejected', 'trades_skipped', 'stops_hit')
+
+
+def simulation_inputs(backtest, target_weights, top_quads) -> dict:
+    """
+    Typed arrays for the loop, aligned to target_weights [dates x tickers]
+
+    Missing tickers (no EMA/ATR/open column) become NaN columns, which the
+    loop treats exactly like the reference engine treats absent columns.
+    """
+    dates, columns = target_weights.index, target_weights.columns
+
+    def matrix(frame):
+        if frame is None:
+            return np.full((len(dates), len(columns)), np.nan)
+        return np.ascontiguousarray(frame.reindex(index=dates, columns=columns).to_numpy(dtype=np.float64))
+
+    quad_code = UNIVERSE.quad_index
+
+    atr_stop = backtest.atr_stop_loss
+    return {
+        'price': matrix(backtest.price_data),
+        'opens': matrix(backtest.open_data),
+        'ema': matrix(backtest.ema_data),
+        'atr': matrix(backtest.atr_data),
+        'targets': np.ascontiguousarray(target_weights.to_numpy(dtype=np.float64)),
+        'top1': np.array([quad_code[q] for q in top_quads['Top1'].reindex(dates)], dtype=np.int64),
+        'top2': np.array([quad_code[q] for q in top_quads['Top2'].reindex(dates)], dtype=np.int64),
+        'members': UNIVERSE.membership_for(columns),
+        'has_open': columns.isin(backtest.open_data.columns) if backtest.open_data is not None
+                    else np.zeros(len(columns), dtype=np.bool_),
+        'has_atr': columns.isin(backtest.atr_data.columns) if backtest.atr_data is not None
+                   else np.zeros(len(columns), dtype=np.bool_),
+        'initial_capital': float(backtest.initial_capital),
+        'atr_stop': np.nan if atr_stop is None else float(atr_stop),
+        'threshold': float(backtest.min_trade_threshold),
+        'cost_rate': COST_PER_LEG_BPS / 10000,
+    }
+
+
+def simulate_days(price, opens, ema, atr, targets, top1, top2, members, has_open, has_atr,
+                  initial_capital, atr_stop, threshold, cost_rate):
+    """
+    Daily state machine (row i trades on row i-1's signals)
+
+    Returns:
+        (equity, stats, total_costs, entry_prices, entry_index, entry_atrs)
+        where entry_index is the entry row of each open position (-1 = none)
+    """
+    n_days, n_cols = price.shape
+    n_quads = members.shape[0]
+    use_stops = not np.isnan(atr_stop)
+
+    equity = np.empty(n_days)
+    equity[0] = initial_capital
+    actual = np.zeros(n_cols)
+    prev_positions = np.zeros(n_cols)
+    pending = np.zeros(n_cols)
+    confirmed = np.zeros(n_cols, dtype=np.bool_)
+    confirmed_weights = np.zeros(n_cols)
+    stable = np.zeros(n_cols, dtype=np.bool_)
+    entry_prices = np.full(n_cols, np.nan)
+    entry_index = np.full(n_cols, -1, dtype=np.int64)
+    entry_atrs = np.full(n_cols, np.nan)
+    stats = np.zeros(5, dtype=np.int64)
+    total_costs = 0.0
+    prev1 = -1
+    prev2 = -1
+
+    for i in range(1, n_days):
+        t = i - 1  # Signal date (T-1)
+        cur1 = top1[t]
+        cur2 = top2[t]
+
+        # Pending entries: confirm if above EMA TODAY
+        any_confirmed = False
+        for j in range(n_cols):
+            confirmed[j] = False
+            if pending[j] > 0:
+                if not np.isnan(price[i, j]) and not np.isnan(ema[i, j]) and price[i, j] > ema[i, j]:
+                    confirmed[j] = True
+                    confirmed_weights[j] = pending[j]
+                    any_confirmed = True
+                    stats[1] += 1
+                else:
+                    stats[2] += 1
+                pending[j] = 0.0
+
+        # ATR stops
+        any_stop = False
+        if use_stops:
+            for j in range(n_cols):
+                if actual[j] > 0 and not np.isnan(entry_prices[j]):
+                    current_price = price[i, j]
+                    a = atr[i, j]
+                    if not np.isnan(current_price) and not np.isnan(a):
+                        stop_price = entry_prices[j] - (a * atr_stop)
+                        if current_price <= stop_price:
+                            actual[j] = 0.0
+                            entry_prices[j] = np.nan
+                            entry_index[j] = -1
+                            entry_atrs[j] = np.nan
+                            stats[4] += 1
+                            any_stop = True
+
+        quads_changed = cur1 != prev1 or cur2 != prev2
+        should_rebalance = prev1 < 0 or quads_changed or any_stop
+        if not should_rebalance and i >= 2:
+            # EMA crossovers between the last two signal dates
+            for j in range(n_cols):
+                if (not np.isnan(price[t, j]) and not np.isnan(ema[t, j])
+                        and not np.isnan(price[t - 1, j]) and not np.isnan(ema[t - 1, j])
+                        and (price[t, j] > ema[t, j]) != (price[t - 1, j] > ema[t - 1, j])):
+                    should_rebalance = True
+                    break
+
+        rebalance = should_rebalance or any_confirmed
+        if rebalance:
+            stats[0] += 1
+
+            # Quads that stayed in the top 2
+            for j in range(n_cols):
+                stable[j] = False
+            if prev1 >= 0 and quads_changed:
+                for q in range(n_quads):
+                    if (q == prev1 or q == prev2) and (q == cur1 or q == cur2):
+                        for j in range(n_cols):
+                            if members[q, j]:
+                                stable[j] = True
+
+            for j in range(n_cols):
+                if confirmed[j]:
+                    actual[j] = confirmed_weights[j]
+                    if use_stops:
+                        entry_prices[j] = price[i, j]
+                        entry_index[j] = i
+                        if has_atr[j]:
+                            entry_atrs[j] = atr[t, j]
+
+            for j in range(n_cols):
+                target_weight = targets[t, j]
+                current_position = actual[j]
+                if target_weight == 0 and current_position > 0:
+                    actual[j] = 0.0
+                    entry_prices[j] = np.nan
+                    entry_index[j] = -1
+                    entry_atrs[j] = np.nan
+                elif target_weight > 0 and current_position == 0:
+                    if not confirmed[j]:
+                        pending[j] = target_weight
+                elif target_weight > 0 and current_position > 0:
+                    if stable[j]:
+                        stats[3] += 1
+                    elif abs(target_weight - current_position) > threshold:
+                        actual[j] = target_weight
+                    else:
+                        stats[3] += 1
+
+        prev1 = cur1
+        prev2 = cur2
+
+        # Overnight at OLD positions, intraday at NEW positions
+        daily_return = 0.0
+        for j in range(n_cols):
+            if not has_open[j]:
+                continue
+            prev_close = price[t, j]
+            today_open = opens[i, j]
+            today_close = price[i, j]
+            if np.isnan(prev_close) or np.isnan(today_open) or np.isnan(today_close):
+                continue
+            daily_return += prev_positions[j] * (today_open / prev_close - 1)
+            daily_return += actual[j] * (today_close / today_open - 1)
+
+        equity[i] = equity[i - 1] * (1 + daily_return)
+
+        if rebalance:
+            daily_costs = 0.0
+            for j in range(n_cols):
+                position_change = abs(actual[j] - prev_positions[j])
+                if position_change > 0.0001:
+                    daily_costs += (position_change * equity[i]) * cost_rate
+            equity[i] -= daily_costs
+            total_costs += daily_costs
+
+        for j in range(n_cols):
+            prev_positions[j] = actual[j]
+
+    return equity, stats, total_costs, entry_prices, entry_index, entry_atrs
+
+
+if NUMBA_AVAILABLE:
+    _simulate_days_compiled = njit(cache=True)(simulate_days)
+
+
+def simulate(inputs: dict, compiled=True) -> dict:
+    """
+    Run the loop on simulation_inputs()
+
+    Args:
+        inputs: Arrays from simulation_inputs()
+        compiled: Use the Numba build (falls back to Python if not installed)
+
+    Returns:
+        Dict of equity, stats ({name: count}), total_costs, entry_prices,
+        entry_index, entry_atrs
+    """
+    loop = simulate_days
+    if compiled:
+        if NUMBA_AVAILABLE:
+            loop = _simulate_days_compiled
+        else:
+            print("! numba not installed - running the Python loop")
+
+    equity, stats, total_costs, entry_prices, entry_index, entry_atrs = loop(
+        inputs['price'], inputs['opens'], inputs['ema'], inputs['atr'], inputs['targets'],
+        inputs['top1'], inputs['top2'], inputs['members'], inputs['has_open'], inputs['has_atr'],
+        inputs['initial_capital'], inputs['atr_stop'], inputs['threshold'], inputs['cost_rate'])
+
+    return {
+        'equity': equity,
+        'stats': {name: int(stats[k]) for k, name in enumerate(STATS)},
+        'total_costs': float(total_costs),
+        'entry_prices': entry_prices,
+        'entry_index': entry_index,
+        'entry_atrs': entry_atrs,
+    }
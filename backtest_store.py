@@ -0,0 +1,245 @@
+"""
+Backtest Result Store
+=====================
+
+Content-addressed cache of finished QuadrantPortfolioBacktest runs, so the
+production run, history generation, the dashboard worker and the strategy
+tools share one simulation per configuration instead of each re-running it.
+
+A run's key is the SHA-256 of:
+- parameters:  dates (end capped at the latest completed bar), capital,
+               momentum/EMA/vol/ATR settings, max_positions, stops, min delta
+               (not the engine - all engines produce identical output)
+- universe:    QUAD_ALLOCATIONS, ADDITIONAL_BACKTEST_TICKERS, leverage
+- data:        price matrix store version if it covers the run, else the
+               latest completed bar (a fresh download)
+- code:        the source of the modules that compute a run
+
+Each entry persists portfolio_value, target_weights, quad_history, the
+final entry state (entry_prices/dates/atrs), trading costs and results.
+Market data matrices are not stored: callers that need price_data,
+open_data or atr_data after a restored run call backtest.fetch_data().
+
+Usage:
+    from backtest_store import run_cached
+    results = run_cached(backtest)     # Restores a stored run or runs and stores it
+
+    python backtest_store.py --list
+    python backtest_store.py --prune 30     # Drop entries older than 30 days
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import pandas as pd
+
+from config import QUAD_ALLOCATIONS
+from singleflight import SingleFlight, latest_bar_date
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKTEST_STORE_DIR = os.environ.get('BACKTEST_STORE_DIR', os.path.join(ROOT, '.backtest_store'))
+
+# Parameters that change a run's output
+RUN_PARAMS = ('initial_capital', 'momentum_days', 'ema_period', 'vol_lookback', 'max_positions',
+              'atr_stop_loss', 'atr_period', 'min_trade_threshold')
+
+# Modules whose source determines a run's output
+CODE_FILES = ('quad_portfolio_backtest.py', 'signal_kernel.py', 'backtest_loop.py',
+              'regime_history.py', 'universe.py', 'price_matrix_store.py', 'aligned_panel.py',
+              'data_validation.py', 'config.py')
+
+# Backtest attributes persisted with a run
+STORED_ATTRIBUTES = ('portfolio_value', 'target_weights', 'quad_history', 'entry_prices',
+                     'entry_dates', 'entry_atrs', 'total_trading_costs')
+
+# Concurrent run_cached() calls for the same key share one simulation
+_run_flight = SingleFlight()
+_code_version = None
+
+
+def code_version() -> str:
+    """Hash of the source files that compute a run (once per process)"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for name in CODE_FILES:
+            digest.update(name.encode())
+            with open(os.path.join(ROOT, name), 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def data_version(backtest) -> str:
+    """Price data a fetch_data() call would load right now"""
+    from price_matrix_store import attach
+
+    tickers, fetch_start = backtest.fetch_window()
+    store = attach()
+    if store is not None and store.covers(tickers, fetch_start, backtest.end_date):
+        return f"store:{store.version}"
+    return f"download:{latest_bar_date()}"
+
+
+def key_material(backtest) -> Dict:
+    """Everything a run's key is derived from"""
+    import quad_portfolio_backtest as qpb
+
+    latest_end = pd.Timestamp(latest_bar_date()) + timedelta(days=1)
+    end = min(pd.Timestamp(backtest.end_date).normalize(), latest_end)
+    return {
+        'start_date': pd.Timestamp(backtest.start_date).strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'params': {name: getattr(backtest, name) for name in RUN_PARAMS},
+        'universe': {
+            'allocations': {q: list(assets.items()) for q, assets in QUAD_ALLOCATIONS.items()},
+            'additional': list(qpb.ADDITIONAL_BACKTEST_TICKERS),
+            'leverage': [qpb.BASE_QUAD_LEVERAGE, qpb.Q1_LEVERAGE_MULTIPLIER],
+        },
+        'data': data_version(backtest),
+        'code': code_version(),
+    }
+
+
+def run_key(backtest) -> str:
+    """Content address of a configured (not necessarily run) backtest"""
+    material = json.dumps(key_material(backtest), sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()[:24]
+
+
+def _entry_path(key: str, store_dir: str = None) -> str:
+    return os.path.join(store_dir or BACKTEST_STORE_DIR, f'{key}.pkl')
+
+
+def _write_pickle(obj, path: str):
+    """Pickle to a temp file next to path, then atomically replace it"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.run-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_run(backtest, results: Dict, key: str = None, store_dir: str = None) -> str:
+    """
+    Store a finished run
+
+    Returns:
+        The run's key
+    """
+    key = key or run_key(backtest)
+    os.makedirs(store_dir or BACKTEST_STORE_DIR, exist_ok=True)
+    entry = {name: getattr(backtest, name, None) for name in STORED_ATTRIBUTES}
+    entry.update({
+        'key': key,
+        'material': key_material(backtest),
+        'results': results,
+        'saved_at': datetime.now(),
+    })
+
+    _write_pickle(entry, _entry_path(key, store_dir))
+    return key
+
+
+def load_run(key: str, store_dir: str = None) -> Optional[Dict]:
+    """Stored entry for a key (None if missing or unreadable)"""
+    try:
+        with open(_entry_path(key, store_dir), 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"⚠️ Backtest store entry {key} unreadable ({e}) - recomputing")
+        return None
+
+
+def run_cached(backtest, refresh=False, store_dir: str = None) -> Dict:
+    """
+    Results of backtest.run_backtest(), from the store when already computed
+
+    On a hit the stored attributes (portfolio_value, target_weights,
+    quad_history, entry state, costs) are set on the backtest object; its
+    market data (price_data, ...) stays unloaded.
+
+    Args:
+        backtest: Configured QuadrantPortfolioBacktest
+        refresh: Re-run and overwrite even if stored
+
+    Returns:
+        The run's results dict
+    """
+    key = run_key(backtest)
+    entry = None if refresh else load_run(key, store_dir)
+    if entry is None:
+        def compute():
+            results = backtest.run_backtest()
+            save_run(backtest, results, key=key, store_dir=store_dir)
+            return {name: getattr(backtest, name, None) for name in STORED_ATTRIBUTES}, results
+
+        (attributes, results), shared = _run_flight.do(key, compute)
+        if not shared:
+            print(f"✓ Stored backtest run {key}")
+            return results
+        entry = dict(attributes, results=results)
+    else:
+        print(f"✓ Backtest run {key} loaded from store (saved {entry['saved_at']:%Y-%m-%d %H:%M})")
+
+    for name in STORED_ATTRIBUTES:
+        setattr(backtest, name, entry[name])
+    return entry['results']
+
+
+def list_runs(store_dir: str = None):
+    """Stored entries, newest first: [(key, saved_at, material, results)]"""
+    store_dir = store_dir or BACKTEST_STORE_DIR
+    if not os.path.isdir(store_dir):
+        return []
+    runs = []
+    for name in os.listdir(store_dir):
+        if name.endswith('.pkl'):
+            entry = load_run(name[:-4], store_dir)
+            if entry is not None:
+                runs.append((entry['key'], entry['saved_at'], entry['material'], entry['results']))
+    return sorted(runs, key=lambda r: r[1], reverse=True)
+
+
+def prune_runs(max_age_days: int, store_dir: str = None) -> int:
+    """Delete entries saved more than max_age_days ago; returns how many"""
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    removed = 0
+    for key, saved_at, _, _ in list_runs(store_dir):
+        if saved_at < cutoff:
+            os.remove(_entry_path(key, store_dir))
+            removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect/prune the backtest result store')
+    parser.add_argument('--list', action='store_true', help='List stored runs')
+    parser.add_argument('--prune', type=int, metavar='DAYS', help='Delete runs older than DAYS')
+    parser.add_argument('--dir', default=BACKTEST_STORE_DIR, help='Store location')
+    args = parser.parse_args()
+
+    if args.prune is not None:
+        print(f"✓ Removed {prune_runs(args.prune, args.dir)} runs older than {args.prune} days")
+
+    if args.list or args.prune is None:
+        runs = list_runs(args.dir)
+        print(f"{len(runs)} stored runs in {args.dir}")
+        for key, saved_at, material, results in runs:
+            params = material['params']
+            print(f"  {key}  {saved_at:%Y-%m-%d %H:%M}  {material['start_date']}..{material['end_date']}  "
+                  f"top={params['max_positions']} stop={params['atr_stop_loss']}  "
+                  f"{material['data']}  return {results['total_return']:.1f}%")
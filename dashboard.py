@@ -8,57 +8,23 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from functools import lru_cache
 import warnings
-import yfinance as yf
 import uuid
 
 warnings.filterwarnings('ignore')
 
 from signal_generator import SignalGenerator
-from config import QUAD_ALLOCATIONS, QUADRANT_DESCRIPTIONS, QUAD_INDICATORS
+from config import QUADRANT_DESCRIPTIONS, QUAD_INDICATORS
 from quad_portfolio_backtest import QuadrantPortfolioBacktest
+from singleflight import SingleFlight, latest_bar_date
+from regime_history import load_regime_history, SCORE_COLUMNS
+from asset_metadata import get_asset_name, get_asset_quads
+import dashboard_cache
+from dashboard_worker import ARTIFACTS, refresh_artifact
 
-# Known asset names (fallback to Yahoo Finance lookup otherwise)
-ASSET_NAME_OVERRIDES = {
-    'QQQ': 'Invesco QQQ Trust',
-    'ARKK': 'ARK Innovation ETF',
-    'IWM': 'iShares Russell 2000 ETF',
-    'XLC': 'Communication Services Select Sector SPDR',
-    'XLY': 'Consumer Discretionary Select Sector SPDR',
-    'TLT': 'iShares 20+ Year Treasury Bond ETF',
-    'LQD': 'iShares iBoxx $ Investment Grade Corporate',
-    'XLE': 'Energy Select Sector SPDR',
-    'DBC': 'Invesco DB Commodity Index Tracking',
-    'GCC': 'WisdomTree Enhanced Commodity Strategy',
-    'LIT': 'Global X Lithium & Battery Tech ETF',
-    'AA': 'Alcoa Corporation',
-    'PALL': 'Aberdeen Physical Palladium Shares',
-    'VALT': 'ETF Managers Group Short-Term Treasury',
-    'XLF': 'Financial Select Sector SPDR',
-    'XLI': 'Industrial Select Sector SPDR',
-    'XLB': 'Materials Select Sector SPDR',
-    'XOP': 'SPDR S&P Oil & Gas Exploration & Production',
-    'FCG': 'First Trust Natural Gas ETF',
-    'USO': 'United States Oil Fund',
-    'VNQ': 'Vanguard Real Estate ETF',
-    'PAVE': 'Global X U.S. Infrastructure Development',
-    'VTV': 'Vanguard Value ETF',
-    'IWD': 'iShares Russell 1000 Value ETF',
-    'GLD': 'SPDR Gold Shares',
-    'DBA': 'Invesco DB Agriculture Fund',
-    'REMX': 'VanEck Rare Earth/Strategic Metals ETF',
-    'URA': 'Global X Uranium ETF',
-    'TIP': 'iShares TIPS Bond ETF',
-    'VTIP': 'Vanguard Short-Term Inflation-Protected Sec',
-    'XLV': 'Health Care Select Sector SPDR',
-    'XLU': 'Utilities Select Sector SPDR',
-    'VGLT': 'Vanguard Long-Term Treasury ETF',
-    'IEF': 'iShares 7-10 Year Treasury Bond ETF',
-    'MUB': 'iShares National Muni Bond ETF',
-    'XLP': 'Consumer Staples Select Sector SPDR',
-    'QID': 'ProShares UltraShort QQQ'
-}
+# Coalesces concurrent cold-cache computations across sessions
+_history_flight = SingleFlight()
+_artifact_flight = SingleFlight()
 
 # Page config
 st.set_page_config(
@@ -104,27 +70,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@lru_cache(maxsize=256)
-def get_asset_name(ticker: str) -> str:
-    """Return a human-readable asset name for a ticker."""
-    ticker = ticker.upper()
-    if ticker in ASSET_NAME_OVERRIDES:
-        return ASSET_NAME_OVERRIDES[ticker]
-    
-    try:
-        info = yf.Ticker(ticker).info
-        for field in ('longName', 'shortName', 'name'):
-            value = info.get(field)
-            if value:
-                return value
-    except Exception:
-        pass
-    
-    return ticker
-
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_quadrant_history(days=180):
     """Get quadrant scores history for the last N days"""
+    # Precomputed regime history table (regime_history.py) - no data download
+    table = load_regime_history()
+    if table is not None and not table.empty:
+        return table[SCORE_COLUMNS + ['Top1', 'Top2', 'Score1', 'Score2']].tail(days)
+    
+    result, _ = _history_flight.do(('quadrant_history', latest_bar_date(), days),
+                                   _compute_quadrant_history, days)
+    return result
+
+def _compute_quadrant_history(days):
+    """Compute quadrant scores history (single run per bar/days)"""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days + 100)  # Extra buffer for momentum calc
     
@@ -168,11 +127,25 @@ def get_quadrant_history(days=180):
         return result
     return pd.DataFrame()
 
-@st.cache_data(ttl=300)
+def get_cached_artifact(name):
+    """
+    Read an artifact published by dashboard_worker.py
+    
+    Stale values are served as-is (the worker is asked to refresh them).
+    Only a cold cache - worker never run - computes here, once per process.
+    
+    Returns:
+        (value, published_at datetime)
+    """
+    entry = dashboard_cache.read(name)
+    if entry is None:
+        _artifact_flight.do(('artifact', name), refresh_artifact, name)
+        entry = dashboard_cache.read(name)
+    return entry.value, datetime.fromtimestamp(entry.published_at)
+
 def get_current_signals():
-    """Get current trading signals"""
-    sg = SignalGenerator()
-    signals = sg.generate_signals()
+    """Get current trading signals (from the shared dashboard cache)"""
+    signals, _ = get_cached_artifact('signals')
     return signals
 
 def main():
@@ -183,6 +156,9 @@ def main():
         st.header("⚙️ Settings")
         refresh_button = st.button("🔄 Refresh Data", type="primary")
         if refresh_button:
+            # Ask the worker to recompute; keep serving current values meanwhile
+            for name in ARTIFACTS:
+                dashboard_cache.request_refresh(name)
             st.cache_data.clear()
             st.rerun()
         
@@ -332,29 +308,12 @@ def main():
                 
                 st.plotly_chart(fig, use_container_width=True)
                 
-                # New: Strategy backtest section
-                @st.cache_data(ttl=600)
-                def run_dashboard_backtest():
-                    years = 3
-                    end = datetime.now()
-                    start = end - timedelta(days=365 * years + 100)
-                    bt = QuadrantPortfolioBacktest(
-                        start_date=start,
-                        end_date=end,
-                        initial_capital=50000,
-                        momentum_days=20,
-                        ema_period=50,
-                        vol_lookback=30,
-                        max_positions=10,
-                        atr_stop_loss=2.0,
-                        atr_period=14
-                    )
-                    res = bt.run_backtest()
-                    return bt, res
-                
+                # New: Strategy backtest section (precomputed by dashboard_worker.py)
                 st.subheader("📈 Strategy Backtest (3-Year)")
                 try:
-                    backtest, results = run_dashboard_backtest()
+                    backtest, published_at = get_cached_artifact('backtest_3y')
+                    results = backtest['results']
+                    st.caption(f"As of {published_at:%Y-%m-%d %H:%M}")
                     
                     col_a, col_b, col_c, col_d = st.columns(4)
                     col_a.metric("Total Return", f"{results['total_return']:.2f}%")
@@ -364,8 +323,8 @@ def main():
                     
                     equity_fig = go.Figure(
                         data=[go.Scatter(
-                            x=backtest.portfolio_value.index,
-                            y=backtest.portfolio_value,
+                            x=backtest['portfolio_value'].index,
+                            y=backtest['portfolio_value'],
                             mode='lines',
                             line=dict(color='#8e44ad', width=2),
                             name='Portfolio Value'
@@ -415,10 +374,7 @@ def main():
         portfolio_data = []
         for ticker, weight in target_weights.items():
             # Determine which quadrant(s) this ticker belongs to
-            quads = []
-            for q, assets in QUAD_ALLOCATIONS.items():
-                if ticker in assets:
-                    quads.append(q)
+            quads = get_asset_quads(ticker)
             
             quad_str = '+'.join(quads) if quads else 'N/A'
             is_in_active = any(q in [top1, top2] for q in quads)
@@ -0,0 +1,123 @@
+"""
+Shared Dashboard Cache
+======================
+
+On-disk artifact cache shared by every Streamlit process and the
+dashboard worker (dashboard_worker.py).
+
+- The worker computes artifacts and publishes them atomically
+  (temp file + os.replace), so readers never see a partial write
+- Readers always get the last published value, even if it is past its TTL
+  (stale-while-revalidate); a stale read drops a refresh marker that the
+  worker picks up on its next pass
+- Loaded artifacts are memoized per process until the file changes
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+CACHE_DIR = os.environ.get(
+    'DASHBOARD_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dashboard_cache')
+)
+
+# Artifact TTLs (seconds) - after this the worker recomputes
+ARTIFACT_TTLS = {
+    'signals': 300,
+    'backtest_3y': 3600,
+}
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    published_at: float
+    ttl: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.published_at
+
+    @property
+    def stale(self) -> bool:
+        return self.age > self.ttl
+
+
+def _path(name: str, cache_dir: str = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}.pkl")
+
+
+def _refresh_marker(name: str, cache_dir: str = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}.refresh")
+
+
+def publish(name: str, value: Any, ttl: Optional[float] = None, cache_dir: str = None):
+    """Atomically publish an artifact (clears any pending refresh request)"""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    entry = CacheEntry(value, time.time(), ttl if ttl is not None else ARTIFACT_TTLS.get(name, 300))
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f'.{name}-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(tuple(entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _path(name, cache_dir))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    clear_refresh(name, cache_dir)
+
+
+def read(name: str, cache_dir: str = None) -> Optional[CacheEntry]:
+    """
+    Last published artifact (possibly stale), or None if never published
+
+    A stale read requests a refresh from the worker.
+    """
+    path = _path(name, cache_dir)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _memo_lock:
+        cached = _memo.get(path)
+    if cached and cached[0] == key:
+        entry = cached[1]
+    else:
+        with open(path, 'rb') as f:
+            entry = CacheEntry(*pickle.load(f))
+        with _memo_lock:
+            _memo[path] = (key, entry)
+
+    if entry.stale:
+        request_refresh(name, cache_dir)
+    return entry
+
+
+def request_refresh(name: str, cache_dir: str = None):
+    """Ask the worker to recompute an artifact on its next pass"""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(_refresh_marker(name, cache_dir), 'a'):
+        pass
+
+
+def refresh_requested(name: str, cache_dir: str = None) -> bool:
+    return os.path.exists(_refresh_marker(name, cache_dir))
+
+
+def clear_refresh(name: str, cache_dir: str = None):
+    try:
+        os.remove(_refresh_marker(name, cache_dir))
+    except FileNotFoundError:
+        pass
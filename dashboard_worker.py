@@ -0,0 +1,189 @@
+"""
+Dashboard Precompute Worker
+===========================
+
+Separate process that keeps the dashboard's expensive artifacts fresh in
+the shared on-disk cache (dashboard_cache.py). The Streamlit dashboard
+only reads them, so no user request waits on a recompute.
+
+Artifacts:
+- shared price matrices (price_matrix_store.py), republished once per new bar
+- signals:       SignalGenerator.generate_signals() output
+- backtest_3y:   3-year strategy backtest (equity curve + metrics)
+- regime history table (regime_history.py), appended once per new bar
+
+An artifact is recomputed when it is past its TTL, when a dashboard reader
+requested a refresh (stale read or Refresh button), or with --force.
+A failed recompute keeps serving the previous value.
+
+Usage:
+    python dashboard_worker.py                # Run forever (30s passes)
+    python dashboard_worker.py --once         # Single pass (cron / Task Scheduler)
+    python dashboard_worker.py --once --force
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import dashboard_cache
+from singleflight import latest_bar_date
+
+
+def compute_signals():
+    """Current trading signals"""
+    from signal_generator import SignalGenerator
+    return SignalGenerator().generate_signals()
+
+
+def compute_backtest_3y():
+    """3-year backtest: equity curve and headline metrics"""
+    from quad_portfolio_backtest import QuadrantPortfolioBacktest
+    from backtest_store import run_cached
+
+    years = 3
+    end = datetime.now()
+    start = end - timedelta(days=365 * years + 100)
+    bt = QuadrantPortfolioBacktest(
+        start_date=start,
+        end_date=end,
+        initial_capital=50000,
+        momentum_days=20,
+        ema_period=50,
+        vol_lookback=30,
+        max_positions=10,
+        atr_stop_loss=2.0,
+        atr_period=14
+    )
+    res = run_cached(bt)
+    return {
+        'portfolio_value': bt.portfolio_value,
+        'results': {k: res[k] for k in ('total_return', 'annual_return', 'sharpe',
+                                        'max_drawdown', 'final_value')},
+    }
+
+
+ARTIFACTS = {
+    'signals': compute_signals,
+    'backtest_3y': compute_backtest_3y,
+}
+
+
+def refresh_artifact(name: str):
+    """Compute and publish one artifact; returns the new value"""
+    started = time.perf_counter()
+    value = ARTIFACTS[name]()
+    dashboard_cache.publish(name, value)
+    print(f"✓ {name} refreshed in {time.perf_counter() - started:.1f}s")
+    return value
+
+
+def refresh_regime_history():
+    """Append new bars to the regime history table once the bar has closed"""
+    from regime_history import load_regime_history, update_regime_history
+
+    table = load_regime_history()
+    if table is not None and not table.empty and table.index[-1].strftime('%Y-%m-%d') >= latest_bar_date():
+        return
+    update_regime_history()
+
+
+def refresh_price_matrices():
+    """Publish the shared price matrices once the bar has closed (skipped if current)"""
+    from price_matrix_store import build_store
+    build_store()
+
+
+def run_pass(force=False):
+    """Refresh every artifact that is due"""
+    # Prices first, so the artifacts below load from the shared matrices
+    try:
+        refresh_price_matrices()
+    except Exception as e:
+        print(f"✗ Price matrix refresh failed: {e}")
+
+    for name in ARTIFACTS:
+        entry = dashboard_cache.read(name)
+        due = force or entry is None or entry.stale or dashboard_cache.refresh_requested(name)
+        if not due:
+            continue
+        try:
+            refresh_artifact(name)
+        except Exception as e:
+            print(f"✗ {name} refresh failed (serving previous value): {e}")
+
+    try:
+        refresh_regime_history()
+    except Exception as e:
+        print(f"✗ Regime history update failed: {e}")
+
+
+LOCK_STALE_SECONDS = 600
+LOCK_HEARTBEAT_SECONDS = 60
+
+
+def _acquire_lock():
+    """
+    Single worker per cache directory (a lock not touched for 10 minutes is stale)
+
+    The holder keeps the lock fresh with _start_heartbeat(), so a pass that
+    runs longer than LOCK_STALE_SECONDS does not let a second worker in.
+    """
+    os.makedirs(dashboard_cache.CACHE_DIR, exist_ok=True)
+    lock_path = os.path.join(dashboard_cache.CACHE_DIR, 'worker.lock')
+
+    if os.path.exists(lock_path) and time.time() - os.path.getmtime(lock_path) < LOCK_STALE_SECONDS:
+        return None  # Another worker is alive
+
+    with open(lock_path, 'w') as f:
+        f.write(str(os.getpid()))
+    return lock_path
+
+
+def _start_heartbeat(lock_path: str) -> threading.Event:
+    """
+    Touch the lock every LOCK_HEARTBEAT_SECONDS from a daemon thread
+
+    Returns:
+        Event that stops the heartbeat when set
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(LOCK_HEARTBEAT_SECONDS):
+            try:
+                os.utime(lock_path)
+            except OSError as e:
+                print(f"⚠️ Worker lock heartbeat failed: {e}")
+
+    threading.Thread(target=beat, name='worker-lock-heartbeat', daemon=True).start()
+    return stop
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precompute dashboard artifacts into the shared cache')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    parser.add_argument('--force', action='store_true', help='Recompute everything on the first pass')
+    parser.add_argument('--interval', type=int, default=30, help='Seconds between passes (default 30)')
+    args = parser.parse_args()
+
+    lock_path = _acquire_lock()
+    if lock_path is None:
+        print("! Another dashboard worker is already running")
+        raise SystemExit(1)
+
+    heartbeat = _start_heartbeat(lock_path)
+    print(f"Dashboard worker started (cache: {dashboard_cache.CACHE_DIR})")
+    try:
+        run_pass(force=args.force)
+        while not args.once:
+            time.sleep(args.interval)
+            run_pass()
+    except KeyboardInterrupt:
+        print("\n✓ Dashboard worker stopped")
+    finally:
+        heartbeat.set()
+        os.remove(lock_path)
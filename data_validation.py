@@ -0,0 +1,292 @@
+"""
+Ingest-Time Data Validation
+===========================
+
+Checks raw OHLC panels once, where they enter the system (price matrix
+store builds, panel downloads, backtest downloads), and quarantines bad
+cells before any consumer computes returns, vol-chasing weights or ATR
+stops from them. Every check runs vectorized over the whole
+[dates x tickers] panel:
+
+- non_positive_price:  price <= 0 in any field (close: whole bar quarantined)
+- return_spike:        |log return| above Z_THRESHOLD robust sigmas (trailing
+                       MAD) and MIN_SPIKE_RETURN, reverted by the next bar -
+                       a bad print, bar quarantined
+- level_shift:         same spike without the reversal (unadjusted split,
+                       real gap) - reported only, needs a look
+- stale_run:           close unchanged for more than STALE_RUN bars in a row
+                       (bars after the first STALE_RUN repeats quarantined)
+- missing_open:        close without an open (reported; the aligned panel
+                       trades such bars at the close)
+- inverted_range:      high < low (high/low quarantined)
+- close_outside_range: close outside [low, high] (high/low quarantined)
+- open_outside_range:  open outside [low, high] (open quarantined)
+
+Quarantined cells become NaN, i.e. "no bar": the aligned panel carries the
+last good close, and the true range skips them. Each run writes a JSON
+report (VALIDATION_REPORT_FILE, default .data_validation.json).
+
+Usage:
+    from data_validation import quarantine
+    clean = quarantine({'close': closes, 'open': opens, 'high': highs, 'low': lows},
+                       label='store build')
+
+    python data_validation.py --start 2024-01-01    # Download, validate, report
+    python data_validation.py --store               # Validate the published store
+    python data_validation.py --show                # Print the last report
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aligned_panel import as_frame
+
+VALIDATION_REPORT_FILE = os.environ.get(
+    'VALIDATION_REPORT_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data_validation.json')
+)
+
+Z_THRESHOLD = 10.0          # Robust sigmas for a return spike
+MIN_SPIKE_RETURN = 0.15     # ... and at least this absolute log return
+REVERSAL_SHARE = 0.5        # Next bar must give back this much of the spike
+SCALE_WINDOW = 63           # Trailing bars for the robust return scale
+SCALE_MIN_BARS = 20
+STALE_RUN = 5               # Identical closes in a row before quarantining
+RANGE_TOLERANCE = 0.001     # Rounding slack for open/close vs high/low
+MAX_REPORTED_ISSUES = 2000
+
+CHECKS = ('non_positive_price', 'return_spike', 'level_shift', 'stale_run', 'missing_open',
+          'inverted_range', 'close_outside_range', 'open_outside_range')
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    return pd.DataFrame(values).ffill().to_numpy(dtype=np.float64)
+
+
+def _prev_close(close: np.ndarray) -> np.ndarray:
+    """Previous bar's close per cell (gaps skipped)"""
+    prev = np.full_like(close, np.nan)
+    prev[1:] = _ffill(close)[:-1]
+    return prev
+
+
+def _spikes(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Log returns vs the previous bar and the cells whose return is a spike"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.log(close / _prev_close(close))
+        scale = (pd.DataFrame(np.abs(returns)).rolling(SCALE_WINDOW, min_periods=SCALE_MIN_BARS)
+                 .median().shift(1).to_numpy() * 1.4826)
+        spike = (np.abs(returns) > Z_THRESHOLD * scale) & (np.abs(returns) > MIN_SPIKE_RETURN)
+    return returns, spike
+
+
+def _run_length(flags: np.ndarray) -> np.ndarray:
+    """Length of the run of True ending at each cell (0 where False), per column"""
+    counts = np.cumsum(flags, axis=0)
+    resets = np.maximum.accumulate(np.where(flags, 0, counts), axis=0)
+    return counts - resets
+
+
+def validate_bars(data: Mapping[str, object], stale_exempt: Iterable[str] = ()) -> Tuple[Dict[str, pd.DataFrame], Dict]:
+    """
+    Run every check over the panel and quarantine bad cells
+
+    Args:
+        data: {field: [dates x tickers] DataFrame or {ticker: Series}};
+              'close' is required, open/high/low are checked when present
+        stale_exempt: Tickers whose closes may legitimately repeat
+
+    Returns:
+        (clean, report): cleaned frames (aligned to the close panel) and
+        the report dict
+    """
+    frames = {f: as_frame(v) for f, v in data.items() if f == 'close' or (v is not None and len(v) > 0)}
+    index, tickers = frames['close'].index, frames['close'].columns
+    arrays = {f: frame.reindex(index=index, columns=tickers).to_numpy(dtype=np.float64, copy=True)
+              for f, frame in frames.items()}
+    close = arrays['close']
+    bars = int(np.count_nonzero(~np.isnan(close)))
+    bar_mask = np.zeros(close.shape, dtype=bool)
+    found: List[Tuple[str, str, np.ndarray, np.ndarray, str]] = []
+
+    def record(check, field, mask, values, action):
+        if mask.any():
+            found.append((check, field, mask.copy(), values.copy(), action))
+
+    # Non-positive prices
+    for field, values in arrays.items():
+        with np.errstate(invalid='ignore'):
+            bad = values <= 0
+        record('non_positive_price', field, bad, values, 'quarantined')
+        if field == 'close':
+            bar_mask |= bad
+        values[bad] = np.nan
+
+    # Return spikes (robust z-score vs the trailing MAD): bad prints revert within a bar;
+    # spikes left once they are removed are level shifts
+    returns, spike = _spikes(close)
+    with np.errstate(invalid='ignore'):
+        following = pd.DataFrame(returns).shift(-1).bfill().to_numpy()
+        reverted = spike & (following * returns < 0) & (np.abs(following) >= REVERSAL_SHARE * np.abs(returns))
+    record('return_spike', 'close', reverted, close, 'quarantined')
+    bar_mask |= reverted
+    close[reverted] = np.nan
+    record('level_shift', 'close', _spikes(close)[1], close, 'flagged')
+
+    # Stale runs of identical closes
+    prev = _prev_close(close)
+    repeats = _run_length(~np.isnan(close) & (close == prev))
+    stale = repeats > STALE_RUN
+    stale[:, tickers.isin(list(stale_exempt))] = False
+    record('stale_run', 'close', stale, close, 'quarantined')
+    bar_mask |= stale
+    close[stale] = np.nan
+
+    # Open / high / low consistency with the close
+    has_bar = ~np.isnan(close)
+    opens = arrays.get('open')
+    if opens is not None:
+        record('missing_open', 'open', has_bar & np.isnan(opens), opens, 'flagged')
+    if 'high' in arrays and 'low' in arrays:
+        high, low = arrays['high'], arrays['low']
+        with np.errstate(invalid='ignore'):
+            inverted = has_bar & (high < low)
+            outside = (has_bar & ~inverted
+                       & ((close > high * (1 + RANGE_TOLERANCE)) | (close < low * (1 - RANGE_TOLERANCE))))
+        record('inverted_range', 'high', inverted, high, 'quarantined')
+        record('close_outside_range', 'close', outside, close, 'quarantined')
+        high[inverted | outside] = np.nan
+        low[inverted | outside] = np.nan
+        if opens is not None:
+            with np.errstate(invalid='ignore'):
+                open_outside = has_bar & ((opens > high * (1 + RANGE_TOLERANCE))
+                                          | (opens < low * (1 - RANGE_TOLERANCE)))
+            record('open_outside_range', 'open', open_outside, opens, 'quarantined')
+            opens[open_outside] = np.nan
+
+    for values in arrays.values():
+        values[bar_mask] = np.nan
+    clean = {f: pd.DataFrame(values, index=index, columns=tickers) for f, values in arrays.items()}
+    return clean, _build_report(found, index, tickers, bars, bar_mask)
+
+
+def _build_report(found, index: pd.DatetimeIndex, tickers: pd.Index, bars: int, bar_mask: np.ndarray) -> Dict:
+    summary = {check: 0 for check in CHECKS}
+    by_ticker: Dict[str, Dict[str, int]] = {}
+    issues = []
+    for check, field, mask, values, action in found:
+        rows, cols = np.nonzero(mask)
+        summary[check] += len(rows)
+        for col, count in zip(*np.unique(cols, return_counts=True)):
+            counts = by_ticker.setdefault(tickers[col], {})
+            counts[check] = counts.get(check, 0) + int(count)
+        for row, col in zip(rows, cols):
+            value = values[row, col]
+            issues.append({'date': index[row].strftime('%Y-%m-%d'), 'ticker': tickers[col], 'check': check,
+                           'field': field, 'value': None if np.isnan(value) else float(value),
+                           'action': action})
+
+    issues.sort(key=lambda i: (i['date'], i['ticker'], i['check']))
+    return {
+        'checkedAt': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'range': [index[0].strftime('%Y-%m-%d'), index[-1].strftime('%Y-%m-%d')] if len(index) else None,
+        'tickers': len(tickers),
+        'bars': bars,
+        'quarantinedBars': int(bar_mask.sum()),
+        'summary': summary,
+        'byTicker': dict(sorted(by_ticker.items())),
+        'issues': issues[:MAX_REPORTED_ISSUES],
+        'truncated': len(issues) > MAX_REPORTED_ISSUES,
+    }
+
+
+def write_report(report: Dict, path: str = VALIDATION_REPORT_FILE):
+    """Write a report atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def quarantine(data: Mapping[str, object], label: str = None, report_path: str = VALIDATION_REPORT_FILE,
+               stale_exempt: Iterable[str] = ()) -> Dict[str, pd.DataFrame]:
+    """
+    Validate an ingested panel, write the report and return the cleaned frames
+
+    Args:
+        data: {field: frame or {ticker: Series}} as for validate_bars()
+        label: Where the data came from (kept in the report)
+        report_path: Report location (None = do not write)
+        stale_exempt: Tickers exempt from the stale-run check
+
+    Returns:
+        {field: cleaned [dates x tickers] DataFrame}
+    """
+    clean, report = validate_bars(data, stale_exempt)
+    report['label'] = label
+    if report_path:
+        write_report(report, report_path)
+
+    flagged = sum(report['summary'].values())
+    if flagged:
+        counts = ', '.join(f"{check} {n}" for check, n in report['summary'].items() if n)
+        print(f"⚠️ Data validation{f' ({label})' if label else ''}: {flagged} issues in {report['bars']} bars "
+              f"({counts}); {report['quarantinedBars']} bars quarantined")
+    else:
+        print(f"✓ Data validation{f' ({label})' if label else ''}: {report['bars']} bars, no issues")
+    return clean
+
+
+def _print_report(report: Dict, limit: int = 20):
+    print(f"Checked {report['checkedAt']} ({report.get('label') or 'unlabelled'}): "
+          f"{report['bars']} bars, {report['tickers']} tickers, {report['range']}")
+    print(f"Quarantined bars: {report['quarantinedBars']}")
+    for check, n in report['summary'].items():
+        if n:
+            print(f"  {check:<20} {n}")
+    for ticker, counts in report['byTicker'].items():
+        print(f"  {ticker:<8} " + ', '.join(f"{c} {n}" for c, n in counts.items()))
+    for issue in report['issues'][:limit]:
+        print(f"    {issue['date']} {issue['ticker']:<8} {issue['check']:<20} {issue['field']:<6} "
+              f"{issue['value']} ({issue['action']})")
+    if len(report['issues']) > limit:
+        print(f"    ... {len(report['issues']) - limit} more")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Validate price data and write a quality report')
+    parser.add_argument('--start', help='Download the store universe from START and validate it')
+    parser.add_argument('--store', action='store_true', help='Validate the published price matrix store')
+    parser.add_argument('--show', action='store_true', help='Print the last report')
+    parser.add_argument('--report', default=VALIDATION_REPORT_FILE, help='Report location')
+    args = parser.parse_args()
+
+    if args.start:
+        from price_matrix_store import fetch_ohlc, store_universe
+
+        quarantine(fetch_ohlc(store_universe(), args.start), label=f'download from {args.start}',
+                   report_path=args.report)
+    elif args.store:
+        from price_matrix_store import attach
+
+        store = attach()
+        if store is None:
+            print("! No price matrices published yet")
+        else:
+            quarantine({f: store.frame(f) for f in ('close', 'open', 'high', 'low') if f in store},
+                       label=f'store {store.version}', report_path=args.report)
+
+    if args.show or args.start or args.store:
+        try:
+            with open(args.report) as f:
+                _print_report(json.load(f))
+        except FileNotFoundError:
+            print(f"! No report at {args.report}")
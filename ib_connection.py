@@ -0,0 +1,180 @@
+"""
+Persistent IB Connection Manager
+================================
+
+Keeps one long-lived IB session for scheduled mode so the night run, the
+Telegram alert and the morning execution reuse the same connection instead
+of paying a connect/handshake (and risking clientId collisions) each time.
+
+Features:
+- Client ID pool: rotates to the next ID when one is rejected/in use
+- Exponential backoff between connection attempts
+- Heartbeat (reqCurrentTime) to detect dead sessions
+- Auto-reconnect after a dropped connection (disconnectedEvent)
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Sequence
+
+from ib_insync import IB
+
+from ib_executor import IBExecutor
+
+
+class IBConnectionManager:
+    """Long-lived, auto-reconnecting IB session shared across components"""
+
+    def __init__(self, host='127.0.0.1', port=7497, client_ids: Sequence[int] = (1, 2, 3, 4, 5),
+                 max_retries=5, backoff_base=2.0, backoff_max=60.0,
+                 heartbeat_interval=60, ib_factory: Callable[[], IB] = IB):
+        """
+        Initialize connection manager
+
+        Args:
+            host: IB Gateway/TWS host
+            port: IB port (7497/7496 TWS, 4002/4001 Gateway)
+            client_ids: Pool of client IDs to try, in order
+            max_retries: Connection attempts per connect() call
+            backoff_base: Initial delay (seconds) between attempts, doubled each retry
+            backoff_max: Maximum delay between attempts
+            heartbeat_interval: Seconds between heartbeat checks
+            ib_factory: Callable returning a new IB-compatible instance
+        """
+        if not client_ids:
+            raise ValueError("client_ids must contain at least one ID")
+
+        self.host = host
+        self.port = port
+        self.client_ids = list(client_ids)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.heartbeat_interval = heartbeat_interval
+        self.ib_factory = ib_factory
+
+        self.ib = None
+        self.client_id = None
+        self.last_heartbeat = None
+        self.reconnects = 0
+        self._client_index = 0
+        self._lost = False
+
+    def connect(self) -> bool:
+        """Connect with client ID rotation and exponential backoff"""
+        if self.is_connected():
+            return True
+
+        delay = self.backoff_base
+        for attempt in range(1, self.max_retries + 1):
+            client_id = self.client_ids[self._client_index]
+
+            if self.ib is None:
+                self.ib = self.ib_factory()
+                self.ib.disconnectedEvent += self._on_disconnected
+
+            try:
+                self.ib.connect(self.host, self.port, clientId=client_id)
+                if self.ib.isConnected():
+                    self.client_id = client_id
+                    self.last_heartbeat = time.monotonic()
+                    self._lost = False
+                    print(f"✓ IB session connected at {self.host}:{self.port} (clientId {client_id})")
+                    return True
+            except Exception as e:
+                print(f"✗ IB connect attempt {attempt}/{self.max_retries} "
+                      f"(clientId {client_id}) failed: {e}")
+
+            # Next client ID in the pool (the current one may still be held)
+            self._client_index = (self._client_index + 1) % len(self.client_ids)
+
+            if attempt < self.max_retries:
+                print(f"  Retrying in {delay:.0f}s...")
+                time.sleep(delay)
+                delay = min(delay * 2, self.backoff_max)
+
+        print(f"✗ Could not connect to IB after {self.max_retries} attempts")
+        return False
+
+    def _on_disconnected(self):
+        """Mark the session as lost (reconnect happens on next use, not in the callback)"""
+        self._lost = True
+        print(f"⚠️ IB session disconnected at {datetime.now().strftime('%H:%M:%S')}")
+
+    def is_connected(self) -> bool:
+        return self.ib is not None and not self._lost and self.ib.isConnected()
+
+    def ensure_connected(self) -> bool:
+        """Reconnect if the session dropped"""
+        if self.is_connected():
+            return True
+
+        if self.ib is not None and self.client_id is not None:
+            self.reconnects += 1
+            print(f"🔄 Reconnecting IB session (reconnect #{self.reconnects})...")
+            try:
+                self.ib.disconnect()
+            except Exception:
+                pass
+        return self.connect()
+
+    def heartbeat(self, force=False) -> bool:
+        """
+        Check the session is alive (at most once per heartbeat_interval)
+
+        Returns:
+            True if the session is (or was made) healthy
+        """
+        now = time.monotonic()
+        if (not force and self.last_heartbeat is not None
+                and now - self.last_heartbeat < self.heartbeat_interval):
+            return self.is_connected() or self.ensure_connected()
+
+        if self.is_connected():
+            try:
+                self.ib.reqCurrentTime()
+                self.last_heartbeat = now
+                return True
+            except Exception as e:
+                print(f"⚠️ IB heartbeat failed: {e}")
+                self._lost = True
+
+        healthy = self.ensure_connected()
+        if healthy:
+            self.last_heartbeat = time.monotonic()
+        return healthy
+
+    def idle(self, seconds: float):
+        """Wait while keeping the IB event loop serviced"""
+        if self.is_connected():
+            self.ib.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def executor(self) -> IBExecutor:
+        """
+        IBExecutor bound to the shared session (does not own the connection)
+
+        If the session cannot be (re)established the executor is returned
+        with connected=False - it never opens a connection of its own
+        outside the client ID pool and backoff.
+        """
+        connected = self.ensure_connected()
+        executor = IBExecutor(host=self.host, port=self.port,
+                              client_id=self.client_id or self.client_ids[0], ib=self.ib)
+        executor.shared = True
+        executor.owns_connection = False
+        executor.connected = connected
+        if not connected:
+            print("✗ IB session unavailable - executor not connected")
+        return executor
+
+    def close(self):
+        """Disconnect the shared session"""
+        if self.ib is not None:
+            self.ib.disconnectedEvent -= self._on_disconnected
+            if self.ib.isConnected():
+                self.ib.disconnect()
+                print("✓ IB session closed")
+        self.ib = None
+        self.client_id = None
@@ -3,11 +3,15 @@ Interactive Brokers Executor for Macro Quadrant Strategy
 =========================================================
 
 Executes trades using Interactive Brokers API with CFDs
+
+ib_insync is imported on first use, so importing this module (e.g. for
+its helpers or in tests with an injected IB) does not load the broker API.
 """
 
-from ib_insync import *
+from __future__ import annotations
+
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, TYPE_CHECKING
 from datetime import datetime
 import time
 
@@ -19,11 +23,25 @@ except ImportError:
     MANAGED_CONTRACT_TYPES = ['STK', 'CFD']
     IGNORED_CONTRACT_TYPES = ['OPT', 'FUT', 'FOP', 'WAR', 'IOPT']
 
+if TYPE_CHECKING:
+    from ib_insync import CFD, Order
+
+# ETF to CFD mapping
+# Most ETFs have CFDs with the same ticker symbol
+# Only map the ones that need different symbols
+ETF_TO_CFD = {
+    'SPY': 'US500',      # S&P 500 → US500 CFD
+    'DIA': 'INDU',       # Dow Jones → INDU CFD
+    'EFA': 'EUSTX50',    # European stocks → EUSTX50 CFD
+    'EEM': 'CHINA50',    # Emerging markets → CHINA50 CFD
+    # QQQ, IWM, and most other ETFs use their own ticker as CFD symbol
+}
+
 
 class IBExecutor:
     """Execute trades via Interactive Brokers API using CFDs"""
     
-    def __init__(self, host='127.0.0.1', port=7497, client_id=1):
+    def __init__(self, host='127.0.0.1', port=7497, client_id=1, ib=None):
         """
         Initialize IB connection
         
@@ -32,21 +50,41 @@ class IBExecutor:
             port: 7497 for paper trading, 7496 for live (TWS)
                   4002 for paper trading, 4001 for live (IB Gateway)
             client_id: Unique client ID
+            ib: Optional IB-compatible instance to use instead of a new IB()
+                (e.g. ib_simulator.SimulatedIB for offline testing)
         """
-        self.ib = IB()
+        if ib is None:
+            from ib_insync import IB
+            ib = IB()
+        self.ib = ib
         self.host = host
         self.port = port
         self.client_id = client_id
         self.connected = False
+        self.owns_connection = True
+        self.shared = False  # Bound to an IBConnectionManager session (never connects itself)
         
         # CFD contract mapping (ticker -> IB CFD contract)
         self.cfd_contracts = {}
         
     def connect(self):
-        """Connect to Interactive Brokers"""
+        """Connect to Interactive Brokers (reuses an already-connected shared session)"""
+        if self.ib.isConnected():
+            # Session owned by someone else (e.g. IBConnectionManager) - don't close it on exit
+            self.owns_connection = False
+            self.connected = True
+            return True
+        
+        if self.shared:
+            # Reconnecting the shared session is the manager's job (client ID pool, backoff)
+            print("✗ Shared IB session not connected")
+            self.connected = False
+            return False
+        
         try:
             self.ib.connect(self.host, self.port, clientId=self.client_id)
             self.connected = True
+            self.owns_connection = True
             print(f"✓ Connected to IB at {self.host}:{self.port}")
             return True
         except Exception as e:
@@ -57,9 +95,10 @@ class IBExecutor:
     def disconnect(self):
         """Disconnect from IB"""
         if self.connected:
-            self.ib.disconnect()
             self.connected = False
-            print("✓ Disconnected from IB")
+            if self.owns_connection:
+                self.ib.disconnect()
+                print("✓ Disconnected from IB")
     
     def create_cfd_contract(self, ticker: str) -> CFD:
         """
@@ -78,20 +117,10 @@ class IBExecutor:
         - IWM -> US2000 CFD (Russell 2000)
         - DIA -> INDU CFD (Dow Jones)
         """
-        # ETF to CFD mapping
-        # Most ETFs have CFDs with the same ticker symbol
-        # Only map the ones that need different symbols
-        etf_to_cfd = {
-            'SPY': 'US500',      # S&P 500 → US500 CFD
-            'DIA': 'INDU',       # Dow Jones → INDU CFD
-            'EFA': 'EUSTX50',    # European stocks → EUSTX50 CFD
-            'EEM': 'CHINA50',    # Emerging markets → CHINA50 CFD
-            # QQQ, IWM, and most other ETFs use their own ticker as CFD symbol
-        }
-        
-        cfd_symbol = etf_to_cfd.get(ticker, ticker)
+        cfd_symbol = ETF_TO_CFD.get(ticker, ticker)
         
         # Create CFD contract with SMART exchange to resolve ambiguity
+        from ib_insync import CFD
         contract = CFD(cfd_symbol, exchange='SMART', currency='USD')
         
         # Qualify contract with IB
@@ -210,17 +239,7 @@ class IBExecutor:
             ticker = self.ib.reqMktData(contract, '', False, False)
             self.ib.sleep(3)  # Wait longer for market data
             
-            # Try multiple price fields
-            price = None
-            if ticker.marketPrice() and not pd.isna(ticker.marketPrice()):
-                price = ticker.marketPrice()
-            elif ticker.last and not pd.isna(ticker.last):
-                price = ticker.last
-            elif ticker.close and not pd.isna(ticker.close):
-                price = ticker.close
-            elif ticker.bid and ticker.ask and not pd.isna(ticker.bid) and not pd.isna(ticker.ask):
-                price = (ticker.bid + ticker.ask) / 2
-            
+            price = self._ticker_price(ticker)
             self.ib.cancelMktData(contract)
             
             if price is None or pd.isna(price):
@@ -247,6 +266,51 @@ class IBExecutor:
                 pass
             return None
     
+    @staticmethod
+    def _ticker_price(ticker) -> float:
+        """Best available price on a market-data ticker (None if it has none)"""
+        # Try multiple price fields
+        price = None
+        if ticker.marketPrice() and not pd.isna(ticker.marketPrice()):
+            price = ticker.marketPrice()
+        elif ticker.last and not pd.isna(ticker.last):
+            price = ticker.last
+        elif ticker.close and not pd.isna(ticker.close):
+            price = ticker.close
+        elif ticker.bid and ticker.ask and not pd.isna(ticker.bid) and not pd.isna(ticker.ask):
+            price = (ticker.bid + ticker.ask) / 2
+        return price
+    
+    def get_quotes(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Current prices for many tickers in one snapshot request
+        
+        Contracts are qualified in one batch and quoted with a single
+        reqTickers() call (no per-ticker wait). Tickers without a usable
+        price are left out; there is no yfinance fallback here.
+        
+        Returns:
+            Dict of {ticker: price}
+        """
+        if not self.connected or not tickers:
+            return {}
+        
+        from ib_insync import CFD
+        symbol_to_ticker = {ETF_TO_CFD.get(t, t): t for t in tickers}
+        try:
+            contracts = self.ib.qualifyContracts(
+                *[CFD(symbol, exchange='SMART', currency='USD') for symbol in symbol_to_ticker])
+            self.ib.reqMarketDataType(3)
+            quotes = {}
+            for ticker in self.ib.reqTickers(*contracts):
+                price = self._ticker_price(ticker)
+                if price and not pd.isna(price):
+                    quotes[symbol_to_ticker[ticker.contract.symbol]] = float(price)
+            return quotes
+        except Exception as e:
+            print(f"  ⚠️ Error getting quotes: {e}")
+            return {}
+    
     def place_order(self, contract: CFD, quantity: int, action: str = 'BUY') -> Order:
         """
         Place a market order
@@ -271,6 +335,7 @@ class IBExecutor:
             return None
         
         # Create market order
+        from ib_insync import MarketOrder
         order = MarketOrder(action, quantity)
         
         # Place order
@@ -281,7 +346,8 @@ class IBExecutor:
         return trade
     
     def execute_rebalance(self, target_weights: Dict[str, float], 
-                          position_manager=None, atr_data: Dict[str, float] = None):
+                          position_manager=None, atr_data: Dict[str, float] = None,
+                          atr_multiplier: float = 2.0):
         """
         Execute portfolio rebalance with position tracking and stops
         
@@ -289,11 +355,18 @@ class IBExecutor:
             target_weights: Dict of {ticker: weight} where weight is % of capital
             position_manager: PositionManager instance for state tracking
             atr_data: Dict of {ticker: atr_value} for stop calculations
+                      (None = Wilder ATR cached in the price matrix store)
+            atr_multiplier: Stop distance in ATRs below the entry price
         """
         if not self.connected:
             print("Not connected to IB")
             return
         
+        if atr_data is None and position_manager is not None:
+            from price_matrix_store import latest_atr
+            atr_data = latest_atr(list(target_weights))
+            print(f"ATR for stops from price matrix store: {len(atr_data)} tickers")
+        
         print("\n" + "="*60)
         print("EXECUTING REBALANCE")
         print("="*60)
@@ -404,10 +477,10 @@ class IBExecutor:
                     # Case 1: NEW POSITION - use position_manager.enter_position (places stop!)
                     if current_quantity == 0 and position_manager and atr_data and ticker in atr_data:
                         atr = atr_data[ticker]
-                        stop_price = price - (2.0 * atr)  # 2 ATR stop
+                        stop_price = price - (atr_multiplier * atr)
                         
                         print(f"    📈 NEW POSITION - Entry with stop loss")
-                        print(f"    🛑 Stop: ${stop_price:.2f} (2.0 ATR = ${atr:.2f})")
+                        print(f"    🛑 Stop: ${stop_price:.2f} ({atr_multiplier} ATR = ${atr:.2f})")
                         
                         success = position_manager.enter_position(
                             contract=contract,
@@ -453,6 +526,9 @@ class IBExecutor:
                 print(f"    ⏭️ Continuing with other positions...")
                 continue
         
+        if position_manager:
+            position_manager.commit()
+        
         print(f"\n✓ Executed {len(executed_trades)} trades")
         
         return executed_trades
@@ -0,0 +1,479 @@
+"""
+Streaming Indicator State
+=========================
+
+Per-ticker recursive indicator state, persisted between runs and advanced
+one bar (or peeked one live quote) at a time in constant time, so the night
+and morning runs no longer re-fetch and recompute months of history.
+
+State per ticker:
+- close:     last close (gaps carry the previous close forward, as ffill)
+- ema:       recursive EMA (span ema_period, same recursion as ewm(adjust=False))
+- returns:   ring of the last vol_lookback daily returns with running sum and
+             sum of squares -> rolling volatility (ddof=1, annualized)
+- atr:       Wilder ATR of the true range (high/low against the previous
+             close, RMA with alpha 1/atr_period) - the same values as
+             price_matrix_store.wilder_atr(); without highs/lows the bar's
+             range is its close
+- closes:    ring of the last momentum_days + 1 closes -> momentum
+
+Rolling values are NaN until their window is full, exactly like the pandas
+rolling()/pct_change() versions. EMAs depend on their start date: the state
+is seeded over DEFAULT_SEED_DAYS of history, so the EMA is better warmed up
+than one recomputed on a 150-day fetch.
+
+Only completed bars (up to latest_bar_date()) enter the state; a live quote
+is evaluated with ema_with_quote() without being stored. current_ema_status()
+uses that for the morning entry confirmation: yesterday's EMA plus the
+pre-open quote, with a 3-month history download only as a fallback.
+
+Usage:
+    python indicator_state.py --seed               # Rebuild from history
+    python indicator_state.py --update             # Apply bars since the last run
+    python indicator_state.py --show QQQ
+"""
+
+import json
+import math
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+
+from singleflight import latest_bar_date
+
+INDICATOR_STATE_FILE = os.environ.get(
+    'INDICATOR_STATE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.indicator_state.json')
+)
+DEFAULT_SEED_DAYS = 400
+STATE_VERSION = 2
+
+
+class TickerState:
+    """Recursive indicators for one ticker"""
+
+    __slots__ = ('close', 'ema', 'bars', 'returns', 'ret_sum', 'ret_sumsq',
+                 'atr_period', 'atr_value', 'tr_count', 'closes')
+
+    def __init__(self, vol_lookback: int, atr_period: int, momentum_days: int):
+        self.close = None
+        self.ema = None
+        self.bars = 0
+        self.returns = deque(maxlen=vol_lookback)
+        self.ret_sum = 0.0
+        self.ret_sumsq = 0.0
+        self.atr_period = atr_period
+        self.atr_value = None
+        self.tr_count = 0
+        self.closes = deque(maxlen=momentum_days + 1)
+
+    def update(self, close: float, alpha: float, high: float = None, low: float = None):
+        """
+        Advance one bar
+
+        high/low default to the close (close-to-close range); pass NaN for a
+        carried bar without a true range.
+        """
+        high = close if high is None else high
+        low = close if low is None else low
+        ranges = [high - low]
+        if self.close is not None:
+            ranges += [abs(high - self.close), abs(low - self.close)]
+        ranges = [r for r in ranges if not math.isnan(r)]
+        if ranges:
+            tr = max(ranges)
+            if self.atr_value is None:
+                self.atr_value = tr
+            else:
+                rate = 1.0 / self.atr_period
+                self.atr_value = (1 - rate) * self.atr_value + rate * tr
+            self.tr_count += 1
+
+        if self.close is None:
+            self.ema = close
+        else:
+            ret = close / self.close - 1
+            if len(self.returns) == self.returns.maxlen:
+                old = self.returns[0]
+                self.ret_sum -= old
+                self.ret_sumsq -= old * old
+            self.returns.append(ret)
+            self.ret_sum += ret
+            self.ret_sumsq += ret * ret
+
+            self.ema = alpha * close + (1 - alpha) * self.ema
+        self.close = close
+        self.closes.append(close)
+        self.bars += 1
+
+    def volatility(self) -> float:
+        n = len(self.returns)
+        if n < self.returns.maxlen or n < 2:
+            return math.nan
+        variance = (self.ret_sumsq - self.ret_sum * self.ret_sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0)) * math.sqrt(252)
+
+    def atr(self) -> float:
+        if self.tr_count < self.atr_period:
+            return math.nan
+        return self.atr_value
+
+    def momentum(self) -> float:
+        if len(self.closes) < self.closes.maxlen:
+            return math.nan
+        return self.closes[-1] / self.closes[0] - 1
+
+    def to_dict(self) -> Dict:
+        return {'close': self.close, 'ema': self.ema, 'bars': self.bars,
+                'returns': list(self.returns), 'atr': self.atr_value, 'tr_count': self.tr_count,
+                'closes': list(self.closes)}
+
+    @classmethod
+    def from_dict(cls, data: Dict, vol_lookback: int, atr_period: int, momentum_days: int):
+        state = cls(vol_lookback, atr_period, momentum_days)
+        state.close, state.ema, state.bars = data['close'], data['ema'], data['bars']
+        state.returns.extend(data['returns'])
+        state.atr_value, state.tr_count = data['atr'], data['tr_count']
+        state.closes.extend(data['closes'])
+        # Running sums are rebuilt rather than stored, so saved drift never accumulates
+        state.ret_sum = math.fsum(state.returns)
+        state.ret_sumsq = math.fsum(r * r for r in state.returns)
+        return state
+
+
+class IndicatorEngine:
+    """Streaming indicator state for a set of tickers"""
+
+    def __init__(self, ema_period=50, vol_lookback=30, atr_period=14, momentum_days=20,
+                 path: str = INDICATOR_STATE_FILE):
+        self.ema_period = ema_period
+        self.vol_lookback = vol_lookback
+        self.atr_period = atr_period
+        self.momentum_days = momentum_days
+        self.path = path
+        self.alpha = 2.0 / (ema_period + 1)
+        self.last_date: Optional[pd.Timestamp] = None
+        self.tickers: Dict[str, TickerState] = {}
+        self.universe: List[str] = []  # Tickers the state was built for (with or without bars)
+
+    @property
+    def params(self) -> Dict:
+        return {'ema_period': self.ema_period, 'vol_lookback': self.vol_lookback,
+                'atr_period': self.atr_period, 'momentum_days': self.momentum_days}
+
+    def _new_state(self) -> TickerState:
+        return TickerState(self.vol_lookback, self.atr_period, self.momentum_days)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Load the persisted state
+
+        Returns:
+            False if there is no usable state (missing, unreadable, or built
+            with different parameters) - the engine is then left empty
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Indicator state unreadable ({e}) - reseed required")
+            return False
+
+        if data.get('version') != STATE_VERSION or data.get('params') != self.params:
+            print("⚠️ Indicator state built with different parameters - reseed required")
+            return False
+
+        self.last_date = pd.Timestamp(data['last_date']) if data.get('last_date') else None
+        self.tickers = {t: TickerState.from_dict(s, self.vol_lookback, self.atr_period, self.momentum_days)
+                        for t, s in data['tickers'].items()}
+        self.universe = data.get('universe', sorted(self.tickers))
+        return True
+
+    def save(self):
+        """Write the state atomically"""
+        data = {
+            'version': STATE_VERSION,
+            'params': self.params,
+            'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            'savedAt': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            'universe': self.universe,
+            'tickers': {t: s.to_dict() for t, s in sorted(self.tickers.items())},
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update_bar(self, date, closes: Mapping[str, float], highs: Mapping[str, float] = None,
+                   lows: Mapping[str, float] = None):
+        """
+        Advance every ticker by one bar
+
+        Tickers without a close for this bar (missing or NaN) carry their
+        last close forward; tickers that have not started yet stay empty.
+        With highs/lows, a missing high/low leaves the ATR unchanged; without
+        them the ATR uses the close-to-close range.
+        """
+        for ticker, close in closes.items():
+            if close is not None and not math.isnan(close) and ticker not in self.tickers:
+                self.tickers[ticker] = self._new_state()
+        for ticker, state in self.tickers.items():
+            close = closes.get(ticker)
+            if close is None or math.isnan(close):
+                if state.close is None:
+                    continue
+                close = state.close
+            if highs is None or lows is None:
+                state.update(float(close), self.alpha)
+            else:
+                state.update(float(close), self.alpha, highs.get(ticker, math.nan), lows.get(ticker, math.nan))
+        self.last_date = pd.Timestamp(date)
+
+    def update(self, panel: pd.DataFrame, highs: pd.DataFrame = None, lows: pd.DataFrame = None) -> int:
+        """
+        Apply the rows of a close panel (and optional high/low panels) that
+        are newer than the state
+
+        Returns:
+            Number of bars applied
+        """
+        if self.last_date is not None:
+            panel = panel.loc[panel.index > self.last_date]
+        panel = panel.loc[panel.index <= pd.Timestamp(latest_bar_date())]
+        columns = list(panel.columns)
+        if highs is None or lows is None:
+            for date, row in zip(panel.index, panel.to_numpy(dtype=float)):
+                self.update_bar(date, dict(zip(columns, row)))
+            return len(panel)
+
+        high_rows = highs.reindex(index=panel.index, columns=columns).to_numpy(dtype=float)
+        low_rows = lows.reindex(index=panel.index, columns=columns).to_numpy(dtype=float)
+        for date, row, high, low in zip(panel.index, panel.to_numpy(dtype=float), high_rows, low_rows):
+            self.update_bar(date, dict(zip(columns, row)), dict(zip(columns, high)), dict(zip(columns, low)))
+        return len(panel)
+
+    def seed(self, panel: pd.DataFrame, highs: pd.DataFrame = None, lows: pd.DataFrame = None,
+             universe: Iterable[str] = None) -> int:
+        """
+        Rebuild the state from a close panel (and optional high/low panels)
+
+        Args:
+            universe: Tickers requested for the panel (default: its columns);
+                      kept in the state so tickers without bars (failed
+                      download, delisted) do not force a reseed on every refresh
+        """
+        self.last_date = None
+        self.tickers = {}
+        self.universe = sorted(set(panel.columns if universe is None else universe))
+        applied = self.update(panel, highs, lows)
+        missing = [t for t in self.universe if t not in self.tickers]
+        if missing:
+            print(f"⚠️ No bars for {', '.join(missing)} - skipped until they have data")
+        return applied
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def snapshot(self, tickers: Iterable[str] = None) -> pd.DataFrame:
+        """
+        Current indicator values
+
+        Returns:
+            DataFrame indexed by ticker with close, ema, volatility, atr,
+            momentum (NaN where a window is not full yet)
+        """
+        tickers = sorted(self.tickers) if tickers is None else [t for t in tickers if t in self.tickers]
+        rows = {}
+        for ticker in tickers:
+            state = self.tickers[ticker]
+            rows[ticker] = {'close': state.close, 'ema': state.ema, 'volatility': state.volatility(),
+                            'atr': state.atr(), 'momentum': state.momentum()}
+        return pd.DataFrame.from_dict(rows, orient='index',
+                                      columns=['close', 'ema', 'volatility', 'atr', 'momentum'])
+
+    def ema_with_quote(self, ticker: str, price: float) -> float:
+        """EMA if `price` were the next bar's close (the state is not changed)"""
+        state = self.tickers.get(ticker)
+        if state is None or state.ema is None:
+            return math.nan
+        return self.alpha * price + (1 - self.alpha) * state.ema
+
+    def is_current(self) -> bool:
+        """True if the state includes the latest completed bar"""
+        return self.last_date is not None and self.last_date >= pd.Timestamp(latest_bar_date())
+
+    def ema_status(self, quotes: Mapping[str, float]) -> Dict[str, Dict]:
+        """
+        EMA confirmation for live quotes (one EMA step each, state unchanged)
+
+        Returns:
+            {ticker: {'current_price', 'current_ema', 'is_above_ema'}} for the
+            quoted tickers that are in the state
+        """
+        status = {}
+        for ticker, price in quotes.items():
+            ema = self.ema_with_quote(ticker, price)
+            if not math.isnan(ema):
+                status[ticker] = {'current_price': price, 'current_ema': ema, 'is_above_ema': price > ema}
+        return status
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    def fetch_bars(self, tickers: list, start):
+        """
+        Session-aligned close/high/low panels from start (aligned_panel.load_panel:
+        the shared price matrix store if it covers them, else one yfinance batch)
+
+        Returns:
+            (closes, highs, lows) - highs/lows are None for a store version
+            published without them
+        """
+        from aligned_panel import load_panel
+
+        panel = load_panel(tickers, start, pd.Timestamp(latest_bar_date()) + timedelta(days=1))
+        closes = panel.frame('close').dropna(axis=1, how='all')
+        if 'high' not in panel or 'low' not in panel:
+            return closes, None, None
+        return closes, panel.frame('high')[closes.columns], panel.frame('low')[closes.columns]
+
+    def refresh(self, tickers: list, seed_days: int = DEFAULT_SEED_DAYS) -> int:
+        """
+        Load the state and bring it up to the latest completed bar
+
+        Seeds from seed_days of history when there is no usable state or
+        tickers are missing from its universe; otherwise only the bars since
+        the last run are fetched (for the whole universe, so a ticker that
+        had no bars at seeding starts once it has). Saves when anything
+        changed.
+
+        Returns:
+            Number of bars applied
+        """
+        usable = self.load() and set(tickers) <= set(self.universe)
+        latest = pd.Timestamp(latest_bar_date())
+        if usable and self.last_date is not None and self.last_date >= latest:
+            return 0
+
+        if not usable:
+            start = (datetime.now() - timedelta(days=seed_days)).strftime('%Y-%m-%d')
+            applied = self.seed(*self.fetch_bars(tickers, start), universe=tickers)
+            print(f"✓ Seeded indicator state: {len(self.tickers)} tickers, {applied} bars")
+        else:
+            # A few extra calendar days so weekends/holidays never leave a gap
+            start = (self.last_date - timedelta(days=5)).strftime('%Y-%m-%d')
+            applied = self.update(*self.fetch_bars(self.universe, start))
+            print(f"✓ Indicator state +{applied} bars (now {self.last_date.date()})")
+
+        if applied:
+            self.save()
+        return applied
+
+
+def ema_status_from_history(tickers: list, ema_period: int = 50) -> Dict[str, Dict]:
+    """EMA confirmation from 3 months of daily bars (one yfinance batch) - the slow fallback"""
+    import yfinance as yf
+
+    print(f"Fetching 3 months of history for {len(tickers)} tickers...")
+    price_data = yf.download(tickers, period='3mo', progress=False, auto_adjust=True)['Close']
+    if isinstance(price_data, pd.Series):
+        price_data = price_data.to_frame(name=tickers[0])
+
+    status = {}
+    for ticker in tickers:
+        if ticker not in price_data.columns:
+            print(f"  WARNING: No data for {ticker}")
+            continue
+        prices = price_data[ticker].dropna()
+        if len(prices) < ema_period:
+            print(f"  WARNING: Not enough data for {ticker}")
+            continue
+        current_price = prices.iloc[-1]
+        current_ema = prices.ewm(span=ema_period, adjust=False).mean().iloc[-1]
+        status[ticker] = {'current_price': current_price, 'current_ema': current_ema,
+                          'is_above_ema': current_price > current_ema}
+    return status
+
+
+def current_ema_status(tickers: list, quotes: Mapping[str, float] = None,
+                       engine: IndicatorEngine = None) -> Dict[str, Dict]:
+    """
+    Morning EMA confirmation: persisted EMA + live quote, history as fallback
+
+    Tickers with a quote and an up-to-date state are decided with a single
+    EMA step (no download). The rest (no quote, stale or missing state) go
+    through ema_status_from_history().
+
+    Args:
+        tickers: Tickers to confirm
+        quotes: Live prices {ticker: price} (e.g. IBExecutor.get_quotes())
+        engine: Indicator state (default: the persisted state, default parameters)
+
+    Returns:
+        {ticker: {'current_price', 'current_ema', 'is_above_ema'}}
+    """
+    engine = engine or IndicatorEngine()
+    status = {}
+    if quotes and (engine.tickers or engine.load()):
+        if engine.is_current():
+            status = engine.ema_status({t: quotes[t] for t in tickers if t in quotes})
+            print(f"✓ EMA confirmation from indicator state ({engine.last_date.date()}) "
+                  f"+ live quotes: {len(status)} tickers")
+        else:
+            print(f"⚠️ Indicator state is stale ({engine.last_date.date() if engine.last_date is not None else 'empty'})")
+
+    missing = [t for t in tickers if t not in status]
+    if missing:
+        status.update(ema_status_from_history(missing, engine.ema_period))
+    return status
+
+
+if __name__ == "__main__":
+    import argparse
+    from price_matrix_store import store_universe
+
+    parser = argparse.ArgumentParser(description='Build/update the streaming indicator state')
+    parser.add_argument('--seed', action='store_true', help='Rebuild the state from history')
+    parser.add_argument('--seed-days', type=int, default=DEFAULT_SEED_DAYS,
+                        help=f'Calendar days of history for seeding (default {DEFAULT_SEED_DAYS})')
+    parser.add_argument('--update', action='store_true', help='Apply bars since the last run')
+    parser.add_argument('--show', metavar='TICKER', help='Print one ticker\'s indicators')
+    parser.add_argument('--path', default=INDICATOR_STATE_FILE, help='State location')
+    args = parser.parse_args()
+
+    engine = IndicatorEngine(path=args.path)
+    if args.seed:
+        start = (datetime.now() - timedelta(days=args.seed_days)).strftime('%Y-%m-%d')
+        tickers = store_universe()
+        applied = engine.seed(*engine.fetch_bars(tickers, start), universe=tickers)
+        engine.save()
+        print(f"✓ Seeded indicator state: {len(engine.tickers)} tickers, {applied} bars "
+              f"(through {engine.last_date.date()})")
+    elif args.update:
+        engine.refresh(store_universe(), seed_days=args.seed_days)
+    elif not engine.load():
+        print("! No indicator state yet (run with --seed)")
+
+    if args.show and engine.tickers:
+        snapshot = engine.snapshot([args.show.upper()])
+        if snapshot.empty:
+            print(f"! {args.show.upper()} not in the indicator state")
+        else:
+            print(snapshot.T.to_string())
+    elif engine.last_date is not None:
+        print(f"State through {engine.last_date.date()}: {len(engine.tickers)} tickers")
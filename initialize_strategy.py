@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from quad_portfolio_backtest import QuadrantPortfolioBacktest
+from backtest_store import run_cached
 import yfinance as yf
 from typing import Dict, Tuple
 
@@ -47,7 +48,7 @@ class StrategyInitializer:
             atr_period=14
         )
         
-        results = self.backtest.run_backtest()
+        results = run_cached(self.backtest)
         
         print(f"\nBacktest complete:")
         print(f"  Total return: {results['total_return']:.2%}")
@@ -98,7 +99,7 @@ class StrategyInitializer:
             entry_price = entry_prices[ticker]
             entry_date = entry_dates[ticker]
             entry_atr = entry_atrs[ticker]
-            stop_price = entry_price - (entry_atr * 2.0)
+            stop_price = entry_price - (entry_atr * self.backtest.atr_stop_loss)
             
             print(f"  {ticker}:")
             print(f"    Weight: {weight*100:.1f}%")
@@ -142,20 +143,24 @@ class StrategyInitializer:
         
         entry_date = self.backtest.target_weights.index[entry_idx + 1]
         
+        if self.backtest.open_data is None:
+            # Run restored from the backtest store - load prices/ATR only
+            self.backtest.fetch_data()
+        
         # Get entry price (open of next day)
         if ticker not in self.backtest.open_data.columns:
             return None
         
         entry_price = self.backtest.open_data.loc[entry_date, ticker]
         
-        # Get ATR at signal date (used for stop calculation)
+        # Get ATR at signal date (Wilder ATR of the true range, used for stop calculation)
         if ticker not in self.backtest.atr_data.columns:
             return None
         
         atr_at_signal = self.backtest.atr_data.loc[last_entry_signal, ticker]
         
         # Calculate stop
-        stop_price = entry_price - (atr_at_signal * 2.0)
+        stop_price = entry_price - (atr_at_signal * self.backtest.atr_stop_loss)
         
         return {
             'entry_date': entry_date,
@@ -1,18 +1,20 @@
 import schedule
-import time
 from datetime import datetime
 from signal_generator import SignalGenerator
 from ib_executor import IBExecutor
+from ib_connection import IBConnectionManager
 from position_manager import PositionManager
 from pending_orders import PendingOrdersManager
 from telegram_notifier import get_notifier
 import json
+from contextlib import contextmanager
 
 
 class LiveTrader:
     """Orchestrate signal generation and trade execution"""
     
-    def __init__(self, ib_port=7497, dry_run=True, enable_telegram=True):
+    def __init__(self, ib_port=7497, dry_run=True, enable_telegram=True, session=None,
+                 use_indicator_state=True):
         """
         Initialize live trader
         
@@ -20,6 +22,11 @@ class LiveTrader:
             ib_port: IB port (7497 for paper, 7496 for live with TWS)
             dry_run: If True, generate signals but don't execute trades
             enable_telegram: If True, send Telegram notifications
+            session: Optional IBConnectionManager; when set, every step reuses
+                     its long-lived IB session instead of reconnecting
+            use_indicator_state: If True, generate signals from the persisted
+                     streaming indicator state (indicator_state.py) instead
+                     of re-fetching price history
         """
         self.signal_gen = SignalGenerator(momentum_days=20, ema_period=50, vol_lookback=30, 
                                           max_positions=10, atr_stop_loss=2.0, atr_period=14)
@@ -27,6 +34,8 @@ class LiveTrader:
         self.ib_port = ib_port
         self.dry_run = dry_run
         self.enable_telegram = enable_telegram
+        self.session = session
+        self.use_indicator_state = use_indicator_state
         
         # Initialize Telegram notifier
         self.telegram = get_notifier() if enable_telegram else None
@@ -35,10 +44,19 @@ class LiveTrader:
         self.last_signal_time = None
         self.last_trades = []
     
+    @contextmanager
+    def _ib_executor(self):
+        """Yield an IBExecutor on the shared session if there is one, else a fresh connection"""
+        if self.session is not None:
+            yield self.session.executor()
+        else:
+            with IBExecutor(port=self.ib_port) as ib_exec:
+                yield ib_exec
+    
     def _get_account_value(self):
         """Helper to get real account value from IB Gateway"""
         try:
-            with IBExecutor(port=self.ib_port) as ib_exec:
+            with self._ib_executor() as ib_exec:
                 if ib_exec.connected:
                     account_summary = ib_exec.ib.accountSummary()
                     for item in account_summary:
@@ -51,6 +69,45 @@ class LiveTrader:
         print("! Using fallback account value: $50,000")
         return 50000  # Fallback only if connection fails
         
+    def _generate_signals(self):
+        """Signals from the indicator state, falling back to a full history fetch"""
+        if self.use_indicator_state:
+            try:
+                return self.signal_gen.generate_signals_from_state()
+            except Exception as e:
+                print(f"! Indicator state unavailable ({e}) - fetching full history")
+        return self.signal_gen.generate_signals()
+    
+    def _get_confirmation_data(self, tickers):
+        """
+        Current prices and EMAs for the morning confirmation
+        
+        Yesterday's EMA from the indicator state stepped once with the IB
+        quote; without the indicator state, the pending manager's history
+        download.
+        
+        Returns:
+            (price_data, ema_data) dicts of {ticker: value}
+        """
+        if not self.use_indicator_state:
+            return self.pending_manager.get_current_market_data(tickers)
+        
+        from indicator_state import current_ema_status
+        
+        quotes = {}
+        try:
+            with self._ib_executor() as ib_exec:
+                if ib_exec.connected:
+                    quotes = ib_exec.get_quotes(tickers)
+        except Exception as e:
+            print(f"! Could not fetch IB quotes: {e}")
+        print(f"+ Quotes for {len(quotes)}/{len(tickers)} tickers")
+        
+        status = current_ema_status(tickers, quotes, self.signal_gen.indicator_engine())
+        price_data = {t: float(s['current_price']) for t, s in status.items()}
+        ema_data = {t: float(s['current_ema']) for t, s in status.items()}
+        return price_data, ema_data
+    
     def generate_signals_night(self):
         """
         STEP 1: Generate signals and save pending entries (Night run)
@@ -66,7 +123,7 @@ class LiveTrader:
         
         try:
             # Generate signals
-            signals = self.signal_gen.generate_signals()
+            signals = self._generate_signals()
             
             self.last_signal_time = signals['timestamp']
             
@@ -97,7 +154,7 @@ class LiveTrader:
                     account_value = self._get_account_value()
                     current_positions = {}
                     try:
-                        with IBExecutor(port=self.ib_port) as ib_exec:
+                        with self._ib_executor() as ib_exec:
                             if ib_exec.connected:
                                 current_positions = ib_exec.get_current_positions()
                     except:
@@ -172,8 +229,8 @@ class LiveTrader:
             # Get tickers to check
             pending_tickers = list(self.pending_manager.pending_orders['entries'].keys())
             
-            # Fetch current market data
-            price_data, ema_data = self.pending_manager.get_current_market_data(pending_tickers)
+            # Current price/EMA: persisted EMA + live IB quote (history download only as fallback)
+            price_data, ema_data = self._get_confirmation_data(pending_tickers)
             
             # Confirm entries (checks EMA)
             confirmed_entries, rejected_entries = self.pending_manager.confirm_and_get_entries(price_data, ema_data)
@@ -215,23 +272,23 @@ class LiveTrader:
                 'errors': []
             }
             
-            with IBExecutor(port=self.ib_port) as ib_exec:
+            with self._ib_executor() as ib_exec:
                 if ib_exec.connected:
                     # Get account value before
                     account_value_before = ib_exec.get_account_value()
                     
-                    # Initialize position manager
-                    position_manager = PositionManager(ib_exec.ib)
-                    
                     # Get positions before
                     positions_before = ib_exec.get_current_positions()
                     
-                    # Execute rebalance with confirmed entries
-                    trades = ib_exec.execute_rebalance(
-                        target_weights, 
-                        position_manager=position_manager,
-                        atr_data=atr_data
-                    )
+                    # Execute rebalance with confirmed entries (the position
+                    # manager's store is closed once the rebalance is done)
+                    with PositionManager(ib_exec.ib, entry_mode='bracket') as position_manager:
+                        trades = ib_exec.execute_rebalance(
+                            target_weights, 
+                            position_manager=position_manager,
+                            atr_data=atr_data,
+                            atr_multiplier=self.signal_gen.atr_stop_loss
+                        )
                     self.last_trades = trades
                     
                     # Get positions after
@@ -356,7 +413,7 @@ class LiveTrader:
         # Get current positions
         current_positions = {}
         try:
-            with IBExecutor(port=self.ib_port) as ib_exec:
+            with self._ib_executor() as ib_exec:
                 if ib_exec.connected:
                     current_positions = ib_exec.get_current_positions()
         except:
@@ -440,7 +497,7 @@ class LiveTrader:
         # Get current positions
         current_positions = {}
         try:
-            with IBExecutor(port=self.ib_port) as ib_exec:
+            with self._ib_executor() as ib_exec:
                 if ib_exec.connected:
                     current_positions = ib_exec.get_current_positions()
         except:
@@ -524,7 +581,7 @@ class LiveTrader:
             f.write("4. Result:\n")
             f.write("   - Execution report saved to morning_report_YYYYMMDD.txt\n")
             f.write("   - Trade history updated in trade_history.csv\n")
-            f.write("   - Position state updated in position_state.json\n")
+            f.write("   - Position state updated in position_state.db\n")
             f.write("   - Telegram notification sent\n")
             f.write("="*80 + "\n")
         
@@ -669,7 +726,7 @@ class LiveTrader:
             f.write("\n" + "="*70 + "\n")
             f.write("FILES UPDATED:\n")
             f.write("="*70 + "\n")
-            f.write("  position_state.json - Current position tracking\n")
+            f.write("  position_state.db - Current position tracking\n")
             f.write("  trade_history.csv - Trade log\n")
             f.write("  entry_rejections.csv - Rejected entries log\n")
             f.write("="*70 + "\n")
@@ -722,6 +779,11 @@ class LiveTrader:
         print(f"IB Port: {self.ib_port}")
         print("="*70)
         
+        # One long-lived IB session shared by night run, Telegram alert and morning run
+        if self.session is None:
+            self.session = IBConnectionManager(port=self.ib_port)
+        self.session.connect()
+        
         # Schedule both jobs
         schedule.every().day.at(night_time).do(self.generate_signals_night)
         schedule.every().day.at(morning_time).do(self.confirm_and_execute_morning)
@@ -732,9 +794,13 @@ class LiveTrader:
         print("Press Ctrl+C to stop")
         
         # Keep running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        try:
+            while True:
+                schedule.run_pending()
+                self.session.heartbeat()
+                self.session.idle(60)  # Check every minute
+        finally:
+            self.session.close()
 
 
 if __name__ == "__main__":
@@ -770,6 +836,9 @@ Examples:
                        help='Enable live trading (default is dry run)')
     parser.add_argument('--no-telegram', action='store_true',
                        help='Disable Telegram notifications')
+    parser.add_argument('--full-history', action='store_true',
+                       help='Recompute signals and EMA confirmations from fetched history '
+                            'instead of the indicator state')
     
     args = parser.parse_args()
     
@@ -784,7 +853,8 @@ Examples:
     trader = LiveTrader(
         ib_port=args.port,
         dry_run=not args.live,
-        enable_telegram=not args.no_telegram
+        enable_telegram=not args.no_telegram,
+        use_indicator_state=not args.full_history
     )
     
     # Run
@@ -26,8 +26,6 @@ from ib_executor import IBExecutor
 from position_manager import PositionManager
 from telegram_notifier import get_notifier
 from datetime import datetime
-import yfinance as yf
-import pandas as pd
 
 
 class SimpleLiveTrader:
@@ -59,59 +57,31 @@ class SimpleLiveTrader:
         Get CURRENT EMA status for confirmation
         
         This uses TODAY's/current data for EMA confirmation,
-        matching the backtest's T+0 confirmation logic.
+        matching the backtest's T+0 confirmation logic: yesterday's
+        persisted EMA (indicator_state.py) stepped once with the current
+        IB quote. Tickers without a quote or state fall back to a 3-month
+        history download.
         
         Args:
             tickers: List of tickers to check
             ema_period: EMA period (default 50)
         
         Returns:
-            Dict of {ticker: (current_price, current_ema, is_above_ema)}
+            Dict of {ticker: {current_price, current_ema, is_above_ema}}
         """
-        print(f"\nFetching current market data for {len(tickers)} tickers...")
+        from indicator_state import IndicatorEngine, current_ema_status
         
-        # Fetch recent data (need enough for EMA calculation)
-        price_data = yf.download(
-            tickers, 
-            period='3mo',  # 3 months to ensure enough data for 50-day EMA
-            progress=False,
-            auto_adjust=True
-        )['Close']
+        print(f"\nFetching current quotes for {len(tickers)} tickers...")
+        quotes = {}
+        with IBExecutor(port=self.ib_port) as ib_exec:
+            if ib_exec.connected:
+                quotes = ib_exec.get_quotes(tickers)
+        print(f"+ Quotes for {len(quotes)}/{len(tickers)} tickers")
         
-        if isinstance(price_data, pd.Series):
-            price_data = price_data.to_frame(name=tickers[0])
-        
-        print(f"+ Loaded data for {len(price_data.columns)} tickers")
-        
-        # Calculate current EMA for each ticker
-        ema_status = {}
-        
-        for ticker in tickers:
-            if ticker not in price_data.columns:
-                print(f"  WARNING: No data for {ticker}")
-                continue
-            
-            prices = price_data[ticker].dropna()
-            
-            if len(prices) < ema_period:
-                print(f"  WARNING: Not enough data for {ticker}")
-                continue
-            
-            # Calculate 50-day EMA
-            ema = prices.ewm(span=ema_period, adjust=False).mean()
-            
-            # Get current (most recent) values
-            current_price = prices.iloc[-1]
-            current_ema = ema.iloc[-1]
-            is_above = current_price > current_ema
-            
-            ema_status[ticker] = {
-                'current_price': current_price,
-                'current_ema': current_ema,
-                'is_above_ema': is_above
-            }
-        
-        return ema_status
+        engine = IndicatorEngine(ema_period=ema_period, vol_lookback=self.signal_gen.vol_lookback,
+                                 atr_period=self.signal_gen.atr_period,
+                                 momentum_days=self.signal_gen.momentum_days)
+        return current_ema_status(tickers, quotes, engine)
     
     def confirm_entries(self, target_weights: dict, ema_status: dict) -> tuple:
         """
@@ -179,7 +149,11 @@ class SimpleLiveTrader:
             print("STEP 1: SIGNAL GENERATION (from yesterday's close)")
             print("="*70)
             
-            signals = self.signal_gen.generate_signals()
+            try:
+                signals = self.signal_gen.generate_signals_from_state()
+            except Exception as e:
+                print(f"! Indicator state unavailable ({e}) - fetching full history")
+                signals = self.signal_gen.generate_signals()
             
             target_weights = signals['target_weights']
             regime = signals['current_regime']
@@ -265,19 +239,18 @@ class SimpleLiveTrader:
                     print("\nERROR: Invalid account value")
                     return
                 
-                # Initialize position manager
-                position_manager = PositionManager(ib_exec.ib)
-                
                 # Get positions before
                 positions_before = ib_exec.get_current_positions()
                 print(f"+ Current positions: {len(positions_before)}")
                 
-                # Execute rebalance
-                trades = ib_exec.execute_rebalance(
-                    confirmed_weights,
-                    position_manager=position_manager,
-                    atr_data=atr_data
-                )
+                # Execute rebalance (position manager closed when done)
+                with PositionManager(ib_exec.ib, entry_mode='bracket') as position_manager:
+                    trades = ib_exec.execute_rebalance(
+                        confirmed_weights,
+                        position_manager=position_manager,
+                        atr_data=atr_data,
+                        atr_multiplier=self.signal_gen.atr_stop_loss
+                    )
                 
                 # Get positions after
                 positions_after = ib_exec.get_current_positions()
@@ -6,13 +6,23 @@ Manages position state, entry prices, stop orders, and trade history.
 Critical for the ATR 2.0x stop loss strategy.
 """
 
-import json
+from __future__ import annotations
+
+import atexit
 import os
 from datetime import datetime
-from typing import Dict, Optional, List
-from ib_insync import IB, Contract, Order, Trade
+from typing import Dict, Optional, List, TYPE_CHECKING
 import pandas as pd
 
+from position_store import PositionStore
+from trade_log import TradeLogWriter, read_trade_history
+
+if TYPE_CHECKING:
+    from ib_insync import IB, Contract
+
+# Entry order modes supported by PositionManager.enter_position
+ENTRY_MODES = ('market', 'bracket')
+
 
 class PositionManager:
     """
@@ -21,47 +31,71 @@ class PositionManager:
     Features:
     - Tracks entry prices and stop levels
     - Places and manages IB stop orders
-    - Persists state to JSON file
+    - Persists state per position to a transactional SQLite store
     - Logs all trades with entry/exit reasons
     - Syncs with IB positions on startup
     """
     
-    def __init__(self, ib: IB, state_file='position_state.json', 
-                 trade_log='trade_history.csv'):
+    def __init__(self, ib: IB, state_file='position_state.db', 
+                 trade_log='trade_history.csv', entry_mode='market'):
         """
         Initialize Position Manager
         
         Args:
             ib: Connected IB instance
-            state_file: Path to JSON state file
+            state_file: Path to position store database (a legacy .json path is
+                        migrated into the .db file next to it)
             trade_log: Path to CSV trade log
+            entry_mode: 'market' = market entry, wait for fill, then place GTC stop
+                        'bracket' = market entry with attached GTC stop in one transmit
         """
+        if entry_mode not in ENTRY_MODES:
+            raise ValueError(f"entry_mode must be one of {ENTRY_MODES}, got {entry_mode!r}")
+        
         self.ib = ib
-        self.state_file = state_file
+        if state_file.endswith('.json'):
+            self.state_file = os.path.splitext(state_file)[0] + '.db'
+            self.store = PositionStore(self.state_file, legacy_json=state_file)
+        else:
+            self.state_file = state_file
+            self.store = PositionStore(state_file)
         self.trade_log = trade_log
+        self.trade_writer = TradeLogWriter(trade_log)
+        atexit.register(self.commit)
+        self.entry_mode = entry_mode
         self.state = self.load_state()
         self.pending_orders = {}  # Track orders being placed
         
     def load_state(self) -> Dict:
-        """Load position state from file"""
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"⚠️ Error loading state file: {e}")
-                return {'positions': {}, 'metadata': {}}
-        else:
+        """Load position state from store"""
+        try:
+            return self.store.load()
+        except Exception as e:
+            print(f"⚠️ Error loading position store: {e}")
             return {'positions': {}, 'metadata': {}}
     
     def save_state(self):
-        """Save position state to file"""
+        """Save the whole in-memory book to the store (full resync, single transaction)"""
         try:
             self.state['metadata']['last_updated'] = datetime.now().isoformat()
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2)
+            self.store.replace_all(self.state['positions'], self.state['metadata'])
         except Exception as e:
-            print(f"⚠️ Error saving state file: {e}")
+            print(f"⚠️ Error saving position store: {e}")
+    
+    def _save_position(self, ticker: str):
+        """Persist one position (O(change) write)"""
+        try:
+            self.store.upsert(ticker, self.state['positions'][ticker])
+        except Exception as e:
+            print(f"⚠️ Error saving {ticker} to position store: {e}")
+    
+    def _remove_position(self, ticker: str):
+        """Drop one position from memory and the store"""
+        self.state['positions'].pop(ticker, None)
+        try:
+            self.store.delete(ticker)
+        except Exception as e:
+            print(f"⚠️ Error removing {ticker} from position store: {e}")
     
     def sync_with_ib(self):
         """
@@ -87,7 +121,8 @@ class PositionManager:
                 print(f"  ⚠️ {ticker} found in IB but not in state (external position)")
                 # Don't manage external positions
         
-        self.save_state()
+        self.store.set_metadata(last_synced=datetime.now().isoformat())
+        self.commit()
         return len(closed_tickers)
     
     def enter_position(self, contract: Contract, quantity: int, 
@@ -96,6 +131,11 @@ class PositionManager:
         """
         Enter a position and place stop order
         
+        In 'market' mode the entry is sent, filled, and only then is the GTC
+        stop placed. In 'bracket' mode the stop is attached to the entry
+        (parent/child) and both are transmitted together, so the position is
+        never open without a stop at IB.
+        
         Args:
             contract: IB contract
             quantity: Number of shares/contracts
@@ -109,41 +149,17 @@ class PositionManager:
         ticker = contract.symbol
         
         try:
-            # 1. Place entry order (market order)
-            entry_order = Order()
-            entry_order.action = 'BUY'
-            entry_order.orderType = 'MKT'
-            entry_order.totalQuantity = quantity
-            entry_order.transmit = True  # Send immediately
-            
-            print(f"  📈 Placing BUY order: {quantity} {ticker} @ market")
-            entry_trade = self.ib.placeOrder(contract, entry_order)
-            
-            # Wait for fill (with timeout)
-            for i in range(30):  # 30 seconds max
-                self.ib.sleep(1)
-                if entry_trade.orderStatus.status in ['Filled', 'Cancelled']:
-                    break
+            # 1-2. Place entry + stop orders
+            if self.entry_mode == 'bracket':
+                placed = self._place_bracket_entry(contract, quantity, stop_price)
+            else:
+                placed = self._place_market_entry(contract, quantity, stop_price)
             
-            if entry_trade.orderStatus.status != 'Filled':
-                print(f"  ✗ Entry order not filled: {entry_trade.orderStatus.status}")
+            if placed is None:
                 return False
             
-            # Get actual fill price
+            entry_trade, stop_trade, quantity = placed
             actual_entry_price = entry_trade.orderStatus.avgFillPrice
-            print(f"  ✓ Filled: {quantity} {ticker} @ ${actual_entry_price:.2f}")
-            
-            # 2. Place stop order (GTC = Good-Till-Cancelled)
-            stop_order = Order()
-            stop_order.action = 'SELL'
-            stop_order.orderType = 'STP'
-            stop_order.auxPrice = stop_price
-            stop_order.totalQuantity = quantity
-            stop_order.tif = 'GTC'  # Good-Till-Cancelled (doesn't expire daily)
-            stop_order.transmit = True
-            
-            print(f"  🛑 Placing STOP: Sell {quantity} {ticker} @ ${stop_price:.2f} (GTC)")
-            stop_trade = self.ib.placeOrder(contract, stop_order)
             
             # 3. Save state
             self.state['positions'][ticker] = {
@@ -152,7 +168,7 @@ class PositionManager:
                 'stop_price': stop_price,
                 'atr_at_entry': atr,
                 'entry_order_id': entry_trade.order.orderId,
-                'stop_order_id': stop_trade.order.orderId,
+                **self._stop_ids(stop_trade),
                 'entry_date': datetime.now().isoformat(),
                 'contract_details': {
                     'symbol': contract.symbol,
@@ -161,7 +177,7 @@ class PositionManager:
                     'currency': contract.currency
                 }
             }
-            self.save_state()
+            self._save_position(ticker)
             
             # 4. Log trade
             self._log_trade({
@@ -182,6 +198,136 @@ class PositionManager:
             print(f"  ✗ Error entering position {ticker}: {e}")
             return False
     
+    def _place_market_entry(self, contract: Contract, quantity: int, stop_price: float):
+        """
+        Market entry, wait for fill, then a separate GTC stop order
+        
+        Returns:
+            (entry_trade, stop_trade, filled_quantity) or None if not filled
+        """
+        from ib_insync import Order
+
+        ticker = contract.symbol
+        
+        # 1. Place entry order (market order)
+        entry_order = Order()
+        entry_order.action = 'BUY'
+        entry_order.orderType = 'MKT'
+        entry_order.totalQuantity = quantity
+        entry_order.transmit = True  # Send immediately
+        
+        print(f"  📈 Placing BUY order: {quantity} {ticker} @ market")
+        entry_trade = self.ib.placeOrder(contract, entry_order)
+        
+        # Wait for fill (with timeout)
+        for i in range(30):  # 30 seconds max
+            self.ib.sleep(1)
+            if entry_trade.orderStatus.status in ['Filled', 'Cancelled']:
+                break
+        
+        if entry_trade.orderStatus.status != 'Filled':
+            print(f"  ✗ Entry order not filled: {entry_trade.orderStatus.status}")
+            return None
+        
+        # Get actual fill price
+        actual_entry_price = entry_trade.orderStatus.avgFillPrice
+        print(f"  ✓ Filled: {quantity} {ticker} @ ${actual_entry_price:.2f}")
+        
+        # 2. Place stop order (GTC = Good-Till-Cancelled)
+        stop_order = Order()
+        stop_order.action = 'SELL'
+        stop_order.orderType = 'STP'
+        stop_order.auxPrice = stop_price
+        stop_order.totalQuantity = quantity
+        stop_order.tif = 'GTC'  # Good-Till-Cancelled (doesn't expire daily)
+        stop_order.transmit = True
+        
+        print(f"  🛑 Placing STOP: Sell {quantity} {ticker} @ ${stop_price:.2f} (GTC)")
+        stop_trade = self.ib.placeOrder(contract, stop_order)
+        
+        return entry_trade, stop_trade, quantity
+    
+    def _place_bracket_entry(self, contract: Contract, quantity: int, stop_price: float):
+        """
+        Market entry with an attached GTC stop, sent in a single transmit
+        
+        The parent is placed with transmit=False and the child stop with
+        transmit=True, so IB receives both together and activates the stop
+        as soon as the parent fills. Cancelling an unfilled parent cancels
+        the child with it.
+        
+        Returns:
+            (entry_trade, stop_trade, filled_quantity) or None if not filled
+        """
+        from ib_insync import Order
+
+        ticker = contract.symbol
+        
+        # 1. Parent: market entry (held until the child is transmitted)
+        entry_order = Order()
+        entry_order.orderId = self.ib.client.getReqId()
+        entry_order.action = 'BUY'
+        entry_order.orderType = 'MKT'
+        entry_order.totalQuantity = quantity
+        entry_order.transmit = False
+        
+        # 2. Child: GTC stop attached to the parent (transmits both)
+        stop_order = Order()
+        stop_order.orderId = self.ib.client.getReqId()
+        stop_order.parentId = entry_order.orderId
+        stop_order.action = 'SELL'
+        stop_order.orderType = 'STP'
+        stop_order.auxPrice = stop_price
+        stop_order.totalQuantity = quantity
+        stop_order.tif = 'GTC'  # Good-Till-Cancelled (doesn't expire daily)
+        stop_order.transmit = True
+        
+        print(f"  📈 Placing BRACKET: BUY {quantity} {ticker} @ market "
+              f"+ STOP @ ${stop_price:.2f} (GTC, attached)")
+        entry_trade = self.ib.placeOrder(contract, entry_order)
+        stop_trade = self.ib.placeOrder(contract, stop_order)
+        
+        # Wait for parent fill (with timeout)
+        for i in range(30):  # 30 seconds max
+            self.ib.sleep(1)
+            if entry_trade.orderStatus.status in ['Filled', 'Cancelled', 'Inactive']:
+                break
+        
+        status = entry_trade.orderStatus.status
+        filled = int(entry_trade.orderStatus.filled or 0)
+        
+        if status != 'Filled':
+            # Cancel the parent (IB cancels the attached stop with it)
+            if status not in ['Cancelled', 'Inactive']:
+                try:
+                    self.ib.cancelOrder(entry_trade.order)
+                except Exception as e:
+                    print(f"  ⚠️ Could not cancel unfilled entry for {ticker}: {e}")
+            
+            if filled <= 0:
+                print(f"  ✗ Bracket entry not filled: {status}")
+                return None
+            
+            # Partial fill: keep what we got, resize the stop to match
+            print(f"  ⚠️ Partial fill: {filled}/{quantity} {ticker} - resizing stop")
+            self.ib.sleep(1)
+            if stop_trade.orderStatus.status in ['Cancelled', 'ApiCancelled', 'Inactive']:
+                # Child went down with the parent - protect the fill standalone
+                stop_order = Order()
+                stop_order.action = 'SELL'
+                stop_order.orderType = 'STP'
+                stop_order.auxPrice = stop_price
+                stop_order.tif = 'GTC'
+                stop_order.transmit = True
+            stop_order.totalQuantity = filled
+            stop_trade = self.ib.placeOrder(contract, stop_order)
+            quantity = filled
+        
+        actual_entry_price = entry_trade.orderStatus.avgFillPrice
+        print(f"  ✓ Filled: {quantity} {ticker} @ ${actual_entry_price:.2f} (stop already active)")
+        
+        return entry_trade, stop_trade, quantity
+    
     def adjust_position(self, contract: Contract, new_quantity: int) -> bool:
         """
         Adjust an existing position size (CRITICAL: keeps original stop price)
@@ -216,7 +362,7 @@ class PositionManager:
             old_stop_order_id = position.get('stop_order_id')
             if old_stop_order_id:
                 try:
-                    self.ib.cancelOrder(old_stop_order_id)
+                    self._cancel_order_id(old_stop_order_id)
                     print(f"  ✓ Cancelled old stop order for {ticker}")
                 except Exception as e:
                     print(f"  ⚠️ Could not cancel old stop: {e}")
@@ -226,6 +372,7 @@ class PositionManager:
             action = 'BUY' if delta > 0 else 'SELL'
             abs_delta = abs(delta)
             
+            from ib_insync import Order
             adjustment_order = Order()
             adjustment_order.action = action
             adjustment_order.orderType = 'MKT'
@@ -266,9 +413,9 @@ class PositionManager:
             # 4. Update state with new quantity and stop order ID
             # KEEP original entry_price and stop_price!
             position['shares'] = new_quantity
-            position['stop_order_id'] = new_stop_trade.order.orderId
+            position.update(self._stop_ids(new_stop_trade))
             position['last_adjusted'] = datetime.now().isoformat()
-            self.save_state()
+            self._save_position(ticker)
             
             # 5. Log adjustment
             self._log_trade({
@@ -317,13 +464,14 @@ class PositionManager:
             stop_order_id = position.get('stop_order_id')
             if stop_order_id:
                 try:
-                    self.ib.cancelOrder(stop_order_id)
+                    self._cancel_order_id(stop_order_id)
                     print(f"  ✓ Cancelled stop order for {ticker}")
                 except Exception as e:
                     print(f"  ⚠️ Could not cancel stop for {ticker}: {e}")
                     # Continue anyway - might already be cancelled/filled
             
             # 2. Place exit order
+            from ib_insync import Order
             exit_order = Order()
             exit_order.action = 'SELL'
             exit_order.orderType = 'MKT'
@@ -368,8 +516,7 @@ class PositionManager:
             })
             
             # 5. Remove from state
-            del self.state['positions'][ticker]
-            self.save_state()
+            self._remove_position(ticker)
             
             print(f"  ✓ Position closed: {ticker}")
             return True
@@ -387,7 +534,7 @@ class PositionManager:
             stop_order_id = position.get('stop_order_id')
             if stop_order_id:
                 try:
-                    self.ib.cancelOrder(stop_order_id)
+                    self._cancel_order_id(stop_order_id)
                 except:
                     pass
             
@@ -402,7 +549,37 @@ class PositionManager:
             })
             
             # Remove from state
-            del self.state['positions'][ticker]
+            self._remove_position(ticker)
+    
+    @staticmethod
+    def _stop_ids(stop_trade) -> Dict:
+        """
+        State fields identifying a stop order across IB client sessions
+        
+        orderId is only unique per client ID, so the permId (and the placing
+        client ID, for a permId IB has not reported yet) is kept too - the
+        stop monitor runs as a different client and matches on these.
+        """
+        order = stop_trade.order
+        return {
+            'stop_order_id': order.orderId,
+            'stop_perm_id': order.permId or stop_trade.orderStatus.permId,
+            'stop_client_id': order.clientId,
+        }
+    
+    def _cancel_order_id(self, order_id: int):
+        """
+        Cancel an order by its stored order ID
+        
+        IB.cancelOrder() needs the Order object, while state only keeps the
+        ID, so look the order up among the open trades (falling back to a
+        bare Order carrying just the ID for orders IB did not report).
+        """
+        for trade in self.ib.openTrades():
+            if trade.order.orderId == order_id:
+                return self.ib.cancelOrder(trade.order)
+        from ib_insync import Order
+        return self.ib.cancelOrder(Order(orderId=order_id))
     
     def check_stops(self, current_prices: Dict[str, float]) -> List[str]:
         """
@@ -441,26 +618,36 @@ class PositionManager:
         return ticker in self.state['positions']
     
     def _log_trade(self, trade_data: Dict):
-        """Log trade to CSV file"""
+        """Buffer a trade row (written to the CSV on commit)"""
         try:
-            # Create DataFrame
-            df = pd.DataFrame([trade_data])
-            
-            # Append to CSV
-            if os.path.exists(self.trade_log):
-                df.to_csv(self.trade_log, mode='a', header=False, index=False)
-            else:
-                df.to_csv(self.trade_log, mode='w', header=True, index=False)
-                
+            self.trade_writer.append(trade_data)
         except Exception as e:
             print(f"⚠️ Error logging trade: {e}")
     
-    def get_trade_history(self) -> pd.DataFrame:
-        """Get trade history as DataFrame"""
-        if os.path.exists(self.trade_log):
-            return pd.read_csv(self.trade_log)
-        else:
-            return pd.DataFrame()
+    def commit(self):
+        """Flush buffered trade log rows to disk"""
+        try:
+            self.trade_writer.commit()
+        except Exception as e:
+            print(f"⚠️ Error writing trade log: {e}")
+    
+    def close(self):
+        """Flush the trade log, close the position store and drop the exit hook"""
+        self.commit()
+        self.store.close()
+        atexit.unregister(self.commit)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def get_trade_history(self, ticker: Optional[str] = None, start: Optional[str] = None,
+                          end: Optional[str] = None) -> pd.DataFrame:
+        """Get trade history as DataFrame (optionally filtered by ticker/date range)"""
+        self.commit()
+        return read_trade_history(self.trade_log, ticker=ticker, start=start, end=end)
     
     def print_summary(self):
         """Print current position summary"""
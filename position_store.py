@@ -0,0 +1,192 @@
+"""
+Transactional Position State Store
+==================================
+
+SQLite (WAL mode) store for the position state that the ATR stops depend on.
+Replaces the old position_state.json rewrites:
+
+- One row per ticker: entries/adjustments/exits touch only that row
+- Every write is a single transaction, so a crash leaves the last committed state
+- WAL journal lets readers (dashboard, scripts) read while the trader writes
+- One-time migration from a legacy position_state.json
+
+Usage:
+    python position_store.py                 # Show positions
+    python position_store.py --export out.json
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+DEFAULT_DB_FILE = 'position_state.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    ticker     TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class PositionStore:
+    """Per-position transactional store backed by SQLite"""
+
+    def __init__(self, db_file=DEFAULT_DB_FILE, legacy_json: Optional[str] = None):
+        """
+        Open (and create if needed) the position store
+
+        Args:
+            db_file: Path to SQLite database file
+            legacy_json: Old position_state.json to import once if the store is empty
+                         (defaults to the .json file next to db_file)
+        """
+        self.db_file = db_file
+        self.legacy_json = legacy_json or os.path.splitext(db_file)[0] + '.json'
+
+        # Autocommit mode: transactions are opened explicitly in _transaction()
+        self.conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(SCHEMA)
+
+        self._migrate_legacy_json()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (BEGIN IMMEDIATE takes the write lock up front)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+
+    def _migrate_legacy_json(self):
+        """Import position_state.json once (file is left in place)"""
+        if self.get_metadata('legacy_json_migrated') or not os.path.exists(self.legacy_json):
+            return
+
+        try:
+            with open(self.legacy_json, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read legacy state file {self.legacy_json}: {e}")
+            return
+
+        positions = legacy.get('positions', {})
+        metadata = legacy.get('metadata', {})
+        now = datetime.now().isoformat()
+
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0] == 0:
+                conn.executemany(
+                    "INSERT INTO positions (ticker, data, updated_at) VALUES (?, ?, ?)",
+                    [(ticker, json.dumps(data), now) for ticker, data in positions.items()])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in metadata.items()])
+            conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                         ('legacy_json_migrated', json.dumps(now)))
+
+        print(f"+ Migrated {len(positions)} positions from {self.legacy_json} to {self.db_file}")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def load(self) -> Dict:
+        """Load full state in the legacy {'positions': ..., 'metadata': ...} layout"""
+        positions = {ticker: json.loads(data) for ticker, data in
+                     self.conn.execute("SELECT ticker, data FROM positions ORDER BY ticker")}
+        metadata = {key: json.loads(value) for key, value in
+                    self.conn.execute("SELECT key, value FROM metadata")}
+        return {'positions': positions, 'metadata': metadata}
+
+    def get(self, ticker: str) -> Optional[Dict]:
+        """Look up one position by ticker (primary key)"""
+        row = self.conn.execute("SELECT data FROM positions WHERE ticker = ?", (ticker,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_metadata(self, key: str):
+        row = self.conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ------------------------------------------------------------------
+    # Writes (one transaction each)
+    # ------------------------------------------------------------------
+
+    def upsert(self, ticker: str, data: Dict):
+        """Insert or replace a single position"""
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO positions (ticker, data, updated_at) VALUES (?, ?, ?)",
+                         (ticker, json.dumps(data), now))
+            conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                         ('last_updated', json.dumps(now)))
+
+    def delete(self, ticker: str):
+        """Remove a single position"""
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM positions WHERE ticker = ?", (ticker,))
+            conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                         ('last_updated', json.dumps(now)))
+
+    def set_metadata(self, **values):
+        """Set metadata keys"""
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in values.items()])
+
+    def replace_all(self, positions: Dict, metadata: Optional[Dict] = None):
+        """Atomically replace the whole book (full resync)"""
+        now = datetime.now().isoformat()
+        metadata = dict(metadata or {}, last_updated=now)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM positions")
+            conn.executemany(
+                "INSERT INTO positions (ticker, data, updated_at) VALUES (?, ?, ?)",
+                [(ticker, json.dumps(data), now) for ticker, data in positions.items()])
+            conn.executemany("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in metadata.items()])
+
+    def export_json(self, path: str):
+        """Write a human-readable JSON snapshot (for inspection only)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.load(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect the position state store')
+    parser.add_argument('--db', default=DEFAULT_DB_FILE, help='Store database file')
+    parser.add_argument('--export', help='Export state to a JSON file')
+    args = parser.parse_args()
+
+    store = PositionStore(args.db)
+
+    if args.export:
+        store.export_json(args.export)
+        print(f"+ State exported to {args.export}")
+    else:
+        state = store.load()
+        print(json.dumps(state, indent=2))
+
+    store.close()
@@ -0,0 +1,388 @@
+"""
+Shared Price Matrix Store
+=========================
+
+One aligned, versioned copy of the daily price panel for every process on
+the machine (dashboard sessions, API builders, the night signal run,
+research sweeps). Matrices are plain .npy files that consumers memory-map
+read-only, so all processes share the same page-cache pages instead of
+each holding its own DataFrames.
+
+Layout (PRICE_MATRIX_DIR, default .price_matrix/):
+    manifest.json          Current version: bar, dates file, tickers, matrices
+    <version>/dates.npy    datetime64[ns] row index (NYSE sessions)
+    <version>/<name>.npy   float64 [dates x tickers] matrices
+
+Matrices:
+- close, open, high, low:  raw adjusted prices on the NYSE sessions (NaN
+  where a ticker has no bar; crypto weekend bars are not stored)
+- ema_<span>, vol_<lookback>: indicators on the forward-filled closes, same
+  formulas as the backtest/signal generator
+- atr_<period>:  Wilder ATR of the true range (high/low against the previous
+  close), computed once per published bar; consumers read it instead of
+  rebuilding it. Versions published without high/low use the close-to-close
+  range.
+
+Builds pass the downloaded bars through data_validation.quarantine() first,
+so bad prints and stale runs are stored as missing bars.
+
+A build writes a new version directory and then atomically swaps the
+manifest, so attached readers keep their (old) mapping until they re-attach.
+Rolling indicators (vol) only depend on their window and match a recompute
+on any panel with enough history; EMAs and the Wilder ATR depend on their
+start date and are warmed over the whole stored history.
+
+Usage:
+    python price_matrix_store.py --build                  # Fetch and publish
+    python price_matrix_store.py --build --start 2015-01-01
+    python price_matrix_store.py --info
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import QUAD_ALLOCATIONS, QUAD_INDICATORS
+from data_validation import quarantine
+from singleflight import latest_bar_date
+
+PRICE_MATRIX_DIR = os.environ.get(
+    'PRICE_MATRIX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.price_matrix')
+)
+MANIFEST = 'manifest.json'
+
+# Indicators published with each version (production parameters)
+DEFAULT_INDICATORS = {'ema': [50], 'vol': [30], 'atr': [14]}
+DEFAULT_ATR_PERIOD = 14
+DEFAULT_HISTORY_YEARS = 7
+
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+def store_universe() -> list:
+    """Every ticker the backtest and the signal generator load"""
+    from quad_portfolio_backtest import ADDITIONAL_BACKTEST_TICKERS
+    from signal_generator import QUAD_INDICATORS as SIGNAL_INDICATORS
+
+    tickers = set(ADDITIONAL_BACKTEST_TICKERS)
+    for assets in QUAD_ALLOCATIONS.values():
+        tickers.update(assets)
+    for indicators in list(QUAD_INDICATORS.values()) + list(SIGNAL_INDICATORS.values()):
+        tickers.update(indicators)
+    return sorted(tickers)
+
+
+def true_range(closes: pd.DataFrame, highs: pd.DataFrame = None, lows: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Daily true range: max(high - low, |high - prev close|, |low - prev close|)
+
+    Without highs/lows the bar's range is its close (|close - prev close|).
+    NaN where a ticker has no bar; the first bar is high - low.
+    """
+    if highs is None or lows is None:
+        highs = lows = closes
+    highs = highs.reindex(index=closes.index, columns=closes.columns)
+    lows = lows.reindex(index=closes.index, columns=closes.columns)
+    prev_close = closes.shift(1).to_numpy(dtype=np.float64)
+    high, low = highs.to_numpy(dtype=np.float64), lows.to_numpy(dtype=np.float64)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return pd.DataFrame(tr, index=closes.index, columns=closes.columns)
+
+
+def wilder_atr(closes: pd.DataFrame, period: int, highs: pd.DataFrame = None,
+               lows: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Wilder ATR (RMA of the true range, alpha = 1/period) for every column
+
+    Rows without a bar (NaN true range) are skipped rather than decayed, and
+    values are NaN until a ticker has `period` true ranges.
+
+    Args:
+        closes: Gap-filled closes [dates x tickers]
+        period: ATR period
+        highs, lows: Raw highs/lows (None = close-to-close range)
+    """
+    tr = true_range(closes, highs, lows)
+    return tr.ewm(alpha=1.0 / period, adjust=False, min_periods=period, ignore_na=True).mean()
+
+
+def compute_indicators(closes: pd.DataFrame, indicators: Dict[str, Iterable[int]] = None,
+                       highs: pd.DataFrame = None, lows: pd.DataFrame = None) -> Dict[str, pd.DataFrame]:
+    """Indicator matrices on forward-filled closes (backtest formulas; NaN before a ticker's first bar)"""
+    indicators = indicators or DEFAULT_INDICATORS
+    filled = closes.ffill()
+    returns = filled.pct_change()
+
+    out = {}
+    for span in indicators.get('ema', []):
+        out[f'ema_{span}'] = filled.ewm(span=span, adjust=False).mean()
+    for lookback in indicators.get('vol', []):
+        out[f'vol_{lookback}'] = returns.rolling(window=lookback).std() * np.sqrt(252)
+    for period in indicators.get('atr', []):
+        out[f'atr_{period}'] = wilder_atr(filled, period, highs, lows)
+    return out
+
+
+class PriceMatrices:
+    """Read-only, memory-mapped view of one published version"""
+
+    def __init__(self, root: str, manifest: Dict):
+        self.root = root
+        self.manifest = manifest
+        self.version: str = manifest['version']
+        self.bar: str = manifest['bar']
+        self.tickers = pd.Index(manifest['tickers'])
+        self.dates = pd.DatetimeIndex(self._load(manifest['dates']))
+        self._arrays = {}
+
+    def _load(self, relpath: str) -> np.ndarray:
+        return np.load(os.path.join(self.root, relpath), mmap_mode='r')
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.manifest['matrices']
+
+    @property
+    def names(self):
+        return list(self.manifest['matrices'])
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only memory-mapped [dates x tickers] array"""
+        if name not in self._arrays:
+            self._arrays[name] = self._load(self.manifest['matrices'][name])
+        return self._arrays[name]
+
+    def frame(self, name: str, start=None, end=None) -> pd.DataFrame:
+        """
+        DataFrame view of a matrix (no copy), optionally limited to dates
+
+        Args:
+            name: Matrix name (close, open, ema_50, ...)
+            start: First date (inclusive)
+            end: Last date (exclusive)
+        """
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='left')
+        return pd.DataFrame(self.array(name)[lo:hi], index=self.dates[lo:hi], columns=self.tickers, copy=False)
+
+    def covers(self, tickers: Iterable[str], start, end=None) -> bool:
+        """
+        True if this version holds the tickers over [start, end)
+
+        An open-ended (or future) end requires the latest completed bar.
+        """
+        if len(self.dates) == 0 or not set(tickers) <= set(self.tickers):
+            return False
+        if self.dates[0] > pd.Timestamp(start):
+            return False
+        latest = pd.Timestamp(latest_bar_date())
+        if end is None or pd.Timestamp(end) > latest:
+            return self.bar >= latest_bar_date()
+        return self.dates[-1] >= pd.Timestamp(end) - timedelta(days=4)
+
+
+def publish_matrices(closes: pd.DataFrame, opens: pd.DataFrame = None,
+                     indicators: Dict[str, Iterable[int]] = None,
+                     store_dir: str = None, keep_versions=3,
+                     highs: pd.DataFrame = None, lows: pd.DataFrame = None) -> str:
+    """
+    Write a new version and make it current
+
+    Args:
+        closes: Raw close panel [dates x tickers]
+        opens: Raw open panel (aligned to closes)
+        highs, lows: Raw high/low panels (aligned to closes) for the true-range ATR
+        indicators: {'ema': [spans], 'vol': [lookbacks], 'atr': [periods]}
+        store_dir: Store location
+        keep_versions: Old version directories to keep
+
+    Returns:
+        Published version string
+    """
+    from aligned_panel import session_index
+
+    store_dir = store_dir or PRICE_MATRIX_DIR
+    # Completed bars only: a partial intraday bar would be published as the
+    # latest bar and never replaced (builds skip once on that bar)
+    closes = closes.sort_index().loc[:latest_bar_date()]
+    # Exchange sessions only: a 7-day (crypto) bar on a weekend would add a
+    # zero-return row to every ETF's vol/ATR/EMA
+    closes = closes.loc[closes.index.isin(session_index(closes.index[0], closes.index[-1] + timedelta(days=1)))]
+    closes = closes.dropna(how='all')
+    matrices = {'close': closes}
+    if opens is not None:
+        matrices['open'] = opens.reindex(index=closes.index, columns=closes.columns)
+    if highs is not None and lows is not None:
+        matrices['high'] = highs.reindex(index=closes.index, columns=closes.columns)
+        matrices['low'] = lows.reindex(index=closes.index, columns=closes.columns)
+    matrices.update(compute_indicators(closes, indicators, matrices.get('high'), matrices.get('low')))
+
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(closes.index.values).tobytes())
+    digest.update(','.join(closes.columns).encode())
+    for name in sorted(matrices):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(matrices[name].to_numpy(dtype=np.float64)).tobytes())
+    bar = closes.index[-1].strftime('%Y-%m-%d')
+    version = f"{bar}-{digest.hexdigest()[:12]}"
+
+    version_dir = os.path.join(store_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    np.save(os.path.join(version_dir, 'dates.npy'), closes.index.values.astype('datetime64[ns]'))
+    for name, frame in matrices.items():
+        np.save(os.path.join(version_dir, f'{name}.npy'),
+                np.ascontiguousarray(frame.to_numpy(dtype=np.float64)))
+
+    manifest = {
+        'version': version,
+        'bar': bar,
+        'builtAt': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'tickers': list(closes.columns),
+        'dates': f'{version}/dates.npy',
+        'matrices': {name: f'{version}/{name}.npy' for name in matrices},
+    }
+    tmp_path = os.path.join(store_dir, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST))
+
+    _prune_versions(store_dir, keep=version, keep_versions=keep_versions)
+    return version
+
+
+def _prune_versions(store_dir: str, keep: str, keep_versions: int):
+    versions = sorted(d for d in os.listdir(store_dir)
+                      if os.path.isdir(os.path.join(store_dir, d)) and d != keep)
+    for old in versions[:max(0, len(versions) - (keep_versions - 1))]:
+        # Readers may still map old files; on Windows the delete fails until they let go
+        shutil.rmtree(os.path.join(store_dir, old), ignore_errors=True)
+
+
+def attach(store_dir: str = None) -> Optional[PriceMatrices]:
+    """
+    Current published version (None if nothing has been published)
+
+    Memoized per process until the manifest changes.
+    """
+    store_dir = store_dir or PRICE_MATRIX_DIR
+    path = os.path.join(store_dir, MANIFEST)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _attach_lock:
+        cached = _attached.get(store_dir)
+        if cached and cached[0] == key:
+            return cached[1]
+    try:
+        with open(path) as f:
+            matrices = PriceMatrices(store_dir, json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Price matrix store unreadable ({e}) - ignoring")
+        return None
+    with _attach_lock:
+        _attached[store_dir] = (key, matrices)
+    return matrices
+
+
+def latest_atr(tickers: Iterable[str], period: int = DEFAULT_ATR_PERIOD,
+               store_dir: str = None) -> Dict[str, float]:
+    """
+    Last published ATR per ticker ({} if the store is missing or not on the latest bar)
+    """
+    store = attach(store_dir)
+    name = f'atr_{period}'
+    if store is None or name not in store or store.bar < latest_bar_date():
+        return {}
+    atr = store.frame(name).ffill().iloc[-1]
+    return {t: float(atr[t]) for t in tickers if t in atr.index and pd.notna(atr[t])}
+
+
+def fetch_ohlc(tickers: list, start, end=None) -> Dict[str, pd.DataFrame]:
+    """
+    Raw close/open/high/low panels for all tickers in one Yahoo Finance request
+
+    The request stops at the latest completed bar, so a build during the
+    session never sees today's still-moving bar.
+    """
+    import yfinance as yf
+
+    cap = pd.Timestamp(latest_bar_date()) + timedelta(days=1)
+    end = cap if end is None else min(pd.Timestamp(end), cap)
+    data = yf.download(tickers, start=start, end=end, progress=False, auto_adjust=True)
+    if data.empty:
+        raise ValueError("No price data downloaded")
+    panels = {}
+    for field in ('Close', 'Open', 'High', 'Low'):
+        panel = data[field]
+        if isinstance(panel, pd.Series):
+            panel = panel.to_frame(tickers[0])
+        panel.index = pd.to_datetime(panel.index).tz_localize(None)
+        panels[field.lower()] = panel
+    # Tickers that failed stay as all-NaN columns (consumers drop them, as after a failed download)
+    closes = panels['close'].reindex(columns=sorted(tickers)).dropna(how='all')
+    return {name: panel.reindex(index=closes.index, columns=closes.columns)
+            for name, panel in panels.items()}
+
+
+def fetch_panels(tickers: list, start, end=None):
+    """Raw close/open panels for all tickers in one Yahoo Finance request"""
+    ohlc = fetch_ohlc(tickers, start, end)
+    return ohlc['close'], ohlc['open']
+
+
+def build_store(start=None, store_dir: str = None, force=False) -> Optional[str]:
+    """
+    Fetch the universe and publish a new version (skipped if already on the latest bar)
+
+    Returns:
+        Current version
+    """
+    current = attach(store_dir)
+    if current is not None and current.bar >= latest_bar_date() and not force:
+        print(f"  Price matrices already on bar {current.bar} ({current.version})")
+        return current.version
+
+    start = start or (datetime.now() - timedelta(days=365 * DEFAULT_HISTORY_YEARS)).strftime('%Y-%m-%d')
+    tickers = store_universe()
+    print(f"Fetching {len(tickers)} tickers from {start}...")
+    ohlc = quarantine(fetch_ohlc(tickers, start), label=f'store build from {start}')
+    closes = ohlc['close']
+    version = publish_matrices(closes, ohlc['open'], store_dir=store_dir, highs=ohlc['high'], lows=ohlc['low'])
+    print(f"✓ Published price matrices {version} ({len(closes)} days x {len(closes.columns)} tickers)")
+    return version
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build/inspect the shared price matrix store')
+    parser.add_argument('--build', action='store_true', help='Fetch prices and publish a new version')
+    parser.add_argument('--force', action='store_true', help='Publish even if already on the latest bar')
+    parser.add_argument('--start', help=f'History start (default {DEFAULT_HISTORY_YEARS} years back)')
+    parser.add_argument('--dir', default=PRICE_MATRIX_DIR, help='Store location')
+    parser.add_argument('--info', action='store_true', help='Show the current version')
+    args = parser.parse_args()
+
+    if args.build:
+        build_store(start=args.start, store_dir=args.dir, force=args.force)
+
+    store = attach(args.dir)
+    if store is None:
+        print("! No price matrices published yet (run with --build)")
+    elif args.info or not args.build:
+        print(f"Version:  {store.version}")
+        print(f"Bar:      {store.bar}")
+        print(f"Range:    {store.dates[0].date()} to {store.dates[-1].date()} ({len(store.dates)} rows)")
+        print(f"Tickers:  {len(store.tickers)}")
+        print(f"Matrices: {', '.join(store.names)}")
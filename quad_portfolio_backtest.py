@@ -33,25 +33,44 @@ Lag Structure (Prevents Forward-Looking Bias):
 - Exit rule: Immediate (no lag)
 """
 
+import os
 import numpy as np
 import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from config import QUAD_ALLOCATIONS, QUADRANT_DESCRIPTIONS
+from regime_history import rank_quads
+from signal_kernel import target_weight_matrix
+from aligned_panel import build_panel
+from data_validation import quarantine
+from universe import UNIVERSE
 
 # Backtest leverage controls
 BASE_QUAD_LEVERAGE = 1.5       # 1.5x exposure for all quads
 Q1_LEVERAGE_MULTIPLIER = 1.0   # Q1 gets same as base (1.5x) - no extra boost
 
+# Trading cost per leg (10 basis points = 0.10%)
+COST_PER_LEG_BPS = 10
+
+# Minimum trade size threshold (only trade if delta > this %)
+MIN_TRADE_THRESHOLD = 0.05
+
+# Daily simulation engines (identical output; see backtest_loop.py).
+# BACKTEST_ENGINE selects the default for every caller, e.g. BACKTEST_ENGINE=numba
+BACKTEST_ENGINES = ('reference', 'python', 'numba')
+DEFAULT_BACKTEST_ENGINE = os.environ.get('BACKTEST_ENGINE', 'reference')
+
 # Manual overrides for assets that must be fetched even if not in current
 # allocation map (keeps backtests aligned with latest production universe).
 ADDITIONAL_BACKTEST_TICKERS = ['LIT', 'AA', 'PALL', 'VALT']
 
+
 class QuadrantPortfolioBacktest:
     def __init__(self, start_date, end_date, initial_capital=50000, 
                  momentum_days=50, ema_period=50, vol_lookback=30, max_positions=None,
-                 atr_stop_loss=None, atr_period=14):
+                 atr_stop_loss=None, atr_period=14, min_trade_threshold=MIN_TRADE_THRESHOLD,
+                 engine=DEFAULT_BACKTEST_ENGINE):
+        if engine not in BACKTEST_ENGINES:
+            raise ValueError(f"Unknown engine '{engine}' (choose from {', '.join(BACKTEST_ENGINES)})")
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
@@ -61,75 +80,142 @@ class QuadrantPortfolioBacktest:
         self.max_positions = max_positions  # If set, only trade top N positions
         self.atr_stop_loss = atr_stop_loss  # ATR multiplier for stop loss (None = no stops)
         self.atr_period = atr_period  # ATR lookback period (default 14)
+        self.min_trade_threshold = min_trade_threshold  # Skip rebalances smaller than this weight delta
+        self.engine = engine  # Daily simulation: 'reference' (pandas), 'python' or 'numba' (typed arrays)
         
         self.price_data = None
         self.open_data = None
+        self.high_data = None
+        self.low_data = None
+        self.valid_data = None  # True where a ticker had a real bar on the session
         self.atr_data = None
+        self.price_store = None  # Shared price matrices, when fetch_data used them
         self.ema_data = None
         self.volatility_data = None
         self.portfolio_value = None
         self.quad_history = None
+        self.target_weights = None
     
-    def fetch_data(self):
-        """Download price data for all tickers (Close for signals, Open for execution)"""
+    def _load_from_price_store(self, all_tickers, fetch_start):
+        """
+        Close/Open/High/Low series from the shared price matrix store (price_matrix_store.py)
+
+        Returns empty dicts when no published version covers the tickers and
+        period, in which case fetch_data downloads as usual. High/Low are
+        empty for versions published without them.
+        """
+        from price_matrix_store import attach
+
+        store = attach()
+        if store is None or not store.covers(all_tickers, fetch_start, self.end_date):
+            return {}, {}, {}, {}
+
+        closes = store.frame('close', fetch_start, self.end_date)[all_tickers].dropna(how='all')
+        opens = store.frame('open', fetch_start, self.end_date)[all_tickers]
+        has_ranges = 'high' in store and 'low' in store
+        if has_ranges:
+            highs = store.frame('high', fetch_start, self.end_date)[all_tickers]
+            lows = store.frame('low', fetch_start, self.end_date)[all_tickers]
+        price_data, open_data, high_data, low_data = {}, {}, {}, {}
+        for ticker in all_tickers:
+            # Same per-ticker series (and >100 bar rule) as a download
+            prices = closes[ticker].dropna()
+            if len(prices) > 100:
+                price_data[ticker] = prices
+                open_data[ticker] = opens[ticker].reindex(prices.index)
+                if has_ranges:
+                    high_data[ticker] = highs[ticker].reindex(prices.index)
+                    low_data[ticker] = lows[ticker].reindex(prices.index)
+        self.price_store = store
+        print(f"✓ Loaded {len(price_data)} tickers from price matrix store {store.version}")
+        return price_data, open_data, high_data, low_data
+
+    def fetch_window(self):
+        """(tickers, first date) fetch_data loads"""
         all_tickers = []
         for quad_assets in QUAD_ALLOCATIONS.values():
             all_tickers.extend(quad_assets.keys())
         all_tickers.extend(ADDITIONAL_BACKTEST_TICKERS)
         all_tickers = sorted(set(all_tickers))
         
-        print(f"Fetching data for {len(all_tickers)} tickers...")
-        
         # Add buffer for momentum calculation
         buffer_days = max(self.momentum_days, self.ema_period, self.vol_lookback) + 10
         fetch_start = pd.to_datetime(self.start_date) - timedelta(days=buffer_days)
+        return all_tickers, fetch_start
+    
+    def fetch_data(self):
+        """Download price data for all tickers (Close for signals, Open for execution)"""
+        all_tickers, fetch_start = self.fetch_window()
+        
+        print(f"Fetching data for {len(all_tickers)} tickers...")
         
         print(f"Period: {fetch_start.date()} to {self.end_date}")
         
-        price_data = {}
-        open_data = {}
-        for ticker in all_tickers:
-            try:
-                data = yf.download(ticker, start=fetch_start, end=self.end_date, 
-                                 progress=False, auto_adjust=True)
+        self.price_store = None
+        price_data, open_data, high_data, low_data = self._load_from_price_store(all_tickers, fetch_start)
+        if not price_data:
+            import yfinance as yf
+
+            for ticker in all_tickers:
+                try:
+                    data = yf.download(ticker, start=fetch_start, end=self.end_date, 
+                                     progress=False, auto_adjust=True)
                 
-                # Extract Close prices (for signals, momentum, EMA)
-                if isinstance(data.columns, pd.MultiIndex):
-                    if 'Close' in data.columns.get_level_values(0):
-                        prices = data['Close']
-                    if 'Open' in data.columns.get_level_values(0):
-                        opens = data['Open']
-                else:
-                    if 'Close' in data.columns:
-                        prices = data['Close']
-                    else:
-                        continue
-                    if 'Open' in data.columns:
-                        opens = data['Open']
+                    # Extract Close prices (for signals, momentum, EMA)
+                    if isinstance(data.columns, pd.MultiIndex):
+                        if 'Close' in data.columns.get_level_values(0):
+                            prices = data['Close']
+                        if 'Open' in data.columns.get_level_values(0):
+                            opens = data['Open']
                     else:
-                        continue
+                        if 'Close' in data.columns:
+                            prices = data['Close']
+                        else:
+                            continue
+                        if 'Open' in data.columns:
+                            opens = data['Open']
+                        else:
+                            continue
                 
-                if isinstance(prices, pd.DataFrame):
-                    prices = prices.iloc[:, 0]
-                if isinstance(opens, pd.DataFrame):
-                    opens = opens.iloc[:, 0]
+                    if isinstance(prices, pd.DataFrame):
+                        prices = prices.iloc[:, 0]
+                    if isinstance(opens, pd.DataFrame):
+                        opens = opens.iloc[:, 0]
+                    
+                    # High/Low (for the true-range ATR)
+                    highs, lows = data.get('High'), data.get('Low')
+                    if isinstance(highs, pd.DataFrame):
+                        highs = highs.iloc[:, 0]
+                    if isinstance(lows, pd.DataFrame):
+                        lows = lows.iloc[:, 0]
                 
-                if len(prices) > 100 and len(opens) > 100:
-                    price_data[ticker] = prices
-                    open_data[ticker] = opens
-                    print(f"+ {ticker}: {len(prices)} days")
+                    if len(prices) > 100 and len(opens) > 100:
+                        price_data[ticker] = prices
+                        open_data[ticker] = opens
+                        if highs is not None and lows is not None:
+                            high_data[ticker] = highs
+                            low_data[ticker] = lows
+                        print(f"+ {ticker}: {len(prices)} days")
                     
-            except Exception as e:
-                print(f"- {ticker}: {e}")
-                continue
-        
-        self.price_data = pd.DataFrame(price_data)
-        self.price_data = self.price_data.ffill().bfill()
-        
-        self.open_data = pd.DataFrame(open_data)
-        self.open_data = self.open_data.ffill().bfill()
+                except Exception as e:
+                    print(f"- {ticker}: {e}")
+                    continue
         
-        print(f"\nLoaded {len(self.price_data.columns)} tickers, {len(self.price_data)} days")
+        bars = {'close': price_data, 'open': open_data, 'high': high_data, 'low': low_data}
+        if self.price_store is None:
+            # Downloaded bars: quarantine bad prints/stale runs (the store is validated at publish)
+            bars = quarantine(bars, label='backtest download')
+
+        # One pass onto the NYSE sessions: closes carried forward (never back-filled),
+        # opens flat where a ticker has no bar, raw High/Low (no bar = no true range)
+        panel = build_panel(bars, fetch_start, self.end_date)
+        self.price_data = panel.frame('close')
+        self.open_data = panel.frame('open')
+        self.high_data = panel.frame('high') if 'high' in panel else None
+        self.low_data = panel.frame('low') if 'low' in panel else None
+        self.valid_data = panel.valid_frame()
+        
+        print(f"\nLoaded {len(self.price_data.columns)} tickers, {len(self.price_data)} sessions")
         print(f"  Close prices: for signals/momentum/EMA")
         print(f"  Open prices: for realistic execution (next-day open)")
         
@@ -144,10 +230,26 @@ class QuadrantPortfolioBacktest:
         
         # Calculate ATR if stop loss is enabled
         if self.atr_stop_loss is not None:
-            print(f"Calculating {self.atr_period}-day ATR for stop loss (multiplier: {self.atr_stop_loss}x)...")
-            # Simplified ATR using daily returns volatility
-            daily_returns = self.price_data.pct_change().abs()
-            self.atr_data = daily_returns.rolling(window=self.atr_period).mean() * self.price_data
+            self.atr_data = self._stored_atr()
+            if self.atr_data is not None:
+                print(f"Using {self.atr_period}-day Wilder ATR from price matrix store (multiplier: {self.atr_stop_loss}x)")
+            else:
+                print(f"Calculating {self.atr_period}-day Wilder ATR for stop loss (multiplier: {self.atr_stop_loss}x)...")
+                from price_matrix_store import wilder_atr
+                self.atr_data = wilder_atr(self.price_data, self.atr_period, self.high_data, self.low_data)
+    
+    def _stored_atr(self):
+        """
+        True-range ATR published with the price matrices, aligned to price_data
+        
+        None unless fetch_data loaded from a store version that has High/Low
+        (and so a Wilder ATR of the true range) for this period.
+        """
+        store = self.price_store
+        name = f'atr_{self.atr_period}'
+        if store is None or 'high' not in store or name not in store:
+            return None
+        return store.frame(name)[list(self.price_data.columns)].reindex(self.price_data.index)
     
     def calculate_quad_scores(self):
         """Calculate momentum scores for each quadrant"""
@@ -159,8 +261,8 @@ class QuadrantPortfolioBacktest:
         # Score each quadrant by average momentum of its assets
         quad_scores = pd.DataFrame(index=momentum.index)
         
-        for quad, assets in QUAD_ALLOCATIONS.items():
-            quad_tickers = [t for t in assets.keys() if t in momentum.columns]
+        for quad in UNIVERSE.quads:
+            quad_tickers = [t for t in UNIVERSE.quad_tickers(quad) if t in momentum.columns]
             if quad_tickers:
                 quad_scores[quad] = momentum[quad_tickers].mean(axis=1)
         
@@ -168,101 +270,27 @@ class QuadrantPortfolioBacktest:
     
     def determine_top_quads(self, quad_scores):
         """Determine top 2 quadrants for each day"""
-        top_quads = pd.DataFrame(index=quad_scores.index)
-        
-        for date in quad_scores.index:
-            scores = quad_scores.loc[date].sort_values(ascending=False)
-            top_quads.loc[date, 'Top1'] = scores.index[0]
-            top_quads.loc[date, 'Top2'] = scores.index[1]
-            top_quads.loc[date, 'Score1'] = scores.iloc[0]
-            top_quads.loc[date, 'Score2'] = scores.iloc[1]
-        
-        return top_quads
+        return rank_quads(quad_scores)
     
     def calculate_target_weights(self, top_quads):
-        """Calculate target portfolio weights with volatility chasing"""
-        weights = pd.DataFrame(0.0, index=top_quads.index, 
-                              columns=self.price_data.columns)
-        
-        for date in top_quads.index:
-            top1 = top_quads.loc[date, 'Top1']
-            top2 = top_quads.loc[date, 'Top2']
-            score1 = top_quads.loc[date, 'Score1']
-            score2 = top_quads.loc[date, 'Score2']
-            
-            # Process each quad separately with volatility weighting
-            final_weights = {}
-            
-            # UNIFORM LEVERAGE: 1.5x base exposure for all quads
-            for quad in (top1, top2):
-                quad_weight = BASE_QUAD_LEVERAGE
-                if quad == 'Q1':
-                    quad_weight *= Q1_LEVERAGE_MULTIPLIER
-                    
-                # Get tickers for this quad
-                quad_tickers = [t for t in QUAD_ALLOCATIONS[quad].keys() 
-                              if t in self.price_data.columns]
-                
-                if not quad_tickers:
-                    continue
-                
-                # Get volatilities for this date
-                quad_vols = {}
-                for ticker in quad_tickers:
-                    if ticker in self.volatility_data.columns and date in self.volatility_data.index:
-                        vol = self.volatility_data.loc[date, ticker]
-                        if pd.notna(vol) and vol > 0:
-                            quad_vols[ticker] = vol
-                
-                if not quad_vols:
-                    continue
-                
-                # Calculate DIRECT volatility weights (higher vol = higher weight / volatility chasing)
-                direct_vols = {t: v for t, v in quad_vols.items()}
-                total_vol = sum(direct_vols.values())
-                
-                # Normalize to quad_weight (Q1=3x, others=2x)
-                vol_weights = {t: (v / total_vol) * quad_weight 
-                             for t, v in direct_vols.items()}
-                
-                # Apply EMA filter - assets below EMA get zero weight (held as cash)
-                for ticker, weight in vol_weights.items():
-                    if ticker in self.ema_data.columns and date in self.price_data.index:
-                        price = self.price_data.loc[date, ticker]
-                        ema = self.ema_data.loc[date, ticker]
-                        
-                        if pd.notna(price) and pd.notna(ema) and price > ema:
-                            # Pass EMA filter: add to final weights
-                            if ticker in final_weights:
-                                final_weights[ticker] += weight
-                            else:
-                                final_weights[ticker] = weight
-            
-            # Filter to top N positions if max_positions is set
-            if self.max_positions and len(final_weights) > self.max_positions:
-                # Sort by weight and keep top N
-                sorted_weights = sorted(final_weights.items(), key=lambda x: x[1], reverse=True)
-                top_n_weights = dict(sorted_weights[:self.max_positions])
-                
-                # Re-normalize to maintain total leverage
-                original_total = sum(final_weights.values())
-                new_total = sum(top_n_weights.values())
-                scale_factor = original_total / new_total if new_total > 0 else 1
-                
-                final_weights = {t: w * scale_factor for t, w in top_n_weights.items()}
-            
-            # Apply final weights to the weights DataFrame
-            for ticker, weight in final_weights.items():
-                weights.loc[date, ticker] = weight
-        
-        return weights
+        """Calculate target portfolio weights with volatility chasing (signal_kernel, all dates at once)"""
+        # UNIFORM LEVERAGE: 1.5x base exposure for all quads
+        quad_leverage = {q: BASE_QUAD_LEVERAGE * (Q1_LEVERAGE_MULTIPLIER if q == 'Q1' else 1.0)
+                         for q in QUAD_ALLOCATIONS}
+        return target_weight_matrix(self.price_data.reindex(top_quads.index), self.volatility_data,
+                                    self.ema_data, top_quads['Top1'], top_quads['Top2'],
+                                    quad_leverage, self.max_positions)
     
-    def run_backtest(self):
-        """Run the complete backtest with TRUE 1-day entry confirmation"""
-        print("=" * 70)
-        print("QUADRANT PORTFOLIO BACKTEST - PRODUCTION VERSION")
-        print("=" * 70)
+    def prepare_signals(self):
+        """
+        Fetch data and compute the daily top quads and target weights
+        
+        Sets quad_history and target_weights (everything the daily
+        simulation reads besides the price/indicator matrices).
         
+        Returns:
+            Target weights DataFrame [dates x tickers]
+        """
         # Fetch data
         self.fetch_data()
         
@@ -282,6 +310,16 @@ class QuadrantPortfolioBacktest:
         print("Calculating target portfolio weights...")
         target_weights = self.calculate_target_weights(top_quads)
         self.target_weights = target_weights  # Store for access
+        return target_weights
+    
+    def run_backtest(self):
+        """Run the complete backtest with TRUE 1-day entry confirmation"""
+        print("=" * 70)
+        print("QUADRANT PORTFOLIO BACKTEST - PRODUCTION VERSION")
+        print("=" * 70)
+        
+        target_weights = self.prepare_signals()
+        top_quads = self.quad_history
         
         # Simulate portfolio with EVENT-DRIVEN rebalancing + TRUE 1-DAY ENTRY LAG
         print("Simulating portfolio with TRUE 1-day entry confirmation + REALISTIC EXECUTION...")
@@ -291,7 +329,41 @@ class QuadrantPortfolioBacktest:
         print("  Exit rule: Immediate (no lag)")
         print("  P&L: Overnight at OLD positions, Intraday at NEW positions")
         
-        portfolio_value = pd.Series(self.initial_capital, index=target_weights.index)
+        if self.engine == 'reference':
+            stats = self._simulate_reference(target_weights, top_quads)
+        else:
+            stats = self._simulate_arrays(target_weights, top_quads)
+        
+        print(f"  Total rebalances: {stats['rebalances']} (out of {len(target_weights)-1} days)")
+        print(f"  Entries confirmed: {stats['entries_confirmed']}")
+        print(f"  Entries rejected: {stats['entries_rejected']}")
+        print(f"  Rejection rate: {stats['entries_rejected'] / (stats['entries_confirmed'] + stats['entries_rejected']) * 100:.1f}%")
+        print(f"  Trades skipped (< {self.min_trade_threshold * 100:g}% delta): {stats['trades_skipped']}")
+        if self.atr_stop_loss is not None:
+            print(f"  Stop losses hit: {stats['stops_hit']}")
+        print(f"  Trading costs: ${self.total_trading_costs:,.2f} ({self.total_trading_costs / self.initial_capital * 100:.2f}% of initial capital)")
+        
+        # Generate results
+        results = self.generate_results()
+        
+        print("\n" + "=" * 70)
+        print("BACKTEST COMPLETE")
+        print("=" * 70)
+        
+        return results
+    
+    def _simulate_reference(self, target_weights, top_quads):
+        """
+        Daily simulation over pandas objects (the reference engine)
+        
+        Sets portfolio_value, total_trading_costs, entry_prices, entry_dates
+        and entry_atrs.
+        
+        Returns:
+            Dict of rebalances, entries_confirmed, entries_rejected,
+            trades_skipped, stops_hit
+        """
+        portfolio_value = pd.Series(float(self.initial_capital), index=target_weights.index)
         actual_positions = pd.Series(0.0, index=target_weights.columns)  # Current holdings
         prev_positions = pd.Series(0.0, index=target_weights.columns)  # Track previous positions for cost calculation
         pending_entries = {}  # {ticker: target_weight} - waiting for confirmation
@@ -308,13 +380,6 @@ class QuadrantPortfolioBacktest:
         stops_hit = 0  # Track stop losses
         total_costs = 0.0  # Track cumulative trading costs
         
-        
-        # Trading cost per leg (10 basis points = 0.10%)
-        COST_PER_LEG_BPS = 10  # 10 basis points = 0.0010
-        
-        # Minimum trade size threshold (only trade if delta > this %)
-        MIN_TRADE_THRESHOLD = 0.05  # 5% minimum trade size
-        
         for i in range(1, len(target_weights)):
             date = target_weights.index[i]
             prev_date = target_weights.index[i-1]
@@ -420,14 +485,6 @@ class QuadrantPortfolioBacktest:
                         current_set = set(current_top_quads)
                         quads_that_stayed = prev_set & current_set  # Intersection
                     
-                    # Build reverse mapping: ticker -> quads it belongs to
-                    ticker_to_quads = {}
-                    for quad, allocations in QUAD_ALLOCATIONS.items():
-                        for ticker in allocations.keys():
-                            if ticker not in ticker_to_quads:
-                                ticker_to_quads[ticker] = []
-                            ticker_to_quads[ticker].append(quad)
-                    
                     # First, apply confirmed entries
                     for ticker, weight in confirmed_entries.items():
                         actual_positions[ticker] = weight
@@ -448,8 +505,8 @@ class QuadrantPortfolioBacktest:
                         
                         # Check if this ticker belongs to a quad that stayed in top 2
                         ticker_in_stable_quad = False
-                        if ticker in ticker_to_quads and len(quads_that_stayed) > 0:
-                            for quad in ticker_to_quads[ticker]:
+                        if len(quads_that_stayed) > 0:
+                            for quad in UNIVERSE.quads_of(ticker):
                                 if quad in quads_that_stayed:
                                     ticker_in_stable_quad = True
                                     break
@@ -473,7 +530,7 @@ class QuadrantPortfolioBacktest:
                             if ticker_in_stable_quad:
                                 # Ticker is in a quad that stayed in top 2 - DON'T rebalance
                                 trades_skipped += 1
-                            elif position_delta > MIN_TRADE_THRESHOLD:
+                            elif position_delta > self.min_trade_threshold:
                                 # Not in stable quad + delta exceeds threshold - rebalance
                                 actual_positions[ticker] = target_weight
                             else:
@@ -549,45 +606,34 @@ class QuadrantPortfolioBacktest:
         self.entry_dates = entry_dates    # Current open positions entry dates
         self.entry_atrs = entry_atrs      # Current open positions entry ATRs
         
-        print(f"  Total rebalances: {rebalance_count} (out of {len(target_weights)-1} days)")
-        print(f"  Entries confirmed: {entries_confirmed}")
-        print(f"  Entries rejected: {entries_rejected}")
-        print(f"  Rejection rate: {entries_rejected / (entries_confirmed + entries_rejected) * 100:.1f}%")
-        print(f"  Trades skipped (< 5% delta): {trades_skipped}")
-        if self.atr_stop_loss is not None:
-            print(f"  Stop losses hit: {stops_hit}")
-        print(f"  Trading costs: ${total_costs:,.2f} ({total_costs / self.initial_capital * 100:.2f}% of initial capital)")
-        
-        # Generate results
-        results = self.generate_results()
-        
-        print("\n" + "=" * 70)
-        print("BACKTEST COMPLETE")
-        print("=" * 70)
-        
-        return results
+        return {'rebalances': rebalance_count, 'entries_confirmed': entries_confirmed,
+                'entries_rejected': entries_rejected, 'trades_skipped': trades_skipped,
+                'stops_hit': stops_hit}
+    
+    def _simulate_arrays(self, target_weights, top_quads):
+        """
+        Daily simulation over typed arrays (backtest_loop.py)
+        
+        Same state machine and outputs as _simulate_reference(); the loop is
+        compiled with Numba for engine='numba' when it is installed.
+        """
+        from backtest_loop import simulate, simulation_inputs
+        
+        inputs = simulation_inputs(self, target_weights, top_quads)
+        out = simulate(inputs, compiled=self.engine == 'numba')
+        
+        dates, columns = target_weights.index, target_weights.columns
+        self.portfolio_value = pd.Series(out['equity'], index=dates)
+        self.total_trading_costs = out['total_costs']
+        held = np.flatnonzero(out['entry_index'] >= 0)
+        self.entry_prices = {columns[j]: out['entry_prices'][j] for j in held}
+        self.entry_dates = {columns[j]: dates[out['entry_index'][j]] for j in held}
+        self.entry_atrs = {columns[j]: out['entry_atrs'][j] for j in held if inputs['has_atr'][j]}
+        return out['stats']
     
     def generate_results(self):
         """Calculate performance metrics"""
-        total_return = (self.portfolio_value.iloc[-1] / self.initial_capital - 1) * 100
-        
-        daily_returns = self.portfolio_value.pct_change().dropna()
-        annual_return = ((1 + daily_returns.mean()) ** 252 - 1) * 100
-        annual_vol = daily_returns.std() * np.sqrt(252) * 100
-        sharpe = annual_return / annual_vol if annual_vol > 0 else 0
-        
-        cummax = self.portfolio_value.expanding().max()
-        drawdown = (self.portfolio_value - cummax) / cummax * 100
-        max_drawdown = drawdown.min()
-        
-        return {
-            'total_return': total_return,
-            'annual_return': annual_return,
-            'annual_vol': annual_vol,
-            'sharpe': sharpe,
-            'max_drawdown': max_drawdown,
-            'final_value': self.portfolio_value.iloc[-1]
-        }
+        return performance_metrics(self.portfolio_value, self.initial_capital)
     
     def print_annual_breakdown(self):
         """Print annual performance breakdown"""
@@ -621,6 +667,8 @@ class QuadrantPortfolioBacktest:
     
     def print_spy_comparison(self):
         """Compare strategy to SPY buy-and-hold"""
+        import yfinance as yf
+
         # Download SPY data with a buffer
         spy_start = self.portfolio_value.index[0] - timedelta(days=5)
         spy_end = self.portfolio_value.index[-1] + timedelta(days=1)
@@ -676,6 +724,8 @@ class QuadrantPortfolioBacktest:
     
     def plot_results(self):
         """Plot portfolio performance"""
+        import matplotlib.pyplot as plt
+
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
         
         # Portfolio value
@@ -706,6 +756,29 @@ class QuadrantPortfolioBacktest:
         print("=" * 70)
 
 
+def performance_metrics(portfolio_value, initial_capital):
+    """Return/risk metrics of an equity curve"""
+    total_return = (portfolio_value.iloc[-1] / initial_capital - 1) * 100
+    
+    daily_returns = portfolio_value.pct_change().dropna()
+    annual_return = ((1 + daily_returns.mean()) ** 252 - 1) * 100
+    annual_vol = daily_returns.std() * np.sqrt(252) * 100
+    sharpe = annual_return / annual_vol if annual_vol > 0 else 0
+    
+    cummax = portfolio_value.expanding().max()
+    drawdown = (portfolio_value - cummax) / cummax * 100
+    max_drawdown = drawdown.min()
+    
+    return {
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'annual_vol': annual_vol,
+        'sharpe': sharpe,
+        'max_drawdown': max_drawdown,
+        'final_value': portfolio_value.iloc[-1]
+    }
+
+
 if __name__ == "__main__":
     # Configuration
     INITIAL_CAPITAL = 50000
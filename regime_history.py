@@ -0,0 +1,186 @@
+"""
+Regime History Table
+====================
+
+Persisted per-day quadrant regime history, shared by the dashboard,
+scripts/generate_history.py and the web signals/regime snapshot.
+
+Columns (indexed by Date):
+- Q1_Score..Q4_Score: quadrant momentum scores (%, mean momentum of each
+  quad's assets in QUAD_ALLOCATIONS - same scoring as the backtest)
+- Top1, Top2, Score1, Score2: top two quadrants and their scores
+- DaysInRegime: consecutive days Top1 has been the primary quadrant
+- RegimeStart: first day of the current Top1 run
+
+The table is stored as CSV in apps/web/data and updated incrementally:
+only closes for the days after the last stored row (plus the momentum
+lookback) are loaded, from the same session-aligned panel as the backtest
+(no back-filled prices before a ticker's first bar).
+
+Usage:
+    python regime_history.py              # Update with the latest bars
+    python regime_history.py --rebuild    # Recompute from --start
+"""
+
+import os
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config import QUAD_ALLOCATIONS
+
+REGIME_HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'apps', 'web', 'data', 'regime_history.csv')
+QUADS = ['Q1', 'Q2', 'Q3', 'Q4']
+SCORE_COLUMNS = [f'{q}_Score' for q in QUADS]
+DEFAULT_START = '2018-01-01'
+
+
+def calculate_quad_scores(price_data: pd.DataFrame, momentum_days=20) -> pd.DataFrame:
+    """Average momentum of each quadrant's assets (decimal returns)"""
+    momentum = price_data.pct_change(momentum_days)
+
+    quad_scores = pd.DataFrame(index=momentum.index)
+    for quad, assets in QUAD_ALLOCATIONS.items():
+        quad_tickers = [t for t in assets.keys() if t in momentum.columns]
+        if quad_tickers:
+            quad_scores[quad] = momentum[quad_tickers].mean(axis=1)
+
+    return quad_scores
+
+
+def rank_quads(quad_scores: pd.DataFrame) -> pd.DataFrame:
+    """
+    Top 2 quadrants per day (vectorized)
+
+    Same result as a per-row sort_values(ascending=False) with NaN scores
+    ranked last; exact ties (where that sort's order is unspecified) rank
+    in column order.
+
+    Returns:
+        DataFrame with Top1, Top2, Score1, Score2
+    """
+    values = quad_scores.to_numpy(dtype=float)
+    order = np.argsort(-values, axis=1, kind='stable')
+    names = np.asarray(quad_scores.columns, dtype=object)
+    rows = np.arange(len(values))
+
+    return pd.DataFrame({
+        'Top1': names[order[:, 0]],
+        'Top2': names[order[:, 1]],
+        'Score1': values[rows, order[:, 0]],
+        'Score2': values[rows, order[:, 1]],
+    }, index=quad_scores.index)
+
+
+def add_regime_runs(table: pd.DataFrame) -> pd.DataFrame:
+    """Add DaysInRegime and RegimeStart from the Top1 column"""
+    top1 = table['Top1']
+    run_id = (top1 != top1.shift()).cumsum()
+    table['DaysInRegime'] = top1.groupby(run_id).cumcount() + 1
+    starts = pd.Series(table.index, index=table.index).groupby(run_id).transform('first')
+    table['RegimeStart'] = starts.values
+    return table
+
+
+def build_regime_table(quad_scores: pd.DataFrame) -> pd.DataFrame:
+    """Regime table from decimal quad scores (rows without any score are dropped)"""
+    quad_scores = quad_scores.reindex(columns=QUADS).dropna(how='all') * 100
+    table = quad_scores.rename(columns=dict(zip(QUADS, SCORE_COLUMNS)))
+    table = table.join(rank_quads(quad_scores))
+    table.index.name = 'Date'
+    return add_regime_runs(table)
+
+
+def fetch_quad_closes(start, end=None) -> pd.DataFrame:
+    """
+    Session-aligned closes for all QUAD_ALLOCATIONS tickers
+
+    Same panel as the backtest (aligned_panel.load_panel: price matrix store
+    or one download): closes carried forward, NaN before a ticker's first bar.
+    """
+    from aligned_panel import load_panel
+
+    tickers = sorted({t for assets in QUAD_ALLOCATIONS.values() for t in assets})
+    closes = load_panel(tickers, start, end, fields=('close',)).frame('close')
+    return closes.dropna(axis=1, how='all')
+
+
+def load_regime_history(path: str = REGIME_HISTORY_FILE) -> Optional[pd.DataFrame]:
+    """Load the persisted table (None if it has not been built)"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, index_col='Date', parse_dates=['Date', 'RegimeStart'])
+
+
+def save_regime_history(table: pd.DataFrame, path: str = REGIME_HISTORY_FILE):
+    """Write the table atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    table.to_csv(tmp_path, date_format='%Y-%m-%d', float_format='%.6f')
+    os.replace(tmp_path, path)
+
+
+def update_regime_history(path: str = REGIME_HISTORY_FILE, momentum_days=20,
+                          start: str = DEFAULT_START, rebuild=False) -> pd.DataFrame:
+    """
+    Append rows for bars after the last stored date
+
+    Args:
+        path: Table location
+        momentum_days: Momentum lookback used for scoring
+        start: First date when building from scratch
+        rebuild: Ignore the stored table and recompute everything
+
+    Returns:
+        Updated table
+    """
+    existing = None if rebuild else load_regime_history(path)
+
+    if existing is None or existing.empty:
+        print(f"Building regime history from {start}...")
+        fetch_start = pd.Timestamp(start) - timedelta(days=momentum_days * 2 + 10)
+        scores = calculate_quad_scores(fetch_quad_closes(fetch_start), momentum_days)
+        table = build_regime_table(scores.loc[scores.index >= pd.Timestamp(start)])
+        if table.empty:
+            raise ValueError("No price data downloaded - regime history not written")
+    else:
+        last_date = existing.index[-1]
+        # Enough calendar days to cover the momentum lookback before the first new bar
+        fetch_start = last_date - timedelta(days=momentum_days * 2 + 10)
+        scores = calculate_quad_scores(fetch_quad_closes(fetch_start), momentum_days)
+        new_scores = scores.loc[scores.index > last_date].reindex(columns=QUADS).dropna(how='all')
+
+        if new_scores.empty:
+            print(f"Regime history already up to date ({last_date.date()})")
+            return existing
+
+        new_scores = new_scores * 100
+        new_rows = new_scores.rename(columns=dict(zip(QUADS, SCORE_COLUMNS)))
+        new_rows = new_rows.join(rank_quads(new_scores))
+        table = pd.concat([existing.drop(columns=['DaysInRegime', 'RegimeStart']), new_rows])
+        table.index.name = 'Date'
+        table = add_regime_runs(table)
+        print(f"+ Added {len(new_rows)} bars ({new_rows.index[0].date()} to {new_rows.index[-1].date()})")
+
+    save_regime_history(table, path)
+    latest = table.iloc[-1]
+    print(f"✓ Regime history: {len(table)} days, current {latest['Top1']} + {latest['Top2']} "
+          f"({int(latest['DaysInRegime'])} days)")
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build/update the persisted regime history table')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute from --start')
+    parser.add_argument('--start', default=DEFAULT_START, help=f'Start date for rebuilds (default {DEFAULT_START})')
+    parser.add_argument('--momentum-days', type=int, default=20, help='Momentum lookback (default 20)')
+    parser.add_argument('--path', default=REGIME_HISTORY_FILE, help='Table location')
+    args = parser.parse_args()
+
+    update_regime_history(args.path, momentum_days=args.momentum_days,
+                          start=args.start, rebuild=args.rebuild)
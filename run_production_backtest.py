@@ -5,6 +5,7 @@ Run Production v3.0 Backtest - Top 10 + ATR 2.0x
 import json
 from pathlib import Path
 from quad_portfolio_backtest import QuadrantPortfolioBacktest
+from backtest_store import run_cached, run_key
 from datetime import datetime, timedelta
 
 # Setup
@@ -35,7 +36,11 @@ backtest = QuadrantPortfolioBacktest(
     atr_period=14
 )
 
-results = backtest.run_backtest()
+# Reuses a stored run of the same configuration/data/code (backtest_store.py)
+results = run_cached(backtest)
+
+# The store entry is the saved run (scripts/generate_history.py --key, build_snapshots.py)
+print(f"Backtest store key: {run_key(backtest)}")
 
 # Print summary
 print("\n" + "="*70)
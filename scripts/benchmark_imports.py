@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Import-Time Benchmark
+=====================
+
+Measures cold import time of the web API handlers and the strategy/broker
+modules, each in a fresh interpreter (what a serverless cold start or a CLI
+run pays). Each module is timed twice:
+
+- lazy:   import the module as it is now
+- eager:  import the heavy dependencies it defers (yfinance, matplotlib,
+          ib_insync) first, i.e. what the old top-level imports cost
+          (the API handlers defer nothing - they only read snapshots)
+
+and the heavy dependencies left loaded after a lazy import are listed
+(there should be none).
+
+Usage:
+    python scripts/benchmark_imports.py
+    python scripts/benchmark_imports.py --runs 10
+    python scripts/benchmark_imports.py --only api
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+API_DIR = ROOT / 'apps' / 'web' / 'api'
+
+# (group, module, directory on sys.path, heavy dependencies the module defers)
+TARGETS = [
+    ('api', 'history', API_DIR, []),
+    ('api', 'signals', API_DIR, []),
+    ('api', 'regime', API_DIR, []),
+    ('api', 'portfolio', API_DIR, []),
+    ('strategy', 'quad_portfolio_backtest', ROOT, ['yfinance', 'matplotlib.pyplot']),
+    ('strategy', 'signal_generator', ROOT, ['yfinance']),
+    ('broker', 'ib_executor', ROOT, ['ib_insync']),
+    ('broker', 'position_manager', ROOT, ['ib_insync']),
+]
+
+HEAVY_MODULES = ['yfinance', 'matplotlib', 'ib_insync']
+
+_PROBE = """
+import sys, time, json, importlib
+sys.path.insert(0, {path!r})
+missing = []
+started = time.perf_counter()
+for dep in {preload!r}:
+    try:
+        importlib.import_module(dep)
+    except ImportError:
+        missing.append(dep)
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'missing': missing,
+                  'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module: str, path: Path, preload=(), runs=5) -> dict:
+    """
+    Median cold import time of a module over fresh interpreters
+
+    Returns:
+        {'ms': median milliseconds, 'loaded': heavy modules loaded,
+         'missing': preloads not installed} or {'error': message}
+    """
+    code = _PROBE.format(path=str(path), preload=list(preload), module=module, heavy=HEAVY_MODULES)
+    samples, result = [], {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                              cwd=str(path), env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+    return {'ms': statistics.median(samples) * 1000, 'loaded': result['loaded'], 'missing': result['missing']}
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark cold import times')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per measurement (default 5)')
+    parser.add_argument('--only', choices=['api', 'strategy', 'broker'], help='Benchmark one group')
+    args = parser.parse_args()
+
+    print(f"{'Module':<36} {'Lazy':>10} {'Eager':>10} {'Saved':>10}  Heavy deps loaded")
+    print("-" * 90)
+    missing = set()
+    for group, module, path, deferred in TARGETS:
+        if args.only and group != args.only:
+            continue
+        name = f"{group}/{module}"
+        lazy = time_import(module, path, runs=args.runs)
+        if 'error' in lazy:
+            print(f"{name:<36} ✗ {lazy['error']}")
+            continue
+        if deferred:
+            eager = time_import(module, path, preload=deferred, runs=args.runs)
+            missing.update(eager.get('missing', []))
+            eager_ms = f"{eager['ms']:.0f} ms" if 'ms' in eager else 'n/a'
+            saved = f"{eager['ms'] - lazy['ms']:.0f} ms" if 'ms' in eager else 'n/a'
+        else:
+            eager_ms = saved = '-'
+        print(f"{name:<36} {lazy['ms']:>7.0f} ms {eager_ms:>10} {saved:>10}  "
+              f"{', '.join(lazy['loaded']) or 'none'}")
+
+    if missing:
+        print(f"\n! Not installed (excluded from eager timings): {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
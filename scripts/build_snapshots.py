@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Build Web API Snapshots
+=======================
+
+Computes signals/regime and backtest history once per bar and writes them
+as versioned snapshots to apps/web/data/snapshots. The API handlers in
+apps/web/api only serve these snapshots.
+
+Usage:
+    python scripts/build_snapshots.py                  # Signals + history
+    python scripts/build_snapshots.py --only signals
+    python scripts/build_snapshots.py --force          # Rebuild even if bar unchanged
+    python scripts/build_snapshots.py --only signals --from-data  # Reuse apps/web/data/signals.json
+"""
+
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory (strategy code) and API directory (snapshot store) to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.append(str(ROOT / 'apps' / 'web' / 'api'))
+
+from snapshots import write_snapshot, load_snapshot
+
+INITIAL_CAPITAL = 50000
+BACKTEST_YEARS = 5
+
+
+def build_history_payload(portfolio_value):
+    """Performance series and summary stats served by /api/history"""
+    performance_history = []
+    for date, value in portfolio_value.items():
+        total_return = ((value / INITIAL_CAPITAL) - 1) * 100
+        performance_history.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'value': round(float(value), 2),
+            'totalReturn': round(float(total_return), 2)
+        })
+
+    final_value = portfolio_value.iloc[-1]
+    total_return = ((final_value / INITIAL_CAPITAL) - 1) * 100
+
+    returns = portfolio_value.pct_change().dropna()
+    sharpe = (returns.mean() / returns.std()) * (252 ** 0.5) if returns.std() > 0 else 0
+
+    rolling_max = portfolio_value.expanding().max()
+    drawdown = (portfolio_value - rolling_max) / rolling_max
+    max_drawdown = drawdown.min() * 100
+
+    years = len(portfolio_value) / 252
+    annual_return = ((final_value / INITIAL_CAPITAL) ** (1 / years) - 1) * 100 if years > 0 else 0
+
+    return {
+        'performance': performance_history,
+        'summary': {
+            'totalReturn': round(float(total_return), 1),
+            'annualReturn': round(float(annual_return), 1),
+            'sharpe': round(float(sharpe), 2),
+            'maxDrawdown': round(float(max_drawdown), 1),
+            'finalValue': round(float(final_value), 2)
+        },
+        'generatedAt': portfolio_value.index[-1].strftime('%Y-%m-%dT%H:%M:%SZ')
+    }
+
+
+def build_signals_snapshot(force=False, from_data=False):
+    """Signals + regime snapshot (one SignalGenerator run, or reuse signals.json)"""
+    if from_data:
+        with open(ROOT / 'apps' / 'web' / 'data' / 'signals.json') as f:
+            data = json.load(f)
+    else:
+        from update_signals import generate_dashboard_json
+        data = generate_dashboard_json()
+    bar = data['generatedAt'][:10]
+
+    current = load_snapshot('signals')
+    if current and current['bar'] == bar and not force:
+        print(f"  Signals snapshot already built for bar {bar} ({current['version']})")
+        return current['version']
+
+    version = write_snapshot('signals', data, bar)
+    print(f"✅ Signals snapshot {version}")
+    return version
+
+
+def build_history_snapshot(force=False):
+    """Backtest history snapshot (one backtest run, shared via the backtest store)"""
+    # The signals snapshot carries the latest bar - skip the backtest if history is already on it
+    current = load_snapshot('history')
+    signals = load_snapshot('signals')
+    if current and signals and current['bar'] == signals['bar'] and not force:
+        print(f"  History snapshot already built for bar {current['bar']} ({current['version']})")
+        return current['version']
+
+    from quad_portfolio_backtest import QuadrantPortfolioBacktest
+    from backtest_store import run_cached
+
+    # Same configuration and window as run_production_backtest.py, so the
+    # workflow reuses its stored run instead of simulating again
+    end_date = datetime.now()
+    backtest = QuadrantPortfolioBacktest(
+        start_date=end_date - timedelta(days=BACKTEST_YEARS * 365 + 100),
+        end_date=end_date,
+        initial_capital=INITIAL_CAPITAL,
+        momentum_days=20,
+        max_positions=10,
+        atr_stop_loss=2.0,
+        atr_period=14
+    )
+    run_cached(backtest)
+
+    data = build_history_payload(backtest.portfolio_value)
+    bar = data['generatedAt'][:10]
+
+    version = write_snapshot('history', data, bar)
+    print(f"✅ History snapshot {version}")
+    return version
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Build web API snapshots')
+    parser.add_argument('--only', choices=['signals', 'history'], help='Build a single snapshot')
+    parser.add_argument('--force', action='store_true', help='Write a new version even if the bar is unchanged')
+    parser.add_argument('--from-data', action='store_true',
+                        help='Build the signals snapshot from apps/web/data/signals.json instead of recomputing')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    try:
+        if args.only in (None, 'signals'):
+            build_signals_snapshot(force=args.force, from_data=args.from_data)
+        if args.only in (None, 'history'):
+            build_history_snapshot(force=args.force)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Backtest Engine Parity Check
+============================
+
+Runs the same backtests with every daily-simulation engine
+(QuadrantPortfolioBacktest(engine=...)) and checks that the array engines
+reproduce the reference engine exactly:
+
+- equity curve:  bitwise equal (np.array_equal, no tolerance)
+- counters:      rebalances, confirmations, rejections, skips, stops
+- costs and open-position entry prices/dates/ATRs
+
+Configurations cover no stops/no cap, the production setup (top 10, 2x ATR
+stops) and a tight setup (top 5, 1.5x stops, 2% minimum delta). The numba
+engine is skipped when Numba is not installed.
+
+Usage:
+    python scripts/check_engine_parity.py                    # Market data
+    python scripts/check_engine_parity.py --synthetic        # Random-walk prices (offline)
+    python scripts/check_engine_parity.py --start 2018-01-01
+"""
+
+import io
+import sys
+import time
+import argparse
+import contextlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backtest_loop import NUMBA_AVAILABLE  # noqa: E402
+from config import QUAD_ALLOCATIONS  # noqa: E402
+from quad_portfolio_backtest import ADDITIONAL_BACKTEST_TICKERS, QuadrantPortfolioBacktest  # noqa: E402
+
+CONFIGS = [
+    {'max_positions': None, 'atr_stop_loss': None},
+    {'max_positions': 10, 'atr_stop_loss': 2.0},
+    {'max_positions': 5, 'atr_stop_loss': 1.5, 'min_trade_threshold': 0.02},
+]
+
+
+class SyntheticBacktest(QuadrantPortfolioBacktest):
+    """Backtest over seeded random-walk OHLC bars instead of downloaded prices"""
+
+    seed = 0
+
+    def _load_from_price_store(self, all_tickers, fetch_start):
+        dates = pd.bdate_range(fetch_start, self.end_date)
+        rng = np.random.default_rng(self.seed)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(dates), len(all_tickers))), axis=0))
+        gaps = np.exp(rng.normal(0, 0.005, closes.shape))
+        opens = np.vstack([closes[:1], closes[:-1] * gaps[1:]])
+        wicks = np.abs(rng.normal(0, 0.006, (2,) + closes.shape))
+        highs = np.maximum(opens, closes) * (1 + wicks[0])
+        lows = np.minimum(opens, closes) * (1 - wicks[1])
+        return tuple({t: pd.Series(panel[:, k], index=dates) for k, t in enumerate(all_tickers)}
+                     for panel in (closes, opens, highs, lows))
+
+
+def run(cls, start, end, engine, config):
+    """Run one backtest quietly; returns (backtest, stats, seconds)"""
+    bt = cls(start, end, initial_capital=50000, momentum_days=20, engine=engine, **config)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        bt.prepare_signals()
+        started = time.perf_counter()
+        if engine == 'reference':
+            stats = bt._simulate_reference(bt.target_weights, bt.quad_history)
+        else:
+            stats = bt._simulate_arrays(bt.target_weights, bt.quad_history)
+        elapsed = time.perf_counter() - started
+    return bt, stats, elapsed
+
+
+def _same_dict(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(
+        (pd.isna(a[k]) and pd.isna(b[k])) or a[k] == b[k] for k in a)
+
+
+def compare(reference, candidate) -> list:
+    """Differences between two runs (empty = identical)"""
+    (ref, ref_stats, _), (other, other_stats, _) = reference, candidate
+    problems = []
+    ref_equity, other_equity = ref.portfolio_value.to_numpy(), other.portfolio_value.to_numpy()
+    if not np.array_equal(ref_equity, other_equity):
+        first = int(np.flatnonzero(ref_equity != other_equity)[0])
+        problems.append(f"equity differs from {ref.portfolio_value.index[first].date()} "
+                        f"({ref_equity[first]!r} vs {other_equity[first]!r})")
+    if ref_stats != other_stats:
+        problems.append(f"counters {ref_stats} vs {other_stats}")
+    if ref.total_trading_costs != other.total_trading_costs:
+        problems.append(f"costs {ref.total_trading_costs!r} vs {other.total_trading_costs!r}")
+    for name in ('entry_prices', 'entry_dates', 'entry_atrs'):
+        if not _same_dict(getattr(ref, name), getattr(other, name)):
+            problems.append(f"{name} differ")
+    return problems
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Check that all backtest engines produce identical results')
+    parser.add_argument('--start', default='2020-01-01', help='Backtest start (default 2020-01-01)')
+    parser.add_argument('--end', default='2024-12-31', help='Backtest end (default 2024-12-31)')
+    parser.add_argument('--synthetic', action='store_true', help='Use seeded random-walk prices (no download)')
+    args = parser.parse_args()
+
+    cls = SyntheticBacktest if args.synthetic else QuadrantPortfolioBacktest
+    engines = ['python'] + (['numba'] if NUMBA_AVAILABLE else [])
+    if not NUMBA_AVAILABLE:
+        print("! numba not installed - checking the Python array engine only")
+
+    if args.synthetic:
+        tickers = {t for assets in QUAD_ALLOCATIONS.values() for t in assets} | set(ADDITIONAL_BACKTEST_TICKERS)
+        print(f"Synthetic prices for {len(tickers)} tickers, {args.start} to {args.end}")
+
+    failures = 0
+    for config in CONFIGS:
+        label = ', '.join(f"{k}={v}" for k, v in config.items())
+        reference = run(cls, args.start, args.end, 'reference', config)
+        print(f"\n{label}")
+        print(f"  reference  {reference[2] * 1000:>8.0f} ms  final ${reference[0].portfolio_value.iloc[-1]:,.2f}")
+        for engine in engines:
+            if engine == 'numba':
+                run(cls, args.start, args.end, engine, config)  # Warm up the JIT
+            candidate = run(cls, args.start, args.end, engine, config)
+            problems = compare(reference, candidate)
+            status = '✓ identical' if not problems else '✗ ' + '; '.join(problems)
+            print(f"  {engine:<10} {candidate[2] * 1000:>8.0f} ms  {status}")
+            failures += bool(problems)
+
+    print()
+    if failures:
+        print(f"✗ {failures} engine run(s) differ from the reference")
+        sys.exit(1)
+    print("✓ All engines match the reference bit for bit")
+
+
+if __name__ == "__main__":
+    main()
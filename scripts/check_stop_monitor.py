@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Stop Monitor Reconciliation Check
+=================================
+
+Runs StopMonitor against the IB simulator the way it runs in production:
+the trader (client ID 1) opens bracket positions with GTC stops, another
+client reuses the same order IDs, and the monitor connects as client ID 20.
+A breach must be reconciled against the trader's stop by permId:
+
+- stop filled at IB      -> STOPPED_OUT (position cleaned from the store)
+- stop cancelled at IB   -> UNPROTECTED
+- no other client's order with a colliding orderId is ever matched
+
+Usage:
+    python scripts/check_stop_monitor.py
+    python scripts/check_stop_monitor.py --verbose    # Show trader/monitor output
+"""
+
+import io
+import os
+import sys
+import argparse
+import contextlib
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ib_insync import Contract, Order  # noqa: E402
+
+from ib_simulator import SimulatedIB  # noqa: E402
+from position_manager import PositionManager  # noqa: E402
+from stop_monitor import StopMonitor  # noqa: E402
+
+TRADER_CLIENT_ID = 1
+OTHER_CLIENT_ID = 2
+MONITOR_CLIENT_ID = 20
+
+PRICES = {'XLE': 100.0, 'XLK': 200.0, 'SPY': 500.0}
+STOPS = {'XLE': 95.0, 'XLK': 190.0}
+
+
+def _contract(symbol: str) -> Contract:
+    return Contract(secType='CFD', symbol=symbol, exchange='SMART', currency='USD')
+
+
+def run_scenario(tmp: str):
+    """
+    Trade, collide, breach and reconcile on one simulator
+
+    Returns:
+        (reconciliation alert kinds by ticker, tickers left in the monitor's store)
+    """
+    sim = SimulatedIB(prices=PRICES, account_value=100000.0)
+    state_file = os.path.join(tmp, 'state.db')
+
+    # Trader: bracket entries with attached GTC stops
+    sim.connect(clientId=TRADER_CLIENT_ID)
+    trader = PositionManager(sim, state_file=state_file, trade_log=os.path.join(tmp, 'trader.csv'),
+                             entry_mode='bracket')
+    for symbol, stop in STOPS.items():
+        trader.enter_position(_contract(symbol), 50, PRICES[symbol], stop, atr=2.0)
+    xlk = trader.get_position('XLK')
+    trader._cancel_order_id(xlk['stop_order_id'])  # XLK left without a stop
+    trader.close()
+
+    # Another client reuses the trader's order IDs and cancels them
+    sim.connect(clientId=OTHER_CLIENT_ID)
+    for _ in range(4):
+        order = Order(action='BUY', orderType='LMT', lmtPrice=400.0, totalQuantity=1, tif='GTC')
+        sim.cancelOrder(sim.placeOrder(_contract('SPY'), order).order)
+
+    # Monitor: its own client ID, same position store
+    sim.connect(clientId=MONITOR_CLIENT_ID)
+    manager = PositionManager(sim, state_file=state_file, trade_log=os.path.join(tmp, 'monitor.csv'))
+    monitor = StopMonitor(sim, manager, reconcile_delay=1.0, clock=lambda: sim.now)
+    monitor.load_positions()
+
+    sim.set_price('XLE', 94.0)   # Through the stop: IB fills it
+    sim.set_price('XLK', 185.0)  # Through the level, but the stop was cancelled
+    sim.sleep(1.5)
+    monitor.poll()
+    monitor.unsubscribe()
+
+    alerts = {}
+    for alert in monitor.alerts:
+        if alert['kind'] != 'BREACH':
+            alerts.setdefault(alert['ticker'], []).append(alert['kind'])
+    remaining = sorted(manager.get_all_positions())
+    manager.close()
+    return alerts, remaining
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Check stop monitor reconciliation across IB client IDs')
+    parser.add_argument('--verbose', action='store_true', help='Show trader/monitor output')
+    args = parser.parse_args()
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as tmp, output:
+        alerts, remaining = run_scenario(tmp)
+
+    expected = {'XLE': ['STOPPED_OUT'], 'XLK': ['UNPROTECTED']}
+    failures = 0
+    for ticker, kinds in expected.items():
+        got = alerts.get(ticker, [])
+        ok = got == kinds
+        print(f"  {ticker:<5} {', '.join(got) or '(no alerts)':<28} {'✓' if ok else '✗ expected ' + ', '.join(kinds)}")
+        failures += not ok
+
+    ok = remaining == ['XLK']
+    print(f"  store {', '.join(remaining) or '(empty)':<28} {'✓' if ok else '✗ expected XLK only'}")
+    failures += not ok
+
+    print()
+    if failures:
+        print(f"✗ {failures} stop monitor check(s) failed")
+        sys.exit(1)
+    print("✓ Stops placed by another client ID reconcile by permId")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,30 @@
 Generate History JSON from Backtest
 ====================================
 
-Runs the backtest and extracts regime transitions and signal changes
-for the dashboard history page.
+Runs the backtest (or loads a stored run from the backtest store, e.g. the
+one run_production_backtest.py reports) and extracts regime transitions and signal changes for the dashboard
+history page.
+
+Usage:
+    python scripts/generate_history.py
+    python scripts/generate_history.py --key <store key>    # see backtest_store.py --list
 """
 
 import sys
 import json
+import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from quad_portfolio_backtest import QuadrantPortfolioBacktest
-from config import QUAD_ALLOCATIONS
+from backtest_store import load_run, run_cached
+from regime_history import load_regime_history
 
 
 def get_quadrant_name(quad: str) -> str:
@@ -30,13 +40,89 @@ def get_quadrant_name(quad: str) -> str:
     return names.get(quad, quad)
 
 
-def generate_history():
-    """Run backtest and extract history events"""
-    print("=" * 60)
-    print("GENERATING HISTORY FROM BACKTEST")
-    print("=" * 60)
-
-    # Run backtest for last 5 years
+def regime_events(quad_history: pd.DataFrame) -> list:
+    """
+    Regime transition events (vectorized)
+
+    Returns:
+        List of (row position, event) for each day whose (Top1, Top2) differs
+        from the previous day
+    """
+    regimes = quad_history[['Top1', 'Top2']]
+    changed = (regimes != regimes.shift()).any(axis=1).to_numpy()
+
+    top1, top2 = regimes['Top1'].to_numpy(), regimes['Top2'].to_numpy()
+    events = []
+    for pos in np.flatnonzero(changed[1:]) + 1:
+        old_primary, new_primary, new_secondary = top1[pos - 1], top1[pos], top2[pos]
+        events.append((pos, {
+            'date': quad_history.index[pos].strftime('%Y-%m-%d'),
+            'type': 'regime',
+            'title': f'Regime transition: {old_primary} → {new_primary}',
+            'description': f'Primary quadrant changed to {get_quadrant_name(new_primary)}, secondary is {get_quadrant_name(new_secondary)}',
+            'icon': 'up' if new_primary == 'Q1' else ('down' if new_primary in ['Q3', 'Q4'] else 'neutral'),
+        }))
+    return events
+
+
+def signal_events(dates: pd.DatetimeIndex, target_weights: pd.DataFrame, every=5) -> list:
+    """
+    Position entry/exit/resize events (vectorized)
+
+    Weights are compared every `every` rows of `dates` (days also present in
+    target_weights) against the previous sampled row:
+    - new:     weight > 5% and previously < 1%
+    - exited:  weight < 1% and previously > 5%
+    - resized: otherwise, |change| > 10 percentage points
+
+    Returns:
+        List of (row position, event) in date, then column order
+    """
+    sampled = (np.arange(len(dates)) % every == 0) & dates.isin(target_weights.index)
+    positions = np.flatnonzero(sampled)
+    if len(positions) == 0:
+        return []
+
+    tickers = np.asarray(target_weights.columns)
+    current = target_weights.reindex(dates[positions]).to_numpy(dtype=float)
+    previous = np.vstack([np.zeros((1, current.shape[1])), current[:-1]])
+    with np.errstate(invalid='ignore'):
+        # Only held (positive) weights carry over to the next comparison
+        previous = np.where(previous > 0, previous, 0.0)
+        new = (current > 0.05) & (previous < 0.01)
+        exited = ~new & (current < 0.01) & (previous > 0.05)
+        resized = ~new & ~exited & (np.abs(current - previous) > 0.10)
+
+    events = []
+    rows, cols = np.nonzero(new | exited | resized)
+    for row, col in zip(rows, cols):
+        ticker, cur, prev = tickers[col], current[row, col], previous[row, col]
+        date = dates[positions[row]].strftime('%Y-%m-%d')
+        if new[row, col]:
+            event = {
+                'title': f'New position: {ticker} added',
+                'description': f'Allocation: {cur*100:.1f}%',
+                'icon': 'up',
+            }
+        elif exited[row, col]:
+            event = {
+                'title': f'Position exited: {ticker}',
+                'description': f'Removed from portfolio (was {prev*100:.1f}%)',
+                'icon': 'down',
+            }
+        else:
+            direction = 'increased' if cur > prev else 'decreased'
+            event = {
+                'title': f'{ticker} allocation {direction}',
+                'description': f'{prev*100:.1f}% → {cur*100:.1f}%',
+                'icon': 'up' if direction == 'increased' else 'down',
+            }
+        events.append((positions[row], {'date': date, 'type': 'signal', **event}))
+    return events
+
+
+def run_history_backtest():
+    """Run (or restore) the 5-year production backtest; same keys as stored_history_backtest()"""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=5 * 365)  # 5 years
 
@@ -50,80 +136,59 @@ def generate_history():
         atr_period=14
     )
 
-    results = backtest.run_backtest()
+    results = run_cached(backtest)
+    return {
+        'initial_capital': backtest.initial_capital,
+        'quad_history': backtest.quad_history,
+        'target_weights': backtest.target_weights,
+        'portfolio_value': backtest.portfolio_value,
+        'results': results,
+    }
 
-    # Extract regime transitions
-    quad_history = backtest.quad_history
-    target_weights = backtest.target_weights
 
-    history_events = []
+def stored_history_backtest(key):
+    """A run from the backtest store by key, in the shape of run_history_backtest()"""
+    entry = load_run(key)
+    if entry is None:
+        raise ValueError(f"No stored backtest run {key} (see python backtest_store.py --list)")
+    print(f"Using stored backtest run {key} (saved {entry['saved_at']:%Y-%m-%d %H:%M})")
+    return {
+        'initial_capital': entry['material']['params']['initial_capital'],
+        'quad_history': entry['quad_history'],
+        'target_weights': entry['target_weights'],
+        'portfolio_value': entry['portfolio_value'],
+        'results': entry['results'],
+    }
+
 
-    prev_regime = None
-    prev_weights = {}
+def generate_history(key=None):
+    """
+    Extract history events from a backtest
 
-    for i, date in enumerate(quad_history.index):
-        current_regime = (quad_history.loc[date, 'Top1'], quad_history.loc[date, 'Top2'])
+    Args:
+        key: Backtest store key of a run to use instead of the default backtest
+    """
+    print("=" * 60)
+    print("GENERATING HISTORY FROM BACKTEST")
+    print("=" * 60)
 
-        # Check for regime change
-        if prev_regime is not None and current_regime != prev_regime:
-            old_primary = prev_regime[0]
-            new_primary = current_regime[0]
-            new_secondary = current_regime[1]
+    if key:
+        backtest = stored_history_backtest(key)
+    else:
+        # Run backtest for last 5 years
+        backtest = run_history_backtest()
+    results = backtest['results']
 
-            history_events.append({
-                'id': len(history_events) + 1,
-                'date': date.strftime('%Y-%m-%d'),
-                'type': 'regime',
-                'title': f'Regime transition: {old_primary} → {new_primary}',
-                'description': f'Primary quadrant changed to {get_quadrant_name(new_primary)}, secondary is {get_quadrant_name(new_secondary)}',
-                'icon': 'up' if new_primary == 'Q1' else ('down' if new_primary in ['Q3', 'Q4'] else 'neutral'),
-            })
+    # Extract regime transitions (persisted regime history where available)
+    quad_history = backtest['quad_history'][['Top1', 'Top2']]
+    regime_table = load_regime_history()
+    if regime_table is not None:
+        quad_history = regime_table[['Top1', 'Top2']].reindex(quad_history.index).fillna(quad_history)
 
-        # Check for significant position changes (only check every few days to avoid noise)
-        if date in target_weights.index and i % 5 == 0:  # Check every 5 days
-            current_weights = target_weights.loc[date]
-
-            for ticker in current_weights.index:
-                current_weight = current_weights[ticker]
-                prev_weight = prev_weights.get(ticker, 0)
-
-                # Detect new positions
-                if current_weight > 0.05 and prev_weight < 0.01:
-                    history_events.append({
-                        'id': len(history_events) + 1,
-                        'date': date.strftime('%Y-%m-%d'),
-                        'type': 'signal',
-                        'title': f'New position: {ticker} added',
-                        'description': f'Allocation: {current_weight*100:.1f}%',
-                        'icon': 'up',
-                    })
-
-                # Detect exited positions
-                elif current_weight < 0.01 and prev_weight > 0.05:
-                    history_events.append({
-                        'id': len(history_events) + 1,
-                        'date': date.strftime('%Y-%m-%d'),
-                        'type': 'signal',
-                        'title': f'Position exited: {ticker}',
-                        'description': f'Removed from portfolio (was {prev_weight*100:.1f}%)',
-                        'icon': 'down',
-                    })
-
-                # Detect significant weight changes
-                elif abs(current_weight - prev_weight) > 0.10:  # >10% change
-                    direction = 'increased' if current_weight > prev_weight else 'decreased'
-                    history_events.append({
-                        'id': len(history_events) + 1,
-                        'date': date.strftime('%Y-%m-%d'),
-                        'type': 'signal',
-                        'title': f'{ticker} allocation {direction}',
-                        'description': f'{prev_weight*100:.1f}% → {current_weight*100:.1f}%',
-                        'icon': 'up' if direction == 'increased' else 'down',
-                    })
-
-            prev_weights = {t: current_weights[t] for t in current_weights.index if current_weights[t] > 0}
-
-        prev_regime = current_regime
+    # Regime event first on a given day, then position changes in column order
+    events = regime_events(quad_history) + signal_events(quad_history.index, backtest['target_weights'])
+    events.sort(key=lambda e: (e[0], e[1]['type'] != 'regime'))
+    history_events = [{'id': 0, **event} for _, event in events]
 
     # Sort by date descending (most recent first)
     history_events.sort(key=lambda x: x['date'], reverse=True)
@@ -136,7 +201,7 @@ def generate_history():
         event['id'] = i + 1
 
     # Build performance history (monthly snapshots)
-    portfolio_value = backtest.portfolio_value
+    portfolio_value = backtest['portfolio_value']
     performance_history = []
 
     # Sample monthly
@@ -144,7 +209,7 @@ def generate_history():
     for date in monthly_dates:
         if date in portfolio_value.index:
             value = portfolio_value.loc[date]
-            returns = (value / backtest.initial_capital - 1) * 100
+            returns = (value / backtest['initial_capital'] - 1) * 100
             performance_history.append({
                 'date': date.strftime('%Y-%m-%d'),
                 'value': round(value, 2),
@@ -167,9 +232,13 @@ def generate_history():
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Generate history.json for the dashboard')
+    parser.add_argument('--key', help='Backtest store key of a run to use (backtest_store.py --list)')
+    args = parser.parse_args()
+
     try:
         # Generate history data
-        data = generate_history()
+        data = generate_history(args.key)
 
         # Output path
         output_path = Path(__file__).parent.parent / 'apps' / 'web' / 'data' / 'history.json'
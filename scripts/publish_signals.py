@@ -5,46 +5,57 @@ Signal Publisher - Bridge to Supabase
 Publishes signals from the existing signal generator to Supabase database
 for the SaaS dashboard to consume.
 
+Each run diffs the new regime and signal set against the last published
+snapshot (kept locally, or read back once from the database) and sends one
+batch: the regime row if it changed, one bulk upsert of changed signals, one
+delete of dropped assets and one insert of change-log rows. The local
+snapshot is only advanced after the whole batch is written, so a failed run
+is retried in full by the next one. Database traffic scales with the number
+of changes, not the universe size.
+
+Set POSTGREST_URL to publish to a plain PostgREST server (e.g. a local
+Postgres stand-in) instead of Supabase.
+
 Usage:
     python scripts/publish_signals.py
+    python scripts/publish_signals.py --dry-run   # Show the batch, write nothing
+    python scripts/publish_signals.py --full      # Ignore the local snapshot
 
 Run this as a cron job (e.g., daily after market close).
 """
 
 import os
 import sys
+import json
+import argparse
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 # Add parent directory to path to import signal_generator
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from supabase import create_client, Client
 from signal_generator import SignalGenerator
-from config import QUAD_ALLOCATIONS
+from asset_metadata import load_index
+from universe import UNIVERSE
 
 # Supabase configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('NEXT_PUBLIC_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+POSTGREST_URL = os.getenv('POSTGREST_URL')
+
+# Last published regime/signals (diff base for the next run)
+PUBLISH_STATE_FILE = os.getenv(
+    'PUBLISH_STATE_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.publish_state.json')
+)
+
+# Signal columns compared when diffing (timestamps are not)
+SIGNAL_FIELDS = ('signal', 'target_allocation', 'conviction', 'category', 'quadrant')
+REGIME_FIELDS = ('primary_quadrant', 'secondary_quadrant', 'days_in_regime')
 
 # Asset categories for dashboard display
-ASSET_CATEGORIES = {
-    # Core
-    'BTC': 'core', 'IBIT': 'core',
-    'ETH': 'core', 'ETHA': 'core',
-    # High Beta / Growth
-    'QQQ': 'growth', 'ARKK': 'growth', 'IWM': 'growth',
-    'SOL': 'high_beta', 'AVAX': 'high_beta',
-    # DeFi
-    'UNI': 'defi', 'AAVE': 'defi',
-    # Commodities
-    'XLE': 'commodities', 'DBC': 'commodities', 'GLD': 'commodities',
-    'GCC': 'commodities', 'USO': 'commodities',
-    # Bonds
-    'TLT': 'bonds', 'VGLT': 'bonds', 'IEF': 'bonds', 'LQD': 'bonds',
-    # Defensive
-    'XLU': 'defensive', 'XLP': 'defensive', 'XLV': 'defensive',
-}
+ASSET_CATEGORIES = {ticker: entry['publish_category'] for ticker, entry in load_index().items()
+                    if entry['publish_category'] != 'other'}
 
 # Quadrant descriptions
 QUADRANT_INFO = {
@@ -75,17 +86,89 @@ QUADRANT_INFO = {
 }
 
 
-class SignalPublisher:
-    """Publishes signals to Supabase for the SaaS dashboard"""
+def create_db_client():
+    """Supabase client, or a PostgREST client when POSTGREST_URL is set"""
+    if POSTGREST_URL:
+        from postgrest import SyncPostgrestClient
+        return SyncPostgrestClient(POSTGREST_URL)
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError(
+            "Missing Supabase credentials. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables."
+        )
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+class PublishBatch:
+    """All database writes of one publish run"""
 
     def __init__(self):
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            raise ValueError(
-                "Missing Supabase credentials. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables."
-            )
+        self.regime: Optional[Dict] = None
+        self.upserts: List[Dict] = []
+        self.deletes: List[str] = []
+        self.history: List[Dict] = []
+
+    def __len__(self) -> int:
+        return (self.regime is not None) + len(self.upserts) + len(self.deletes) + len(self.history)
+
+    def log_change(
+        self,
+        event_type: str,
+        previous_value: str,
+        new_value: str,
+        asset: Optional[str] = None,
+        reason: Optional[str] = None
+    ) -> None:
+        """Queue a change-log row for the signal_history table"""
+        self.history.append({
+            'event_type': event_type,
+            'asset': asset,
+            'previous_value': previous_value,
+            'new_value': new_value,
+            'reason': reason,
+            'timestamp': datetime.now().isoformat(),
+        })
+        print(f"  Logged: {event_type} - {asset or 'regime'}: {previous_value} -> {new_value}")
+
+    def apply(self, client) -> int:
+        """
+        Send the batch (at most one request per table and operation)
+
+        Returns:
+            Number of requests made
+        """
+        requests = 0
+        if self.regime is not None:
+            # Single-row table: replace the row
+            client.table('current_regime').delete().neq('id', '').execute()
+            client.table('current_regime').insert(self.regime).execute()
+            requests += 2
+        if self.upserts:
+            client.table('current_signals').upsert(self.upserts, on_conflict='asset').execute()
+            requests += 1
+        if self.deletes:
+            client.table('current_signals').delete().in_('asset', self.deletes).execute()
+            requests += 1
+        if self.history:
+            client.table('signal_history').insert(self.history).execute()
+            requests += 1
+        return requests
+
+
+class SignalPublisher:
+    """Publishes signals to Supabase for the SaaS dashboard"""
 
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        self.signal_gen = SignalGenerator(
+    def __init__(self, client=None, state_file: Optional[str] = PUBLISH_STATE_FILE, signal_gen=None):
+        """
+        Args:
+            client: Supabase/PostgREST client (default: create_db_client())
+            state_file: Local snapshot of the last publish (None to always read it back)
+            signal_gen: Signal generator (default: production parameters)
+        """
+        self.supabase = client if client is not None else create_db_client()
+        self.state_file = state_file
+        self.signal_gen = signal_gen or SignalGenerator(
             momentum_days=20,
             ema_period=50,
             vol_lookback=30,
@@ -96,10 +179,7 @@ class SignalPublisher:
 
     def get_asset_quadrant(self, asset: str) -> Optional[str]:
         """Determine which quadrant an asset belongs to"""
-        for quad, assets in QUAD_ALLOCATIONS.items():
-            if asset in assets:
-                return quad
-        return None
+        return UNIVERSE.primary_quad(asset)
 
     def get_signal_conviction(self, weight: float, total_weight: float) -> str:
         """Determine conviction level based on weight"""
@@ -118,26 +198,49 @@ class SignalPublisher:
             return 'NEUTRAL'
         return 'BEARISH'
 
-    def publish_regime(self, signals: Dict) -> None:
-        """Publish current regime to Supabase"""
+    def load_last_published(self, full=False) -> Dict:
+        """
+        Last published state: {'regime': row or None, 'signals': {asset: row}}
+
+        Read from the local snapshot; falls back to reading the current
+        tables once (first run, new machine, or full=True).
+        """
+        if not full and self.state_file and os.path.exists(self.state_file):
+            with open(self.state_file) as f:
+                return json.load(f)
+
+        regime = self.supabase.table('current_regime').select('*').limit(1).execute()
+        signals = self.supabase.table('current_signals').select('*').execute()
+        return {
+            'regime': regime.data[0] if regime.data else None,
+            'signals': {s['asset']: s for s in signals.data or []},
+        }
+
+    def save_last_published(self, state: Dict) -> None:
+        """Advance the local snapshot (atomic)"""
+        if not self.state_file:
+            return
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(tmp_path, self.state_file)
+
+    def plan_regime(self, signals: Dict, prev_regime: Optional[Dict], batch: PublishBatch) -> Dict:
+        """Queue the regime row (if changed) and a quadrant_change log entry"""
         top1, top2 = signals['top_quadrants']
         quad_info = QUADRANT_INFO.get(top1, {})
 
-        # Get existing regime to calculate days_in_regime
-        existing = self.supabase.table('current_regime').select('*').limit(1).execute()
-
         days_in_regime = 1
         last_change = datetime.now()
 
-        if existing.data:
-            prev_regime = existing.data[0]
+        if prev_regime:
             if prev_regime['primary_quadrant'] == top1:
                 # Same regime, increment days
                 days_in_regime = prev_regime.get('days_in_regime', 0) + 1
                 last_change = prev_regime.get('last_change', datetime.now().isoformat())
             else:
                 # Regime changed, log it
-                self._log_signal_change(
+                batch.log_change(
                     event_type='quadrant_change',
                     previous_value=prev_regime['primary_quadrant'],
                     new_value=top1,
@@ -156,87 +259,62 @@ class SignalPublisher:
             'timestamp': datetime.now().isoformat(),
         }
 
-        # Upsert regime (delete old, insert new)
-        self.supabase.table('current_regime').delete().neq('id', '').execute()
-        self.supabase.table('current_regime').insert(regime_data).execute()
-
-        print(f"+ Published regime: {top1} ({quad_info.get('name', '')})")
+        if prev_regime is None or any(prev_regime.get(k) != regime_data[k] for k in REGIME_FIELDS):
+            batch.regime = regime_data
+            return regime_data
+        return prev_regime
 
-    def publish_signals(self, signals: Dict) -> None:
-        """Publish current signals to Supabase"""
+    def plan_signals(self, signals: Dict, prev_signals: Dict[str, Dict], batch: PublishBatch) -> Dict[str, Dict]:
+        """Queue upserts for new/changed signals and a delete for dropped assets"""
         target_weights = signals['target_weights']
         total_weight = sum(target_weights.values())
+        now = datetime.now().isoformat()
 
-        # Get existing signals for change detection
-        existing = self.supabase.table('current_signals').select('*').execute()
-        existing_map = {s['asset']: s for s in existing.data} if existing.data else {}
-
-        # Prepare new signals
-        new_signals = []
+        published = {}
         for asset, weight in target_weights.items():
             signal = self.weight_to_signal(weight)
-            quadrant = self.get_asset_quadrant(asset)
-            category = ASSET_CATEGORIES.get(asset, 'other')
-            conviction = self.get_signal_conviction(weight, total_weight)
-
             signal_data = {
                 'asset': asset,
                 'signal': signal,
                 'target_allocation': round(weight, 4),
-                'conviction': conviction,
-                'category': category,
-                'quadrant': quadrant,
-                'timestamp': datetime.now().isoformat(),
+                'conviction': self.get_signal_conviction(weight, total_weight),
+                'category': ASSET_CATEGORIES.get(asset, 'other'),
+                'quadrant': self.get_asset_quadrant(asset),
+                'timestamp': now,
             }
 
-            # Check for signal change
-            if asset in existing_map:
-                prev = existing_map[asset]
-                if prev['signal'] != signal:
-                    signal_data['previous_signal'] = prev['signal']
-                    signal_data['signal_changed_at'] = datetime.now().isoformat()
-
-                    self._log_signal_change(
-                        event_type='signal_change',
-                        asset=asset,
-                        previous_value=prev['signal'],
-                        new_value=signal,
-                        reason=f"Weight changed from {prev['target_allocation']:.2%} to {weight:.2%}"
-                    )
-
-            new_signals.append(signal_data)
-
-        # Clear old signals and insert new
-        self.supabase.table('current_signals').delete().neq('id', '').execute()
+            prev = prev_signals.get(asset)
+            if prev is not None and all(prev.get(k) == signal_data[k] for k in SIGNAL_FIELDS):
+                published[asset] = prev  # Unchanged - nothing to send
+                continue
 
-        if new_signals:
-            self.supabase.table('current_signals').insert(new_signals).execute()
+            # Check for signal change
+            if prev is not None and prev['signal'] != signal:
+                signal_data['previous_signal'] = prev['signal']
+                signal_data['signal_changed_at'] = now
+
+                batch.log_change(
+                    event_type='signal_change',
+                    asset=asset,
+                    previous_value=prev['signal'],
+                    new_value=signal,
+                    reason=f"Weight changed from {prev['target_allocation']:.2%} to {weight:.2%}"
+                )
 
-        print(f"+ Published {len(new_signals)} signals")
+            batch.upserts.append(signal_data)
+            published[asset] = signal_data
 
-    def _log_signal_change(
-        self,
-        event_type: str,
-        previous_value: str,
-        new_value: str,
-        asset: Optional[str] = None,
-        reason: Optional[str] = None
-    ) -> None:
-        """Log signal change to history table"""
-        history_entry = {
-            'event_type': event_type,
-            'asset': asset,
-            'previous_value': previous_value,
-            'new_value': new_value,
-            'reason': reason,
-            'timestamp': datetime.now().isoformat(),
-        }
+        batch.deletes = sorted(set(prev_signals) - set(target_weights))
+        return published
 
-        self.supabase.table('signal_history').insert(history_entry).execute()
-        print(f"  Logged: {event_type} - {asset or 'regime'}: {previous_value} -> {new_value}")
+    def publish(self, dry_run=False, full=False) -> Dict:
+        """
+        Main entry point - generate signals and publish the changes
 
-    def publish(self) -> Dict:
-        """Main entry point - generate and publish signals"""
+        Args:
+            dry_run: Build and print the batch without writing
+            full: Diff against the database instead of the local snapshot
+        """
         print("=" * 70)
         print("SIGNAL PUBLISHER - Supabase Bridge")
         print("=" * 70)
@@ -247,10 +325,27 @@ class SignalPublisher:
         print("Generating signals...")
         signals = self.signal_gen.generate_signals()
 
-        # Publish to Supabase
-        print("\nPublishing to Supabase...")
-        self.publish_regime(signals)
-        self.publish_signals(signals)
+        print("\nDiffing against last publish...")
+        last = self.load_last_published(full=full)
+        batch = PublishBatch()
+        regime = self.plan_regime(signals, last.get('regime'), batch)
+        published = self.plan_signals(signals, last.get('signals', {}), batch)
+
+        top1 = signals['top_quadrants'][0]
+        print(f"  Regime: {top1} ({QUADRANT_INFO.get(top1, {}).get('name', '')})"
+              f"{'' if batch.regime is not None else ' - unchanged'}")
+        print(f"  Signals: {len(batch.upserts)} changed, {len(batch.deletes)} removed, "
+              f"{len(published) - len(batch.upserts)} unchanged")
+
+        if dry_run:
+            print("\n(dry run - nothing written)")
+        elif len(batch) == 0:
+            print("\n✓ Nothing changed since the last publish")
+        else:
+            print("\nPublishing to Supabase...")
+            requests = batch.apply(self.supabase)
+            self.save_last_published({'regime': regime, 'signals': published})
+            print(f"+ Published {len(batch)} changes in {requests} requests")
 
         print("\n" + "=" * 70)
         print("PUBLISH COMPLETE")
@@ -261,9 +356,14 @@ class SignalPublisher:
 
 def main():
     """Run the signal publisher"""
+    parser = argparse.ArgumentParser(description='Publish signals to Supabase')
+    parser.add_argument('--dry-run', action='store_true', help='Show the batch without writing')
+    parser.add_argument('--full', action='store_true', help='Diff against the database, not the local snapshot')
+    args = parser.parse_args()
+
     try:
         publisher = SignalPublisher()
-        signals = publisher.publish()
+        signals = publisher.publish(dry_run=args.dry_run, full=args.full)
 
         # Print summary
         print("\nSummary:")
@@ -16,7 +16,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from signal_generator import SignalGenerator
-from config import QUAD_ALLOCATIONS, QUADRANT_DESCRIPTIONS
+from config import QUADRANT_DESCRIPTIONS
+from regime_history import load_regime_history
+from asset_metadata import get_asset
+from universe import UNIVERSE
 
 
 def get_quadrant_info(quadrant: str) -> dict:
@@ -32,40 +35,12 @@ def get_quadrant_info(quadrant: str) -> dict:
 
 def get_asset_category(ticker: str) -> str:
     """Determine asset category based on ticker"""
-    categories = {
-        # Growth
-        'QQQ': 'growth', 'ARKK': 'growth', 'IWM': 'growth', 'VUG': 'growth',
-        'XLC': 'growth', 'XLY': 'growth',
-        # Crypto
-        'IBIT': 'crypto', 'ETHA': 'crypto', 'BTC-USD': 'crypto',
-        # Bonds
-        'TLT': 'bonds', 'LQD': 'bonds', 'IEF': 'bonds', 'VGLT': 'bonds',
-        'MUB': 'bonds', 'TIP': 'bonds', 'VTIP': 'bonds',
-        # Commodities
-        'XLE': 'commodities', 'DBC': 'commodities', 'GCC': 'commodities',
-        'GLD': 'commodities', 'DBA': 'commodities', 'USO': 'commodities',
-        'LIT': 'commodities', 'AA': 'commodities', 'PALL': 'commodities',
-        'REMX': 'commodities', 'URA': 'commodities',
-        # Energy
-        'XOP': 'energy', 'FCG': 'energy',
-        # Cyclicals
-        'XLF': 'cyclicals', 'XLI': 'cyclicals', 'XLB': 'cyclicals',
-        # Defensive
-        'XLU': 'defensive', 'XLP': 'defensive', 'XLV': 'defensive',
-        # Real Assets
-        'VNQ': 'real_assets', 'PAVE': 'real_assets',
-        # Value
-        'VTV': 'value', 'IWD': 'value',
-    }
-    return categories.get(ticker, 'other')
+    return get_asset(ticker)['category']
 
 
 def get_asset_quadrant(ticker: str) -> str:
     """Determine which quadrant an asset belongs to"""
-    for quad, assets in QUAD_ALLOCATIONS.items():
-        if ticker in assets:
-            return quad
-    return 'unknown'
+    return UNIVERSE.primary_quad(ticker) or 'unknown'
 
 
 def get_conviction_level(weight: float, total_weights: float) -> str:
@@ -124,14 +99,24 @@ def generate_dashboard_json():
     else:
         confidence = 0.5
 
+    # Regime run length from the persisted regime history (when it agrees on the primary quad)
+    days_in_regime = 1
+    last_change = timestamp.strftime('%Y-%m-%dT00:00:00Z')
+    regime_table = load_regime_history()
+    if regime_table is not None and not regime_table.empty:
+        latest = regime_table.iloc[-1]
+        if latest['Top1'] == top1:
+            days_in_regime = int(latest['DaysInRegime'])
+            last_change = latest['RegimeStart'].strftime('%Y-%m-%dT00:00:00Z')
+
     # Build regime object
     regime = {
         'primaryQuadrant': top1,
         'secondaryQuadrant': top2,
         'growthDirection': q1_info['growthDirection'],
         'inflationDirection': q1_info['inflationDirection'],
-        'daysInRegime': 1,  # Would need historical tracking for accurate count
-        'lastChange': timestamp.strftime('%Y-%m-%dT00:00:00Z'),
+        'daysInRegime': days_in_regime,
+        'lastChange': last_change,
         'confidence': round(confidence, 2),
         'timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
     }
@@ -14,10 +14,17 @@ Strategy:
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Dict, Tuple
 from config import QUAD_ALLOCATIONS
+from singleflight import SingleFlight, latest_bar_date
+from signal_kernel import target_weight_matrix, weights_to_dict
+from regime_history import rank_quads
+from universe import UNIVERSE
+from aligned_panel import load_panel
+
+# Concurrent generate_signals() calls for the same bar/parameters share one run
+_signal_flight = SingleFlight()
 
 # Quadrant indicators for momentum scoring
 QUAD_INDICATORS = {
@@ -39,6 +46,9 @@ class SignalGenerator:
         self.max_positions = max_positions  # Top 10 positions (optimal from backtesting)
         self.atr_stop_loss = atr_stop_loss  # ATR 2.0x stop loss (optimal from backtesting)
         self.atr_period = atr_period  # 14-day ATR
+        self.price_store = None  # Shared price matrices, when fetch_market_data used them
+        self.high_data = None  # Raw highs/lows of the last download (true-range ATR)
+        self.low_data = None
         
         # Leverage by quadrant
         self.quad_leverage = {
@@ -48,6 +58,17 @@ class SignalGenerator:
             'Q4': 1.0   # Deflation
         }
     
+    @staticmethod
+    def universe() -> list:
+        """All tickers the signal needs (allocations + quadrant indicators)"""
+        all_tickers = set()
+        for quad_assets in QUAD_ALLOCATIONS.values():
+            all_tickers.update(quad_assets.keys())
+        for indicators in QUAD_INDICATORS.values():
+            all_tickers.update(indicators)
+        
+        return sorted(list(all_tickers))
+    
     def fetch_market_data(self, lookback_days=150):
         """
         Fetch market data for all tickers
@@ -56,41 +77,24 @@ class SignalGenerator:
             lookback_days: Number of days to fetch (default 150 for buffers)
         
         Returns:
-            DataFrame with price data
+            Close panel on NYSE sessions (forward-filled, NaN before a
+            ticker's first bar; read-only, shared with other callers)
         """
-        # Get all unique tickers
-        all_tickers = set()
-        for quad_assets in QUAD_ALLOCATIONS.values():
-            all_tickers.update(quad_assets.keys())
-        for indicators in QUAD_INDICATORS.values():
-            all_tickers.update(indicators)
-        
-        all_tickers = sorted(list(all_tickers))
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=lookback_days)
+        all_tickers = self.universe()
         
-        print(f"Fetching data for {len(all_tickers)} tickers...")
+        start_date = datetime.now() - timedelta(days=lookback_days)
+        end_date = pd.Timestamp(latest_bar_date()) + timedelta(days=1)  # Completed bars only
         
-        price_series = []
-        for ticker in all_tickers:
-            try:
-                data = yf.download(ticker, start=start_date, end=end_date, 
-                                 progress=False, auto_adjust=True)
-                if len(data) > 0 and 'Close' in data.columns:
-                    series = data['Close'].copy()
-                    series.name = ticker
-                    price_series.append(series)
-            except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
+        # Session-aligned panel: shared price matrix store (price_matrix_store.py) when it
+        # is on the latest bar, else one download; cached per source version
+        panel = load_panel(all_tickers, start_date, end_date)
+        df = panel.frame('close').dropna(axis=1, how='all')
+        self.price_store = panel.store
+        self.high_data = panel.frame('high')[df.columns] if 'high' in panel else None
+        self.low_data = panel.frame('low')[df.columns] if 'low' in panel else None
         
-        if not price_series:
-            raise ValueError("No price data loaded!")
-        
-        df = pd.concat(price_series, axis=1)
-        df = df.ffill().bfill()
-        
-        print(f"✓ Loaded {len(df.columns)} tickers, {len(df)} days")
+        source = f" from price matrix store {panel.store.version}" if panel.store is not None else ""
+        print(f"✓ Loaded {len(df.columns)} tickers, {len(df)} sessions{source}")
         return df
     
     def calculate_quadrant_scores(self, price_data: pd.DataFrame) -> pd.Series:
@@ -100,16 +104,18 @@ class SignalGenerator:
         Returns:
             Series with quad scores for today
         """
+        momentum = price_data.pct_change(self.momentum_days).iloc[-1] * 100
+        return self._scores_from_momentum(momentum)
+    
+    def _scores_from_momentum(self, momentum: pd.Series) -> pd.Series:
+        """Quadrant scores from today's momentum (%) per ticker, best first"""
         scores = {}
         
         for quad, indicators in QUAD_INDICATORS.items():
             quad_scores = []
             for ticker in indicators:
-                if ticker in price_data.columns:
-                    # 50-day momentum
-                    momentum = price_data[ticker].pct_change(self.momentum_days).iloc[-1] * 100
-                    if not pd.isna(momentum):
-                        quad_scores.append(momentum)
+                if ticker in momentum.index and not pd.isna(momentum[ticker]):
+                    quad_scores.append(momentum[ticker])
             
             scores[quad] = np.mean(quad_scores) if quad_scores else 0
         
@@ -121,10 +127,14 @@ class SignalGenerator:
         return top_quads[0], top_quads[1]
     
     def calculate_target_weights(self, price_data: pd.DataFrame, 
-                                 top1: str, top2: str) -> Dict[str, float]:
+                                 top1: str, top2: str,
+                                 volatility_data: pd.DataFrame = None) -> Dict[str, float]:
         """
         Calculate target portfolio weights
         
+        Args:
+            volatility_data: Precomputed annualized volatility (computed from price_data if None)
+        
         Returns:
             Dictionary of {ticker: weight} where weights sum to ~2.5 (if Q1 active)
         """
@@ -132,74 +142,73 @@ class SignalGenerator:
         ema_data = price_data.ewm(span=self.ema_period, adjust=False).mean()
         
         # Calculate volatility
-        returns = price_data.pct_change()
-        volatility_data = returns.rolling(window=self.vol_lookback).std() * np.sqrt(252)
+        if volatility_data is None:
+            returns = price_data.pct_change()
+            volatility_data = returns.rolling(window=self.vol_lookback).std() * np.sqrt(252)
+        
+        # Live signal = last row of the shared kernel (same rule as the backtest)
+        last = price_data.index[-1:]
+        weights = target_weight_matrix(price_data.loc[last], volatility_data.loc[last], ema_data.loc[last],
+                                       pd.Series([top1], index=last), pd.Series([top2], index=last),
+                                       self.quad_leverage, self.max_positions)
+        return weights_to_dict(weights.iloc[0], top1, top2)
+    
+    def calculate_weight_history(self, days=252, price_data: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        What the signal would have been on each of the last `days` bars (one kernel call)
         
-        final_weights = {}
+        Top quadrants are scored per day from QUAD_INDICATORS momentum, as in
+        calculate_quadrant_scores.
         
-        for quad in [top1, top2]:
-            # Get leverage for this quad
-            quad_leverage = self.quad_leverage[quad]
-            
-            # Get tickers in this quad
-            quad_tickers = [t for t in QUAD_ALLOCATIONS[quad].keys() 
-                          if t in price_data.columns]
-            
-            if not quad_tickers:
-                continue
-            
-            # Get current volatilities
-            quad_vols = {}
-            for ticker in quad_tickers:
-                vol = volatility_data[ticker].iloc[-1]
-                if pd.notna(vol) and vol > 0:
-                    quad_vols[ticker] = vol
-            
-            if not quad_vols:
-                continue
-            
-            # Volatility chasing weights
-            total_vol = sum(quad_vols.values())
-            vol_weights = {t: (v / total_vol) * quad_leverage 
-                          for t, v in quad_vols.items()}
-            
-            # Apply EMA filter
-            for ticker, weight in vol_weights.items():
-                current_price = price_data[ticker].iloc[-1]
-                current_ema = ema_data[ticker].iloc[-1]
-                
-                if pd.notna(current_price) and pd.notna(current_ema) and current_price > current_ema:
-                    # Pass EMA filter
-                    if ticker in final_weights:
-                        final_weights[ticker] += weight
-                    else:
-                        final_weights[ticker] = weight
-        
-        # Filter to top N positions if max_positions is set
-        if self.max_positions and len(final_weights) > self.max_positions:
-            # Sort by weight and keep top N
-            sorted_weights = sorted(final_weights.items(), key=lambda x: x[1], reverse=True)
-            top_n_weights = dict(sorted_weights[:self.max_positions])
-            
-            # Re-normalize to maintain total leverage
-            original_total = sum(final_weights.values())
-            new_total = sum(top_n_weights.values())
-            scale_factor = original_total / new_total if new_total > 0 else 1
-            
-            final_weights = {t: w * scale_factor for t, w in top_n_weights.items()}
+        Args:
+            days: Number of most recent bars to return
+            price_data: Close prices (fetched with enough EMA warm-up if None)
         
-        # ENFORCE: Never return more than max_positions
-        if self.max_positions and len(final_weights) > self.max_positions:
-            sorted_weights = sorted(final_weights.items(), key=lambda x: x[1], reverse=True)
-            final_weights = dict(sorted_weights[:self.max_positions])
-            print(f"⚠️ WARNING: Had to force-filter to {self.max_positions} positions!")
+        Returns:
+            DataFrame of target weights [dates x tickers] (0.0 = no position)
+        """
+        if price_data is None:
+            price_data = self.fetch_market_data(lookback_days=int(days * 7 / 5) + 150)
         
-        return final_weights
+        ema_data = price_data.ewm(span=self.ema_period, adjust=False).mean()
+        volatility_data = price_data.pct_change().rolling(window=self.vol_lookback).std() * np.sqrt(252)
+        
+        momentum = price_data.pct_change(self.momentum_days) * 100
+        quad_scores = pd.DataFrame({
+            quad: momentum[[t for t in indicators if t in momentum.columns]].mean(axis=1)
+            for quad, indicators in QUAD_INDICATORS.items()
+        }).fillna(0)
+        top_quads = rank_quads(quad_scores)
+        
+        weights = target_weight_matrix(price_data, volatility_data, ema_data,
+                                       top_quads['Top1'], top_quads['Top2'],
+                                       self.quad_leverage, self.max_positions)
+        return weights.iloc[-days:]
+    
+    def _shared_indicator(self, name: str, price_data: pd.DataFrame):
+        """
+        Indicator from the price matrix store, aligned to price_data
+        
+        Shared: vol (window-based, matches a recompute on the fetched window
+        exactly) and the Wilder ATR (computed once per bar at publish time,
+        warmed over the stored history). None if not available.
+        """
+        store = self.price_store
+        if store is None or name not in store:
+            return None
+        return store.frame(name).reindex(index=price_data.index, columns=price_data.columns)
+    
+    def _flight_key(self) -> Tuple:
+        return ('generate_signals', latest_bar_date(), self.momentum_days, self.ema_period,
+                self.vol_lookback, self.max_positions, self.atr_stop_loss, self.atr_period)
     
     def generate_signals(self) -> Dict:
         """
         Generate current trading signals
         
+        Concurrent callers with the same bar date and parameters wait on a
+        single in-flight run and share its result.
+        
         Returns:
             Dictionary with:
             - top_quadrants: (Q1, Q2) tuple
@@ -208,6 +217,19 @@ class SignalGenerator:
             - current_regime: str description
             - timestamp: datetime
         """
+        (signals, price_data, ema_data), shared = _signal_flight.do(self._flight_key(), self._run_signals)
+        
+        self.price_data = price_data
+        self.ema_data = ema_data
+        if shared:
+            print("✓ Shared in-flight signal generation")
+        
+        # Per-caller copies of the mutable parts
+        return dict(signals, target_weights=dict(signals['target_weights']),
+                    atr_data=dict(signals['atr_data']))
+    
+    def _run_signals(self) -> Tuple[Dict, pd.DataFrame, pd.DataFrame]:
+        """Generate signals (single run); returns (signals, price_data, ema_data)"""
         print("\n" + "="*60)
         print("GENERATING SIGNALS")
         print("="*60)
@@ -215,9 +237,8 @@ class SignalGenerator:
         # Fetch data
         price_data = self.fetch_market_data(lookback_days=150)
         
-        # Calculate and store EMA data
-        self.price_data = price_data
-        self.ema_data = price_data.ewm(span=self.ema_period, adjust=False).mean()
+        # Calculate EMA data
+        ema_data = price_data.ewm(span=self.ema_period, adjust=False).mean()
         
         # Calculate quadrant scores
         quad_scores = self.calculate_quadrant_scores(price_data)
@@ -230,14 +251,17 @@ class SignalGenerator:
         print(f"\n🎯 Top 2 Quadrants: {top1}, {top2}")
         
         # Calculate target weights
-        target_weights = self.calculate_target_weights(price_data, top1, top2)
+        target_weights = self.calculate_target_weights(
+            price_data, top1, top2, volatility_data=self._shared_indicator(f'vol_{self.vol_lookback}', price_data))
         
         # Calculate ATR for stop losses
         atr_data = {}
         if self.atr_stop_loss is not None and len(target_weights) > 0:
             print(f"\n📐 Calculating ATR for stop losses ({self.atr_period}-day, {self.atr_stop_loss}x)...")
-            daily_returns = price_data.pct_change().abs()
-            atr = daily_returns.rolling(window=self.atr_period).mean() * price_data
+            atr = self._shared_indicator(f'atr_{self.atr_period}', price_data)
+            if atr is None:
+                from price_matrix_store import wilder_atr
+                atr = wilder_atr(price_data, self.atr_period, self.high_data, self.low_data)
             
             for ticker in target_weights.keys():
                 if ticker in atr.columns:
@@ -245,6 +269,12 @@ class SignalGenerator:
                     if pd.notna(atr_value):
                         atr_data[ticker] = float(atr_value)
         
+        signals = self._build_signals(quad_scores, top1, top2, target_weights, atr_data)
+        return signals, price_data, ema_data
+    
+    def _build_signals(self, quad_scores: pd.Series, top1: str, top2: str,
+                       target_weights: Dict[str, float], atr_data: Dict[str, float]) -> Dict:
+        """Print the target portfolio and assemble the signals dict"""
         # Calculate total leverage
         total_leverage = sum(target_weights.values())
         
@@ -259,20 +289,15 @@ class SignalGenerator:
             
             sorted_weights = sorted(target_weights.items(), key=lambda x: x[1], reverse=True)
             for ticker, weight in sorted_weights:
-                # Determine which quadrant(s) this ticker belongs to
-                quads = []
-                for q, assets in QUAD_ALLOCATIONS.items():
-                    if ticker in assets:
-                        quads.append(q)
-                
-                quad_str = '+'.join(quads) if quads else ''
+                # Which quadrant(s) this ticker belongs to
+                quad_str = UNIVERSE.quad_label(ticker)
                 
                 # Calculate notional value for $10k account
                 notional_10k = weight * 10000
                 
                 print(f"  {ticker:<8} {weight*100:>8.2f}%  ${notional_10k:>12,.2f}  {quad_str:<10}")
         
-        return {
+        signals = {
             'top_quadrants': (top1, top2),
             'quadrant_scores': quad_scores,
             'target_weights': target_weights,
@@ -281,6 +306,69 @@ class SignalGenerator:
             'total_leverage': total_leverage,
             'atr_data': atr_data
         }
+        return signals
+    
+    def indicator_engine(self):
+        """Streaming indicator state (indicator_state.py) with this generator's parameters"""
+        from indicator_state import IndicatorEngine
+        return IndicatorEngine(ema_period=self.ema_period, vol_lookback=self.vol_lookback,
+                               atr_period=self.atr_period, momentum_days=self.momentum_days)
+    
+    def generate_signals_from_state(self, engine=None) -> Dict:
+        """
+        Generate current signals from the streaming indicator state
+        
+        Same rule and output as generate_signals(), but the inputs are the
+        persisted per-ticker indicators (indicator_state.py) advanced with
+        only the bars since the last run, instead of a 150-day history fetch.
+        The EMA is warmed over the state's whole history, so it can differ
+        slightly from generate_signals() on assets near their EMA.
+        
+        Args:
+            engine: IndicatorEngine to use (default: the persisted state with
+                    this generator's parameters)
+        
+        Returns:
+            Same dictionary as generate_signals()
+        """
+        print("\n" + "="*60)
+        print("GENERATING SIGNALS (indicator state)")
+        print("="*60)
+        
+        engine = engine or self.indicator_engine()
+        engine.refresh(self.universe())
+        snapshot = engine.snapshot(self.universe())
+        if snapshot.empty:
+            raise ValueError("Indicator state is empty!")
+        
+        quad_scores = self._scores_from_momentum(snapshot['momentum'] * 100)
+        top1, top2 = self.get_top_quadrants(quad_scores)
+        
+        print(f"\nQuadrant Scores:")
+        for quad in quad_scores.index:
+            print(f"  {quad}: {quad_scores[quad]:>7.2f}%")
+        
+        print(f"\n🎯 Top 2 Quadrants: {top1}, {top2}")
+        
+        # One-row frames through the shared kernel
+        last = pd.DatetimeIndex([engine.last_date])
+        def row(column):
+            return pd.DataFrame([snapshot[column].to_numpy()], index=last, columns=snapshot.index)
+        
+        price_data, ema_data = row('close'), row('ema')
+        weights = target_weight_matrix(price_data, row('volatility'), ema_data,
+                                       pd.Series([top1], index=last), pd.Series([top2], index=last),
+                                       self.quad_leverage, self.max_positions)
+        target_weights = weights_to_dict(weights.iloc[0], top1, top2)
+        
+        atr_data = {}
+        if self.atr_stop_loss is not None:
+            atr_data = {t: float(snapshot.at[t, 'atr']) for t in target_weights
+                        if pd.notna(snapshot.at[t, 'atr'])}
+        
+        self.price_data = price_data
+        self.ema_data = ema_data
+        return self._build_signals(quad_scores, top1, top2, target_weights, atr_data)
 
 
 if __name__ == "__main__":
@@ -301,10 +389,6 @@ if __name__ == "__main__":
     print("Ticker,Weight(%),Quadrant(s)")
     sorted_by_weight = sorted(signals['target_weights'].items(), key=lambda x: x[1], reverse=True)
     for ticker, weight in sorted_by_weight:
-        quads = []
-        for q, assets in QUAD_ALLOCATIONS.items():
-            if ticker in assets:
-                quads.append(q)
-        quad_str = '+'.join(quads) if quads else ''
+        quad_str = UNIVERSE.quad_label(ticker)
         print(f"{ticker},{weight*100:.2f}%,{quad_str}")
 
@@ -0,0 +1,152 @@
+"""
+Signal Kernel
+=============
+
+The allocation rule shared by the live SignalGenerator and the backtest,
+evaluated for every date at once:
+
+1. For each of the day's top two quadrants, weight its assets by their
+   volatility (volatility chasing), normalized to the quadrant's leverage
+2. Zero out assets trading at or below their EMA (held as cash)
+3. Sum an asset's weight across both quadrants
+4. Keep the max_positions largest weights, rescaled to the pre-cut total
+
+Live signals are the last row of the matrix. Sums are accumulated in the
+same order as the original per-date loop, so results are bit-identical to it.
+
+Usage:
+    weights = target_weight_matrix(prices, volatility, ema, top1, top2,
+                                   quad_leverage={'Q1': 1.5, ...}, max_positions=10)
+"""
+
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import QUAD_ALLOCATIONS
+
+
+def _quad_columns(columns: pd.Index, allocations: Mapping) -> Dict[str, np.ndarray]:
+    """Column positions of each quad's assets, in allocation order"""
+    position = {t: i for i, t in enumerate(columns)}
+    return {q: np.array([position[t] for t in allocations[q] if t in position], dtype=int)
+            for q in allocations}
+
+
+def insertion_order(top1: np.ndarray, top2: np.ndarray, columns: pd.Index,
+                    allocations: Mapping = QUAD_ALLOCATIONS) -> np.ndarray:
+    """
+    Per-row column order in which the loop implementation adds assets
+
+    Top1's assets in allocation order, then Top2's assets not already in
+    Top1, then everything else.
+
+    Returns:
+        [dates x tickers] int array of column indices
+    """
+    n_rows, n_cols = len(top1), len(columns)
+    quad_cols = _quad_columns(columns, allocations)
+    key = np.full((n_rows, n_cols), 2 * n_cols, dtype=np.int64)
+
+    for quad, cols in quad_cols.items():
+        rank = np.arange(len(cols))
+        rows2 = np.flatnonzero(top2 == quad)
+        key[np.ix_(rows2, cols)] = n_cols + rank
+    for quad, cols in quad_cols.items():
+        rows1 = np.flatnonzero(top1 == quad)
+        # Top1 ranks overwrite Top2 ranks for assets in both quads
+        key[np.ix_(rows1, cols)] = np.arange(len(cols))
+
+    return np.argsort(key, axis=1, kind='stable')
+
+
+def target_weight_matrix(prices: pd.DataFrame, volatility: pd.DataFrame, ema: pd.DataFrame,
+                         top1: pd.Series, top2: pd.Series, quad_leverage: Mapping[str, float],
+                         max_positions: Optional[int] = None,
+                         allocations: Mapping = QUAD_ALLOCATIONS) -> pd.DataFrame:
+    """
+    Target weights for every date
+
+    Args:
+        prices: Close prices [dates x tickers]
+        volatility: Annualized volatility (same shape/labels as prices)
+        ema: Trend-filter EMA (same shape/labels as prices)
+        top1, top2: Primary/secondary quadrant per date (index = prices.index)
+        quad_leverage: Total weight per quadrant (e.g. {'Q1': 1.5, 'Q2': 1.0, ...})
+        max_positions: Keep only the N largest positions (None = no limit)
+        allocations: Quadrant -> assets map
+
+    Returns:
+        DataFrame of weights (0.0 = no position), same labels as prices
+    """
+    columns = prices.columns
+    price = prices.to_numpy(dtype=float)
+    vol = volatility.reindex(index=prices.index, columns=columns).to_numpy(dtype=float)
+    ema_values = ema.reindex(index=prices.index, columns=columns).to_numpy(dtype=float)
+    t1 = np.asarray(top1.reindex(prices.index), dtype=object)
+    t2 = np.asarray(top2.reindex(prices.index), dtype=object)
+    n_rows, n_cols = price.shape
+
+    with np.errstate(invalid='ignore'):
+        usable_vol = np.where(np.isfinite(vol) & (vol > 0), vol, 0.0)
+        above_ema = price > ema_values  # NaN price or EMA -> False
+
+    weights = np.zeros((n_rows, n_cols))
+    quad_cols = _quad_columns(columns, allocations)
+    for selected in (t1, t2):
+        for quad, cols in quad_cols.items():
+            rows = selected == quad
+            if not rows.any() or len(cols) == 0:
+                continue
+            quad_vol = usable_vol[np.ix_(rows, cols)]
+            # Sequential sum in allocation order (as the loop's sum over its dict)
+            total = np.zeros(quad_vol.shape[0])
+            for j in range(len(cols)):
+                total = total + quad_vol[:, j]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                quad_weights = np.where(total[:, None] > 0,
+                                        (quad_vol / total[:, None]) * quad_leverage[quad], 0.0)
+            quad_weights = np.where(above_ema[np.ix_(rows, cols)], quad_weights, 0.0)
+            weights[np.ix_(rows, cols)] += quad_weights
+
+    if max_positions:
+        held = (weights > 0).sum(axis=1)
+        cut = np.flatnonzero(held > max_positions)
+        if len(cut):
+            weights[cut] = _keep_top_n(weights[cut], insertion_order(t1[cut], t2[cut], columns, allocations),
+                                       max_positions)
+
+    return pd.DataFrame(weights, index=prices.index, columns=columns)
+
+
+def _keep_top_n(weights: np.ndarray, order: np.ndarray, max_positions: int) -> np.ndarray:
+    """Keep the N largest weights per row, rescaled to the row's original total"""
+    rows = np.arange(len(weights))[:, None]
+    in_order = np.take_along_axis(weights, order, axis=1)
+
+    # Largest first; ties keep insertion order (stable sort of an insertion-ordered row)
+    by_weight = np.take_along_axis(order, np.argsort(-in_order, axis=1, kind='stable'), axis=1)
+    ranked = weights[rows, by_weight]
+
+    original_total = np.zeros(len(weights))
+    for j in range(in_order.shape[1]):
+        original_total = original_total + in_order[:, j]
+    new_total = np.zeros(len(weights))
+    for j in range(max_positions):
+        new_total = new_total + ranked[:, j]
+
+    scale = np.where(new_total > 0, original_total / np.where(new_total > 0, new_total, 1), 1.0)
+    out = np.zeros_like(weights)
+    keep = by_weight[:, :max_positions]
+    out[rows, keep] = weights[rows, keep] * scale[:, None]
+    return out
+
+
+def weights_to_dict(row: pd.Series, top1: str, top2: str,
+                    allocations: Mapping = QUAD_ALLOCATIONS) -> Dict[str, float]:
+    """One row of the matrix as {ticker: weight}, largest first (ties in insertion order)"""
+    order = insertion_order(np.array([top1], dtype=object), np.array([top2], dtype=object),
+                            row.index, allocations)[0]
+    held = [(row.index[i], float(row.iat[i])) for i in order if row.iat[i] > 0]
+    return dict(sorted(held, key=lambda x: x[1], reverse=True))
@@ -0,0 +1,108 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+When several callers ask for the same expensive result at the same time
+(e.g. dashboard users and API requests hitting a cold cache at market
+close), only the first caller runs the computation; the rest wait on it
+and share its result (or its exception). Nothing is cached once the call
+completes - that is the cache layer's job.
+
+Usage:
+    flight = SingleFlight()
+    result, shared = flight.do(('signals', latest_bar_date(), params), compute)
+"""
+
+import threading
+from datetime import datetime, time as dtime, timedelta
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    MARKET_TZ = ZoneInfo('America/New_York')
+except Exception:  # tzdata missing (e.g. some Windows installs)
+    MARKET_TZ = None
+
+MARKET_CLOSE = dtime(16, 0)
+
+
+def latest_bar_date(now: datetime = None) -> str:
+    """
+    Date (YYYY-MM-DD) of the most recent completed daily bar
+
+    Taken from the NYSE session calendar the price panels are aligned to
+    (aligned_panel.session_index), so weekends and exchange holidays fall
+    back to the previous session. Today's session counts once it is past
+    the 16:00 ET close.
+    """
+    from aligned_panel import session_index
+
+    if now is None:
+        now = datetime.now(MARKET_TZ) if MARKET_TZ else datetime.now()
+
+    day = now.date()
+    last = day + timedelta(days=1) if now.time() >= MARKET_CLOSE else day
+    sessions = session_index(day - timedelta(days=14), last)
+    return sessions[-1].strftime('%Y-%m-%d')
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Run fn once per key among concurrent callers
+
+        Args:
+            key: Hashable identity of the computation (e.g. bar date + parameters)
+            fn: Function to run (only by the first caller)
+
+        Returns:
+            (result, shared) - shared is True if this caller waited on another's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
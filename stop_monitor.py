@@ -0,0 +1,334 @@
+"""
+Intraday Stop Monitor
+=====================
+
+Long-running watcher for the ATR stops tracked by PositionManager.
+IB's server-side GTC stops remain the primary protection; this monitor
+streams prices for every held contract, flags breaches as they happen and
+checks that IB actually acted on them.
+
+- Per-ticker stop levels and last prices live in flat numpy arrays
+  (ticker -> index, conId -> index), allocated once per position refresh
+- Each pendingTickersEvent only touches the tickers that changed
+- A breach raises an alert (console + Telegram) and schedules a
+  reconciliation against the IB stop order status ~1s later. The monitor
+  runs under its own client ID while the stops were placed by the trader's,
+  so it loads every client's open and completed orders and matches the
+  stop by permId (orderId is only unique per client):
+    stop Filled            -> position closed, state cleaned up
+    stop still working     -> alert: stop triggered but not filled
+    stop missing/cancelled -> alert: position unprotected
+
+Usage:
+    python stop_monitor.py --port 4001
+    python stop_monitor.py --port 4002 --no-telegram
+"""
+
+import math
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+from ib_insync import IB, Contract
+
+from position_manager import PositionManager
+
+WORKING_ORDER_STATUSES = ('PendingSubmit', 'ApiPending', 'PreSubmitted', 'Submitted')
+
+
+def _client_id(position: Dict) -> int:
+    """Client ID that placed the position's stop (-1 if not recorded)"""
+    client_id = position.get('stop_client_id')
+    return -1 if client_id is None else int(client_id)
+
+
+class StopMonitor:
+    """Stream prices for held positions and watch their stop levels"""
+
+    def __init__(self, ib: IB, position_manager: PositionManager, notifier=None,
+                 reconcile_delay=1.0, refresh_interval=300,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize stop monitor
+
+        Args:
+            ib: Connected IB instance
+            position_manager: PositionManager holding stop levels and stop order IDs
+            notifier: Optional TelegramNotifier for alerts
+            reconcile_delay: Seconds after a breach before checking IB stop status
+            refresh_interval: Seconds between reloads of the position store
+            clock: Time source (override for simulated time)
+        """
+        self.ib = ib
+        self.position_manager = position_manager
+        self.notifier = notifier
+        self.reconcile_delay = reconcile_delay
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        self.tickers: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.conid_index: Dict[int, int] = {}
+        self.contracts: List[Contract] = []
+        self.stops = np.empty(0)
+        self.prices = np.empty(0)
+        self.stop_order_ids = np.empty(0, dtype=np.int64)
+        self.stop_perm_ids = np.empty(0, dtype=np.int64)
+        self.stop_client_ids = np.empty(0, dtype=np.int64)
+        self.breached = np.empty(0, dtype=bool)
+        self.reconcile_due = np.empty(0)
+
+        self.alerts = []
+        self.last_refresh = None
+        self._subscribed = False
+
+    # ------------------------------------------------------------------
+    # Position index / subscriptions
+    # ------------------------------------------------------------------
+
+    def load_positions(self):
+        """(Re)build the array index from the position store and resubscribe"""
+        self.position_manager.state = self.position_manager.load_state()
+        positions = self.position_manager.get_all_positions()
+
+        tickers = sorted(positions)
+        if self._subscribed and tickers == self.tickers and all(
+                self.stops[i] == float(positions[t]['stop_price'])
+                and self.stop_order_ids[i] == int(positions[t].get('stop_order_id') or 0)
+                and self.stop_perm_ids[i] == int(positions[t].get('stop_perm_id') or 0)
+                for i, t in enumerate(tickers)):
+            self.last_refresh = self.clock()
+            return
+
+        self.unsubscribe()
+        self.tickers = tickers
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        n = len(self.tickers)
+        self.stops = np.array([float(positions[t]['stop_price']) for t in self.tickers], dtype=float)
+        self.prices = np.full(n, np.nan)
+        self.stop_order_ids = np.array([int(positions[t].get('stop_order_id') or 0) for t in self.tickers],
+                                       dtype=np.int64)
+        self.stop_perm_ids = np.array([int(positions[t].get('stop_perm_id') or 0) for t in self.tickers],
+                                      dtype=np.int64)
+        self.stop_client_ids = np.array([_client_id(positions[t]) for t in self.tickers], dtype=np.int64)
+        self.breached = np.zeros(n, dtype=bool)
+        self.reconcile_due = np.full(n, np.inf)
+
+        self.contracts = [self._contract_for(t, positions[t]) for t in self.tickers]
+        if self.contracts:
+            self.ib.qualifyContracts(*self.contracts)
+        self.conid_index = {c.conId: i for i, c in enumerate(self.contracts) if c.conId}
+
+        self.last_refresh = self.clock()
+        self.subscribe()
+        print(f"✓ Monitoring {n} stops: {', '.join(self.tickers) if n else '(none)'}")
+
+    def _contract_for(self, ticker: str, position: Dict) -> Contract:
+        details = position.get('contract_details') or {}
+        return Contract(symbol=details.get('symbol', ticker),
+                        secType=details.get('secType', 'CFD'),
+                        exchange=details.get('exchange', 'SMART'),
+                        currency=details.get('currency', 'USD'))
+
+    def subscribe(self):
+        """Subscribe to streaming ticks for all held contracts"""
+        if self._subscribed:
+            return
+
+        for contract in self.contracts:
+            self.ib.reqMktData(contract, '', False, False)
+        self.ib.pendingTickersEvent += self.on_pending_tickers
+        self._subscribed = True
+
+        # Initial sweep with whatever prices are already available
+        snapshot = {}
+        for ticker in self.ib.reqTickers(*self.contracts) if self.contracts else []:
+            i = self.conid_index.get(ticker.contract.conId)
+            price = ticker.marketPrice()
+            if i is not None and not math.isnan(price):
+                self.prices[i] = price
+                snapshot[self.tickers[i]] = price
+        for ticker in self.position_manager.check_stops(snapshot):
+            self._on_breach(self.index[ticker], snapshot[ticker])
+
+    def unsubscribe(self):
+        if not self._subscribed:
+            return
+        self.ib.pendingTickersEvent -= self.on_pending_tickers
+        for contract in self.contracts:
+            try:
+                self.ib.cancelMktData(contract)
+            except Exception:
+                pass
+        self._subscribed = False
+
+    # ------------------------------------------------------------------
+    # Tick handling
+    # ------------------------------------------------------------------
+
+    def on_pending_tickers(self, tickers):
+        """pendingTickersEvent handler - work is proportional to changed tickers only"""
+        for ticker in tickers:
+            i = self.conid_index.get(ticker.contract.conId)
+            if i is None:
+                continue
+
+            price = ticker.last
+            if price != price or price <= 0:  # NaN / no trade yet
+                price = ticker.marketPrice()
+                if price != price:
+                    continue
+
+            self.prices[i] = price
+            if price <= self.stops[i]:
+                if not self.breached[i]:
+                    self._on_breach(i, price)
+            elif self.breached[i]:
+                # Recovered above the stop before reconciliation
+                self.breached[i] = False
+                self.reconcile_due[i] = np.inf
+
+    def _on_breach(self, i: int, price: float):
+        self.breached[i] = True
+        self.reconcile_due[i] = self.clock() + self.reconcile_delay
+        ticker = self.tickers[i]
+        self._alert(ticker, f"price ${price:.2f} <= stop ${self.stops[i]:.2f}", 'BREACH')
+
+    def _alert(self, ticker: str, message: str, kind: str):
+        self.alerts.append({'time': datetime.now().isoformat(), 'ticker': ticker,
+                            'kind': kind, 'message': message})
+        print(f"  🛑 [{kind}] {ticker}: {message}")
+        if self.notifier:
+            try:
+                self.notifier.send_stop_alert(ticker, kind, message)
+            except Exception as e:
+                print(f"  ⚠️ Telegram alert failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reconciliation with IB stop orders
+    # ------------------------------------------------------------------
+
+    def reconcile_due_breaches(self):
+        """Check IB stop status for breaches whose reconcile time has passed"""
+        due = np.flatnonzero(self.reconcile_due <= self.clock())
+        if len(due) == 0:
+            return
+
+        # The stops belong to the trader's client IDs: pull in every client's
+        # open and completed orders. Completed orders come first so this
+        # session's own trades (which carry fills) win on the same permId.
+        self.ib.reqAllOpenOrders()
+        trades = list(self.ib.reqCompletedOrders(apiOnly=False)) + list(self.ib.trades())
+        trades_by_perm = {t.order.permId: t for t in trades if t.order.permId}
+        closed = False
+
+        for i in due:
+            self.reconcile_due[i] = np.inf
+            ticker = self.tickers[i]
+            stop_trade = self._find_stop(i, trades, trades_by_perm)
+            status = stop_trade.orderStatus.status if stop_trade else None
+
+            if status == 'Filled':
+                fill_price = stop_trade.orderStatus.avgFillPrice
+                self._alert(ticker, f"IB stop filled @ ${fill_price:.2f}" if fill_price else
+                                    "IB stop filled", 'STOPPED_OUT')
+                closed = True
+            elif status in WORKING_ORDER_STATUSES:
+                self._alert(ticker, f"price ${self.prices[i]:.2f} through stop "
+                                    f"${self.stops[i]:.2f} but IB stop still {status}", 'NOT_FILLED')
+            else:
+                self._alert(ticker, f"no working IB stop (status: {status or 'not found'}) - "
+                                    f"position UNPROTECTED", 'UNPROTECTED')
+
+        if closed:
+            self.ib.sleep(0.5)  # let position updates arrive
+            self.position_manager.sync_with_ib()
+            self.load_positions()
+
+    def _find_stop(self, i: int, trades: List, trades_by_perm: Dict):
+        """
+        IB trade of the stop order for position i
+
+        Matches on permId; stops whose permId was not yet known when they were
+        saved fall back to (client ID, orderId), and legacy entries without a
+        client ID only match an orderId that is unambiguous across clients.
+        """
+        perm_id = int(self.stop_perm_ids[i])
+        if perm_id:
+            return trades_by_perm.get(perm_id)
+
+        order_id = int(self.stop_order_ids[i])
+        client_id = int(self.stop_client_ids[i])
+        if not order_id:
+            return None
+        matches = [t for t in trades if t.order.orderId == order_id
+                   and (client_id < 0 or t.order.clientId == client_id)]
+        if len({t.order.permId for t in matches}) == 1:
+            return matches[-1]
+        return None
+
+    def poll(self):
+        """One housekeeping pass: reconcile breaches, periodically refresh positions"""
+        self.reconcile_due_breaches()
+        if self.last_refresh is None or self.clock() - self.last_refresh >= self.refresh_interval:
+            self.load_positions()
+
+    def run(self, poll_interval=0.25, session=None):
+        """
+        Run until interrupted
+
+        Args:
+            poll_interval: Seconds between housekeeping passes (ticks are event driven)
+            session: Optional IBConnectionManager to heartbeat/reconnect
+        """
+        self.load_positions()
+        reconnects = session.reconnects if session else 0
+
+        try:
+            while True:
+                self.ib.sleep(poll_interval)
+                if session is not None:
+                    session.heartbeat()
+                    if session.reconnects != reconnects:
+                        reconnects = session.reconnects
+                        self._subscribed = False
+                        self.load_positions()
+                self.poll()
+        finally:
+            self.unsubscribe()
+
+
+if __name__ == "__main__":
+    import argparse
+    from ib_connection import IBConnectionManager
+    from telegram_notifier import get_notifier
+
+    parser = argparse.ArgumentParser(description='Stream prices and watch ATR stops intraday')
+    parser.add_argument('--port', type=int, default=7497,
+                        help='IB port (7497=paper/TWS, 7496=live/TWS, 4002=paper/Gateway, 4001=live/Gateway)')
+    parser.add_argument('--client-id', type=int, default=20,
+                        help='First client ID for the monitor (default 20, keeps clear of the trader; '
+                             'stops placed by other client IDs are matched by permId)')
+    parser.add_argument('--no-telegram', action='store_true', help='Disable Telegram alerts')
+    parser.add_argument('--delayed', action='store_true', help='Use delayed market data')
+    args = parser.parse_args()
+
+    session = IBConnectionManager(port=args.port, client_ids=range(args.client_id, args.client_id + 5))
+    if not session.connect():
+        raise SystemExit(1)
+
+    if args.delayed:
+        session.ib.reqMarketDataType(3)
+
+    position_manager = PositionManager(session.ib)
+    monitor = StopMonitor(session.ib, position_manager,
+                          notifier=None if args.no_telegram else get_notifier())
+    print("Press Ctrl+C to stop")
+    try:
+        monitor.run(session=session)
+    except KeyboardInterrupt:
+        print("\n✓ Stop monitor stopped")
+    finally:
+        position_manager.close()
+        session.close()
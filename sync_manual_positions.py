@@ -6,7 +6,7 @@ After manually entering positions in IB, run this to:
 1. Query IB for current positions
 2. Query IB for existing stop orders
 3. Match with expected backtest state
-4. Create position_state.json
+4. Write position state to the position store (position_state.db)
 5. Enable ongoing system to manage them
 
 Run ONCE after manual initialization
@@ -17,10 +17,11 @@ Usage:
 """
 
 from ib_insync import IB, CFD
-import json
 from datetime import datetime
 from typing import Dict, List
 
+from position_store import PositionStore, DEFAULT_DB_FILE
+
 # Load ignore list and contract type filters
 try:
     from strategy_config import IGNORE_TICKERS, MANAGED_CONTRACT_TYPES, IGNORED_CONTRACT_TYPES
@@ -33,9 +34,14 @@ except ImportError:
 class ManualPositionSync:
     """Sync manually entered positions with position tracking system"""
     
-    def __init__(self, ib_port=4002):
+    def __init__(self, ib_port=4002, ib=None):
+        """
+        Args:
+            ib_port: IB port to connect to
+            ib: Optional IB-compatible instance (e.g. ib_simulator.SimulatedIB)
+        """
         self.ib_port = ib_port
-        self.ib = None
+        self.ib = ib
         self.positions = []
         self.stop_orders = {}
         self.expected_positions = {}
@@ -44,7 +50,8 @@ class ManualPositionSync:
         """Connect to Interactive Brokers"""
         print(f"\nConnecting to IB on port {self.ib_port}...")
         
-        self.ib = IB()
+        if self.ib is None:
+            self.ib = IB()
         self.ib.RequestTimeout = 120  # Longer timeout for connection issues
         
         try:
@@ -53,8 +60,7 @@ class ManualPositionSync:
             self.ib.connect('127.0.0.1', self.ib_port, clientId=1, readonly=False)
             
             # Give it a moment to settle after those error messages
-            import time
-            time.sleep(2)
+            self.ib.sleep(2)
             
             if self.ib.isConnected():
                 print("+ Connected to IB")
@@ -115,8 +121,7 @@ class ManualPositionSync:
             self.ib.reqOpenOrders()
             
             # Give IB time to send the data
-            import time
-            time.sleep(3)
+            self.ib.sleep(3)
             
             # Get the orders
             orders = self.ib.openOrders()
@@ -135,6 +140,7 @@ class ManualPositionSync:
                     self.stop_orders[symbol] = {
                         'stop_price': stop_price,
                         'order_id': order_id,
+                        'perm_id': order.permId,
                         'order': order
                     }
                 else:
@@ -237,9 +243,11 @@ class ManualPositionSync:
             # Get stop order from IB
             stop_price = None
             stop_order_id = None
+            stop_perm_id = None
             if symbol in self.stop_orders:
                 stop_price = self.stop_orders[symbol]['stop_price']
                 stop_order_id = self.stop_orders[symbol]['order_id']
+                stop_perm_id = self.stop_orders[symbol]['perm_id']
                 print(f"  + Found stop order: ${stop_price:.2f}")
             else:
                 warnings.append(f"{symbol}: No stop order found in IB")
@@ -279,6 +287,7 @@ class ManualPositionSync:
                 'entry_price': avg_cost if avg_cost > 0 else 0.0,
                 'stop_price': stop_price,
                 'stop_order_id': stop_order_id,
+                'stop_perm_id': stop_perm_id,
                 'manually_entered': True
             }
             
@@ -288,15 +297,16 @@ class ManualPositionSync:
             if atr:
                 position_state['positions'][symbol]['atr'] = float(atr)
         
-        # Save position state
-        with open('position_state.json', 'w') as f:
-            json.dump(position_state, f, indent=2)
+        # Save position state (single transaction replaces the whole book)
+        store = PositionStore(DEFAULT_DB_FILE)
+        store.replace_all(position_state['positions'], position_state['metadata'])
+        store.close()
         
         print("\n" + "="*80)
         print("SYNC COMPLETE")
         print("="*80)
         print(f"\n+ Synced {len(position_state['positions'])} positions")
-        print(f"+ State saved to: position_state.json")
+        print(f"+ State saved to: {DEFAULT_DB_FILE}")
         
         if warnings:
             print(f"\n! {len(warnings)} warnings:")
@@ -353,7 +363,7 @@ class ManualPositionSync:
         print("  1. Read your positions from IB")
         print("  2. Read your stop orders from IB")
         print("  3. Match with expected backtest state")
-        print("  4. Create position_state.json")
+        print(f"  4. Write position state to {DEFAULT_DB_FILE}")
         print("  5. Enable daily system to manage them")
         print("="*80)
         
@@ -427,7 +437,7 @@ Prerequisites:
     print("  [x] Placed stop orders for all positions")
     print("  [x] IB Gateway/TWS is running")
     print("  [x] API connections are enabled")
-    print("\nThis script will create 'position_state.json'")
+    print(f"\nThis script will write positions to '{DEFAULT_DB_FILE}'")
     print("="*80)
     
     confirm = input("\nReady to sync? (yes/no): ")
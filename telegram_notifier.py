@@ -170,6 +170,16 @@ Expected rejected: ~{expected_rejections} (28%)
 """
         self.send_message(message)
     
+    def send_stop_alert(self, ticker: str, kind: str, detail: str):
+        """Send intraday stop monitor alert"""
+        message = f"""
+<b>🛑 STOP {kind.replace('_', ' ')}: {ticker}</b>
+{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+{detail}
+"""
+        return self.send_message(message)
+    
     def send_test_message(self):
         """Send test message to verify connection"""
         message = f"""
@@ -0,0 +1,283 @@
+"""
+Trade Log
+=========
+
+Schema-stable trade log used by PositionManager.
+
+- Fixed column set (TRADE_LOG_COLUMNS): every row is written in the same
+  order, missing fields are left blank, so ENTRY/ADJUST/EXIT rows stay aligned
+- Buffered append writer: rows are held in memory and written on commit()
+- Size-based rotation of the active CSV into timestamped segments
+- A log with an older header is moved to <base>.legacy-<timestamp>.csv and
+  left untouched (never compacted, deleted or included in queries)
+- Parquet compaction of rotated segments, partitioned by year and ticker, so
+  history queries only read the partitions they need (requires pyarrow)
+
+Usage:
+    python trade_log.py --compact                  # Compact rotated segments
+    python trade_log.py --ticker XLE --start 2025-01-01
+"""
+
+import csv
+import glob
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+TRADE_LOG_COLUMNS = [
+    'date', 'ticker', 'action', 'quantity', 'old_quantity', 'new_quantity', 'delta',
+    'price', 'fill_price', 'entry_price', 'exit_price', 'stop_price', 'atr',
+    'pnl', 'pnl_pct', 'days_held', 'reason'
+]
+
+NUMERIC_COLUMNS = [
+    'quantity', 'old_quantity', 'new_quantity', 'delta', 'price', 'fill_price',
+    'entry_price', 'exit_price', 'stop_price', 'atr', 'pnl', 'pnl_pct', 'days_held'
+]
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+# Timestamp of rotated segments (legacy logs use 'legacy-<stamp>' and never match)
+SEGMENT_STAMP = re.compile(r'\d{8}-\d{6}')
+
+
+def _has_schema(path: str) -> bool:
+    """True if the CSV was written with the current TRADE_LOG_COLUMNS header"""
+    with open(path, 'r', newline='') as f:
+        return next(csv.reader(f), []) == TRADE_LOG_COLUMNS
+
+
+def _segments(path: str) -> List[str]:
+    """
+    Rotated segments of the active file (<base>.<YYYYmmdd-HHMMSS><ext>)
+
+    Legacy logs moved aside by _rotate_legacy_file and segments with another
+    header are skipped (never compacted, deleted or mixed into queries).
+    """
+    base, ext = os.path.splitext(path)
+    segments = []
+    for candidate in sorted(glob.glob(f"{glob.escape(base)}.*{ext}")):
+        stamp = os.path.splitext(candidate)[0][len(base) + 1:]
+        if not SEGMENT_STAMP.fullmatch(stamp):
+            continue
+        if _has_schema(candidate):
+            segments.append(candidate)
+        else:
+            print(f"⚠️ Skipping trade log segment {candidate} (different header)")
+    return segments
+
+
+def _parquet_dir(path: str) -> str:
+    return os.path.splitext(path)[0] + '_parquet'
+
+
+class TradeLogWriter:
+    """Buffered, schema-stable CSV trade log writer"""
+
+    def __init__(self, path='trade_history.csv', buffer_size=100, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize writer
+
+        Args:
+            path: Active CSV file
+            buffer_size: Rows held before an automatic commit
+            max_bytes: Rotate the active file once it grows past this size
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.buffer: List[Dict] = []
+
+        self._rotate_legacy_file()
+
+    def _rotate_legacy_file(self):
+        """Move a CSV with a different header out of the way (old misaligned log)"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        with open(self.path, 'r', newline='') as f:
+            header = next(csv.reader(f), [])
+
+        if header != TRADE_LOG_COLUMNS:
+            legacy_path = f"{os.path.splitext(self.path)[0]}.legacy-{datetime.now():%Y%m%d-%H%M%S}.csv"
+            os.replace(self.path, legacy_path)
+            print(f"⚠️ Trade log header changed, moved old log to {legacy_path}")
+
+    def append(self, trade_data: Dict):
+        """Buffer a trade row (unknown keys are rejected so the schema can't drift)"""
+        unknown = set(trade_data) - set(TRADE_LOG_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown trade log fields: {sorted(unknown)}")
+
+        self.buffer.append(trade_data)
+        if len(self.buffer) >= self.buffer_size:
+            self.commit()
+
+    def commit(self):
+        """Write buffered rows to disk"""
+        if not self.buffer:
+            return
+
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=TRADE_LOG_COLUMNS, restval='')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self.buffer)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.buffer = []
+
+        if os.path.getsize(self.path) >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> Optional[str]:
+        """Move the active file to a timestamped segment"""
+        self.commit()
+        if not os.path.exists(self.path):
+            return None
+
+        base, ext = os.path.splitext(self.path)
+        segment = f"{base}.{datetime.now():%Y%m%d-%H%M%S}{ext}"
+        os.replace(self.path, segment)
+        print(f"+ Rotated trade log to {segment}")
+        return segment
+
+    def close(self):
+        self.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    return df.reindex(columns=TRADE_LOG_COLUMNS)
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.reindex(columns=TRADE_LOG_COLUMNS)
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    df['ticker'] = df['ticker'].astype(str)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def compact(path='trade_history.csv', parquet_dir: Optional[str] = None) -> int:
+    """
+    Compact rotated CSV segments into the Parquet dataset
+
+    Args:
+        path: Active CSV path (segments are found next to it)
+        parquet_dir: Dataset directory (default: <base>_parquet)
+
+    Returns:
+        Number of rows compacted
+    """
+    if not PARQUET_AVAILABLE:
+        print("⚠️ pyarrow not installed - skipping trade log compaction")
+        return 0
+
+    parquet_dir = parquet_dir or _parquet_dir(path)
+    segments = _segments(path)
+    if not segments:
+        return 0
+
+    df = _normalize(pd.concat([_read_csv(s) for s in segments], ignore_index=True))
+    df['year'] = df['date'].dt.year
+    df = df.sort_values(['ticker', 'date'])
+    df.to_parquet(parquet_dir, partition_cols=['year', 'ticker'], index=False)
+
+    for segment in segments:
+        os.remove(segment)
+
+    print(f"+ Compacted {len(df)} trades from {len(segments)} segments into {parquet_dir}")
+    return len(df)
+
+
+def read_trade_history(path='trade_history.csv', ticker: Optional[str] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       parquet_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Query trade history across the Parquet dataset, rotated segments and active file
+
+    Args:
+        path: Active CSV path
+        ticker: Only this ticker (prunes Parquet partitions)
+        start: Only trades on/after this date
+        end: Only trades on/before this date
+        parquet_dir: Dataset directory (default: <base>_parquet)
+
+    Returns:
+        DataFrame with TRADE_LOG_COLUMNS, sorted by date
+    """
+    parquet_dir = parquet_dir or _parquet_dir(path)
+    start_ts = pd.Timestamp(start) if start else None
+    end_ts = pd.Timestamp(end) if end else None
+
+    frames = []
+
+    if PARQUET_AVAILABLE and os.path.isdir(parquet_dir):
+        filters = []
+        if ticker:
+            filters.append(('ticker', '==', ticker))
+        if start_ts is not None:
+            filters.append(('year', '>=', start_ts.year))
+        if end_ts is not None:
+            filters.append(('year', '<=', end_ts.year))
+        frames.append(pd.read_parquet(parquet_dir, filters=filters or None))
+
+    csv_files = _segments(path)
+    if os.path.exists(path) and _has_schema(path):
+        csv_files.append(path)
+    frames.extend(_read_csv(f) for f in csv_files)
+
+    if not frames:
+        return pd.DataFrame(columns=TRADE_LOG_COLUMNS)
+
+    df = _normalize(pd.concat(frames, ignore_index=True))
+
+    if ticker:
+        df = df[df['ticker'] == ticker]
+    if start_ts is not None:
+        df = df[df['date'] >= start_ts]
+    if end_ts is not None:
+        df = df[df['date'] <= end_ts]
+
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Trade log maintenance and queries')
+    parser.add_argument('--log', default='trade_history.csv', help='Active trade log CSV')
+    parser.add_argument('--rotate', action='store_true', help='Rotate the active file first')
+    parser.add_argument('--compact', action='store_true', help='Compact rotated segments to Parquet')
+    parser.add_argument('--ticker', help='Filter by ticker')
+    parser.add_argument('--start', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='End date (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    if args.rotate:
+        TradeLogWriter(args.log).rotate()
+
+    if args.compact:
+        compact(args.log)
+    else:
+        history = read_trade_history(args.log, ticker=args.ticker, start=args.start, end=args.end)
+        print(history.to_string(index=False) if not history.empty else "No trades")
@@ -0,0 +1,147 @@
+"""
+Universe Registry
+=================
+
+The strategy universe indexed once at import, so quad lookups on hot paths
+(the backtest daily loop, signal printing/export, the publishers) index into
+precomputed structures instead of scanning QUAD_ALLOCATIONS:
+
+- tickers / ids:   sorted tickers and ticker -> integer id
+- quads:           quadrants in config order (Q1..Q4)
+- membership:      [quads x ids] boolean matrix (read-only)
+- quad_ids:        quad -> int array of member ids, in allocation order
+- ticker_quads:    ticker -> tuple of its quads, in config order
+- metadata:        per-id asset metadata (asset_metadata, loaded on first use)
+
+Tickers outside the registry (e.g. a signal-only indicator) have id -1 and
+no quads.
+
+Usage:
+    from universe import UNIVERSE
+    UNIVERSE.quads_of('XLV')                  # ('Q3', 'Q4')
+    UNIVERSE.membership_for(frame.columns)    # [quads x columns] bool
+
+    python universe.py --show XLV
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from config import QUAD_ALLOCATIONS, QUAD_INDICATORS
+
+
+class UniverseRegistry:
+    """Ticker ids and quad membership for one allocation table"""
+
+    def __init__(self, allocations: Mapping = QUAD_ALLOCATIONS,
+                 extra_tickers: Iterable[str] = ()):
+        """
+        Args:
+            allocations: Quadrant -> {ticker: weight} map
+            extra_tickers: Tickers to index without quad membership (indicators)
+        """
+        tickers = set(extra_tickers)
+        for assets in allocations.values():
+            tickers.update(assets)
+
+        self.tickers: Tuple[str, ...] = tuple(sorted(tickers))
+        self.ids: Dict[str, int] = {t: i for i, t in enumerate(self.tickers)}
+        self.quads: Tuple[str, ...] = tuple(allocations)
+        self.quad_index: Dict[str, int] = {q: k for k, q in enumerate(self.quads)}
+
+        self.quad_ids: Dict[str, np.ndarray] = {}
+        self.membership = np.zeros((len(self.quads), len(self.tickers)), dtype=np.bool_)
+        ticker_quads: Dict[str, List[str]] = {t: [] for t in self.tickers}
+        for k, (quad, assets) in enumerate(allocations.items()):
+            ids = np.array([self.ids[t] for t in assets], dtype=np.int64)
+            self.quad_ids[quad] = ids
+            self.membership[k, ids] = True
+            for ticker in assets:
+                ticker_quads[ticker].append(quad)
+        self.membership.setflags(write=False)
+        self.ticker_quads: Dict[str, Tuple[str, ...]] = {t: tuple(q) for t, q in ticker_quads.items()}
+
+        self._metadata = None
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.ids
+
+    def id(self, ticker: str) -> int:
+        """Integer id of a ticker (-1 if not in the universe)"""
+        return self.ids.get(ticker, -1)
+
+    def quads_of(self, ticker: str) -> Tuple[str, ...]:
+        """Quadrants whose allocation includes the ticker (config order)"""
+        return self.ticker_quads.get(ticker, ())
+
+    def primary_quad(self, ticker: str) -> Optional[str]:
+        """First quadrant holding the ticker (None if it is in none)"""
+        quads = self.quads_of(ticker)
+        return quads[0] if quads else None
+
+    def quad_label(self, ticker: str) -> str:
+        """'Q3+Q4'-style label of the ticker's quadrants ('' if none)"""
+        return '+'.join(self.quads_of(ticker))
+
+    def quad_tickers(self, quad: str) -> List[str]:
+        """Tickers of a quadrant in allocation order"""
+        return [self.tickers[i] for i in self.quad_ids[quad]]
+
+    def ids_for(self, columns: Iterable[str]) -> np.ndarray:
+        """Integer ids of columns (-1 where not in the universe)"""
+        return np.array([self.ids.get(t, -1) for t in columns], dtype=np.int64)
+
+    def membership_for(self, columns: Iterable[str]) -> np.ndarray:
+        """
+        Quad membership re-indexed to arbitrary columns
+
+        Returns:
+            [quads x columns] bool array (False for unknown tickers)
+        """
+        ids = self.ids_for(columns)
+        known = ids >= 0
+        members = np.zeros((len(self.quads), len(ids)), dtype=np.bool_)
+        members[:, known] = self.membership[:, ids[known]]
+        return members
+
+    @property
+    def metadata(self) -> Tuple[Dict, ...]:
+        """Asset metadata per id (from the asset metadata index, loaded once)"""
+        if self._metadata is None:
+            from asset_metadata import get_asset
+            self._metadata = tuple(get_asset(t) for t in self.tickers)
+        return self._metadata
+
+    def asset(self, ticker: str) -> Dict:
+        """Metadata of a ticker (static tables for tickers outside the universe)"""
+        i = self.id(ticker)
+        if i < 0:
+            from asset_metadata import get_asset
+            return get_asset(ticker)
+        return self.metadata[i]
+
+
+# Production universe: allocations plus quadrant indicator tickers
+UNIVERSE = UniverseRegistry(QUAD_ALLOCATIONS,
+                            [t for indicators in QUAD_INDICATORS.values() for t in indicators])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect the universe registry')
+    parser.add_argument('--show', metavar='TICKER', help='Print one ticker instead of the summary')
+    args = parser.parse_args()
+
+    if args.show:
+        ticker = args.show.upper()
+        print(f"{ticker}: id {UNIVERSE.id(ticker)}, quads {UNIVERSE.quad_label(ticker) or '-'}")
+        print(f"  {UNIVERSE.asset(ticker)}")
+    else:
+        print(f"{len(UNIVERSE)} tickers, {len(UNIVERSE.quads)} quads")
+        for quad in UNIVERSE.quads:
+            print(f"  {quad}: {', '.join(UNIVERSE.quad_tickers(quad))}")
@@ -0,0 +1,273 @@
+"""
+Variant Engine - Lock-Step Parameter Sweeps
+===========================================
+
+Runs many execution variants of QuadrantPortfolioBacktest in one
+simulation pass. Variants only differ in parameters that do not change
+the signals' inputs:
+
+- max_positions:        top-N cut of the target weights
+- atr_stop_loss:        ATR stop multiplier (None = no stops)
+- min_trade_threshold:  minimum weight delta for a rebalance
+
+so prices, opens, EMA, volatility, ATR and the daily top quads are loaded
+and computed once and shared. Per-variant state (positions, pending
+entries, entry prices, equity) is held as [variants x tickers] arrays and
+every variant advances through the same day together; the daily loop runs
+once instead of once per variant, and memory is one set of matrices plus
+one target-weight matrix per distinct max_positions (instead of a full
+backtest per worker process).
+
+Each variant's equity curve is bit-identical to a QuadrantPortfolioBacktest
+run with the same parameters: same operations, and sums accumulated in the
+same ticker order.
+
+Usage:
+    python variant_engine.py --start 2020-01-01 --max-positions 5 10 none \\
+        --stops none 1.5 2.0 --thresholds 0.02 0.05
+
+    from variant_engine import run_variants
+    results = run_variants(backtest, [{'max_positions': 10, 'atr_stop_loss': 2.0},
+                                      {'max_positions': 5, 'min_trade_threshold': 0.02}])
+"""
+
+import copy
+import itertools
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from quad_portfolio_backtest import (COST_PER_LEG_BPS, QuadrantPortfolioBacktest,
+                                     performance_metrics)
+from price_matrix_store import wilder_atr
+from universe import UNIVERSE
+
+# Parameters a variant may set (everything else is shared with the base backtest)
+VARIANT_PARAMS = ('max_positions', 'atr_stop_loss', 'min_trade_threshold')
+
+
+def _variant_params(backtest: QuadrantPortfolioBacktest, variant: Dict) -> Dict:
+    unknown = set(variant) - set(VARIANT_PARAMS)
+    if unknown:
+        raise ValueError(f"Variant parameters {sorted(unknown)} change the shared indicators - "
+                         f"run separate backtests (variants may set {', '.join(VARIANT_PARAMS)})")
+    return {name: variant.get(name, getattr(backtest, name)) for name in VARIANT_PARAMS}
+
+
+def _ensure_signals(backtest: QuadrantPortfolioBacktest, need_atr: bool):
+    """Load data/signals on the base backtest once (ATR too if any variant has stops)"""
+    if backtest.target_weights is None:
+        backtest.prepare_signals()
+    if need_atr and backtest.atr_data is None:
+        # Same Wilder ATR fetch_data() loads when the base has stops
+        backtest.atr_data = backtest._stored_atr()
+        if backtest.atr_data is None:
+            backtest.atr_data = wilder_atr(backtest.price_data, backtest.atr_period,
+                                           backtest.high_data, backtest.low_data)
+
+
+def _matrix(frame: pd.DataFrame, index, columns) -> np.ndarray:
+    """[dates x tickers] float array, NaN for tickers the frame does not have"""
+    if frame is None:
+        return np.full((len(index), len(columns)), np.nan)
+    return frame.reindex(index=index, columns=columns).to_numpy(dtype=float)
+
+
+def run_variants(backtest: QuadrantPortfolioBacktest, variants: List[Dict]) -> List[Dict]:
+    """
+    Simulate every variant in one lock-step pass
+
+    Args:
+        backtest: Base backtest (dates, capital and indicator parameters);
+                  its data is fetched on first use and reused afterwards
+        variants: Parameter overrides, e.g. [{'max_positions': 5}, {'atr_stop_loss': 2.0}]
+
+    Returns:
+        One dict per variant: params, portfolio_value (Series), total_costs,
+        rebalances, entries_confirmed, entries_rejected, trades_skipped,
+        stops_hit and the performance metrics of generate_results()
+    """
+    params = [_variant_params(backtest, v) for v in variants]
+    if not params:
+        return []
+    _ensure_signals(backtest, need_atr=any(p['atr_stop_loss'] is not None for p in params))
+
+    top_quads = backtest.quad_history
+    base_weights = backtest.target_weights
+    dates, columns = base_weights.index, base_weights.columns
+    n_vars, n_days, n_cols = len(params), len(dates), len(columns)
+
+    # Target weights: one matrix per distinct top-N cut
+    cuts = sorted({p['max_positions'] for p in params}, key=lambda n: (n is None, n or 0))
+    weight_stack = np.empty((len(cuts), n_days, n_cols))
+    for k, cut in enumerate(cuts):
+        variant_bt = copy.copy(backtest)
+        variant_bt.max_positions = cut
+        weights = (base_weights if cut == backtest.max_positions
+                   else variant_bt.calculate_target_weights(top_quads))
+        weight_stack[k] = weights.reindex(index=dates, columns=columns).to_numpy(dtype=float)
+    cut_index = np.array([cuts.index(p['max_positions']) for p in params])
+
+    # Shared matrices
+    price = _matrix(backtest.price_data, dates, columns)
+    opens = _matrix(backtest.open_data, dates, columns)
+    ema = _matrix(backtest.ema_data, dates, columns)
+    atr = _matrix(backtest.atr_data, dates, columns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        known = ~np.isnan(price) & ~np.isnan(ema)
+        above = known & (price > ema)
+        overnight = np.zeros_like(price)
+        intraday = np.zeros_like(price)
+        valid = ~np.isnan(price[:-1]) & ~np.isnan(opens[1:]) & ~np.isnan(price[1:])
+        overnight[1:] = np.where(valid, opens[1:] / price[:-1] - 1, 0.0)
+        intraday[1:] = np.where(valid, price[1:] / opens[1:] - 1, 0.0)
+
+    # EMA crossovers between the signal dates (shared by all variants)
+    crossover = np.zeros(n_days, dtype=bool)
+    crossover[2:] = (known[1:-1] & known[:-2] & (above[1:-1] != above[:-2])).any(axis=1)
+
+    quad_members = dict(zip(UNIVERSE.quads, UNIVERSE.membership_for(columns)))
+    top1 = top_quads['Top1'].reindex(dates).to_numpy(dtype=object)
+    top2 = top_quads['Top2'].reindex(dates).to_numpy(dtype=object)
+
+    # Per-variant settings and state [variants x tickers]
+    stop_mult = np.array([np.nan if p['atr_stop_loss'] is None else p['atr_stop_loss'] for p in params])
+    has_stops = ~np.isnan(stop_mult)
+    threshold = np.array([p['min_trade_threshold'] for p in params], dtype=float)[:, None]
+    actual = np.zeros((n_vars, n_cols))
+    prev_positions = np.zeros((n_vars, n_cols))
+    pending = np.zeros((n_vars, n_cols))  # weight waiting for confirmation (0 = none)
+    entry_prices = np.full((n_vars, n_cols), np.nan)
+    equity = np.empty((n_vars, n_days))
+    equity[:, 0] = backtest.initial_capital
+    counters = {name: np.zeros(n_vars, dtype=int) for name in
+                ('rebalances', 'entries_confirmed', 'entries_rejected', 'trades_skipped', 'stops_hit')}
+    total_costs = np.zeros(n_vars)
+    cost_rate = COST_PER_LEG_BPS / 10000
+
+    prev_top_quads = None
+    for i in range(1, n_days):
+        t = i - 1  # Signal date (T-1)
+        current_top_quads = (top1[t], top2[t])
+
+        # Pending entries confirmed on TODAY's EMA
+        waiting = pending > 0
+        confirmed = waiting & above[i]
+        counters['entries_confirmed'] += confirmed.sum(axis=1)
+        counters['entries_rejected'] += (waiting & ~above[i]).sum(axis=1)
+        confirmed_weights = np.where(confirmed, pending, 0.0)
+        pending[:] = 0.0
+
+        # ATR stops (entry prices are only tracked for variants with stops)
+        with np.errstate(invalid='ignore'):
+            hit = ((actual > 0) & ~np.isnan(entry_prices) & ~np.isnan(price[i]) & ~np.isnan(atr[i])
+                   & (price[i] <= entry_prices - (atr[i] * stop_mult[:, None])))
+        actual[hit] = 0.0
+        entry_prices[hit] = np.nan
+        counters['stops_hit'] += hit.sum(axis=1)
+
+        shared_trigger = (prev_top_quads is None or current_top_quads != prev_top_quads
+                          or crossover[i])
+        rebalance = shared_trigger | hit.any(axis=1) | confirmed.any(axis=1)
+
+        if rebalance.any():
+            counters['rebalances'] += rebalance
+            rows = rebalance[:, None]
+
+            # Tickers in a quad that stayed in the top 2 are not resized
+            stable = np.zeros(n_cols, dtype=bool)
+            if prev_top_quads is not None and current_top_quads != prev_top_quads:
+                for quad in set(prev_top_quads) & set(current_top_quads):
+                    stable |= quad_members.get(quad, False)
+
+            actual = np.where(confirmed, confirmed_weights, actual)
+            entry_prices = np.where(confirmed & has_stops[:, None], price[i], entry_prices)
+
+            targets = weight_stack[cut_index, t]
+            exit_ = rows & (targets == 0) & (actual > 0)
+            enter = rows & (targets > 0) & (actual == 0) & ~confirmed
+            hold = rows & (targets > 0) & (actual > 0)
+            resize = hold & ~stable & (np.abs(targets - actual) > threshold)
+
+            counters['trades_skipped'] += (hold & ~resize).sum(axis=1)
+            pending = np.where(enter, targets, 0.0)
+            actual = np.where(resize, targets, np.where(exit_, 0.0, actual))
+            entry_prices[exit_] = np.nan
+
+        prev_top_quads = current_top_quads
+
+        # Overnight at OLD positions, intraday at NEW positions (ticker order, as the loop)
+        legs = np.empty((n_vars, 2 * n_cols))
+        legs[:, 0::2] = prev_positions * overnight[i]
+        legs[:, 1::2] = actual * intraday[i]
+        daily_return = np.cumsum(legs, axis=1)[:, -1]
+        equity[:, i] = equity[:, i - 1] * (1 + daily_return)
+
+        if rebalance.any():
+            position_change = np.abs(actual - prev_positions)
+            costs = np.where(position_change > 0.0001,
+                             (position_change * equity[:, i][:, None]) * cost_rate, 0.0)
+            daily_costs = np.where(rebalance, np.cumsum(costs, axis=1)[:, -1], 0.0)
+            equity[:, i] -= daily_costs
+            total_costs += daily_costs
+
+        prev_positions = actual.copy()
+
+    results = []
+    for v, p in enumerate(params):
+        portfolio_value = pd.Series(equity[v], index=dates)
+        result = {'params': p, 'portfolio_value': portfolio_value, 'total_costs': float(total_costs[v])}
+        result.update({name: int(values[v]) for name, values in counters.items()})
+        result.update(performance_metrics(portfolio_value, backtest.initial_capital))
+        results.append(result)
+    return results
+
+
+def variant_grid(max_positions=(None,), atr_stop_loss=(None,), min_trade_threshold=(0.05,)) -> List[Dict]:
+    """Every combination of the given parameter values"""
+    return [dict(zip(VARIANT_PARAMS, combo))
+            for combo in itertools.product(max_positions, atr_stop_loss, min_trade_threshold)]
+
+
+def _optional_number(value: str):
+    return None if value.lower() == 'none' else float(value)
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description='Lock-step parameter sweep of the quad backtest')
+    parser.add_argument('--start', default='2020-01-01', help='Backtest start (default 2020-01-01)')
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'), help='Backtest end (default today)')
+    parser.add_argument('--capital', type=float, default=50000, help='Initial capital')
+    parser.add_argument('--momentum-days', type=int, default=20, help='Momentum lookback (shared)')
+    parser.add_argument('--max-positions', nargs='+', default=['10'], type=_optional_number,
+                        help='Top-N values to sweep ("none" = no limit)')
+    parser.add_argument('--stops', nargs='+', default=['2.0'], type=_optional_number,
+                        help='ATR stop multipliers to sweep ("none" = no stops)')
+    parser.add_argument('--thresholds', nargs='+', default=[0.05], type=float,
+                        help='Minimum trade deltas to sweep')
+    args = parser.parse_args()
+
+    base = QuadrantPortfolioBacktest(args.start, args.end, initial_capital=args.capital,
+                                     momentum_days=args.momentum_days)
+    grid = variant_grid([None if n is None else int(n) for n in args.max_positions],
+                        args.stops, args.thresholds)
+    base.prepare_signals()
+
+    started = time.perf_counter()
+    results = run_variants(base, grid)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{len(results)} variants in {elapsed:.2f}s ({elapsed / len(results) * 1000:.0f} ms/variant)\n")
+    print(f"{'MaxPos':>6} {'Stop':>6} {'MinDelta':>8} {'Return':>9} {'Annual':>8} {'Sharpe':>7} "
+          f"{'MaxDD':>8} {'Rebal':>6} {'Stops':>6} {'Costs':>10}")
+    print("-" * 86)
+    for r in sorted(results, key=lambda r: r['sharpe'], reverse=True):
+        p = r['params']
+        print(f"{str(p['max_positions']):>6} {str(p['atr_stop_loss']):>6} {p['min_trade_threshold']:>8.2%} "
+              f"{r['total_return']:>8.1f}% {r['annual_return']:>7.1f}% {r['sharpe']:>7.2f} "
+              f"{r['max_drawdown']:>7.1f}% {r['rebalances']:>6} {r['stops_hit']:>6} ${r['total_costs']:>9,.0f}")